@@ -7,12 +7,14 @@ setup(
     install_requires=[
         "fastapi==0.115.0",
         "uvicorn[standard]==0.30.1",
-        "sqlalchemy==2.0.30",
+        "sqlalchemy[asyncio]==2.0.30",
         "alembic==1.13.1",
         "psycopg2-binary==2.9.9",
+        "psycopg[binary]==3.2.4",
         "python-dotenv==1.0.0",
         "passlib[bcrypt]==1.7.4",
         "python-jose[cryptography]==3.3.0",
         "pydantic-settings==2.2.0",
+        "numpy==2.1.3",
     ],
 )
\ No newline at end of file
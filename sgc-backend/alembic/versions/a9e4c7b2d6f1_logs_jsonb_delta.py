@@ -0,0 +1,66 @@
+"""logs: JSONB, delta of UPDATE entries and GIN index
+
+Revision ID: a9e4c7b2d6f1
+Revises: f6c2a8d4e1b7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c7b2d6f1'
+down_revision: Union[str, Sequence[str], None] = 'f6c2a8d4e1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for coluna in ('dados_antigos', 'dados_novos'):
+        op.alter_column(
+            'logs', coluna,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f'{coluna}::jsonb',
+        )
+
+    # Registros de UPDATE já gravados: mantém apenas os campos alterados
+    # (as duas expressões do SET enxergam os valores anteriores da linha)
+    op.execute("""
+        UPDATE logs SET
+            dados_antigos = COALESCE((
+                SELECT jsonb_object_agg(a.key, a.value)
+                FROM jsonb_each(dados_antigos) a
+                WHERE a.key <> 'updated_at'
+                  AND a.value IS DISTINCT FROM dados_novos -> a.key
+            ), '{}'::jsonb),
+            dados_novos = COALESCE((
+                SELECT jsonb_object_agg(n.key, n.value)
+                FROM jsonb_each(dados_novos) n
+                WHERE n.key <> 'updated_at'
+                  AND n.value IS DISTINCT FROM dados_antigos -> n.key
+            ), '{}'::jsonb)
+        WHERE acao = 'UPDATE'
+          AND jsonb_typeof(dados_antigos) = 'object'
+          AND jsonb_typeof(dados_novos) = 'object'
+    """)
+
+    op.create_index('idx_logs_dados_novos_gin', 'logs', ['dados_novos'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    # Os snapshots completos não são restaurados
+    op.drop_index('idx_logs_dados_novos_gin', table_name='logs')
+    for coluna in ('dados_antigos', 'dados_novos'):
+        op.alter_column(
+            'logs', coluna,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{coluna}::json',
+        )
@@ -0,0 +1,111 @@
+"""partition logs by month
+
+Revision ID: b3f7d1e9a5c2
+Revises: a9e4c7b2d6f1
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7d1e9a5c2'
+down_revision: Union[str, Sequence[str], None] = 'a9e4c7b2d6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições criadas além do mês atual (a rotina app/db/arquivar_logs.py mantém a janela)
+MESES_FUTUROS = 3
+
+COLUNAS = (
+    "id, usuario_id, usuario_email, acao, entidade, entidade_id, "
+    "dados_antigos, dados_novos, ip, user_agent, created_at"
+)
+
+INDICES = (
+    ('idx_logs_created_at_id', ['created_at', 'id'], None),
+    ('idx_logs_usuario_created_at', ['usuario_id', 'created_at', 'id'], None),
+    ('idx_logs_entidade_created_at', ['entidade', 'created_at', 'id'], None),
+    ('idx_logs_dados_novos_gin', ['dados_novos'], 'gin'),
+)
+
+
+def _somar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _criar_tabela(nome: str, sequencia: str, chave: str, sufixo: str = "") -> None:
+    op.execute(f"""
+        CREATE TABLE {nome} (
+            id INTEGER NOT NULL DEFAULT nextval('{sequencia}'::regclass),
+            usuario_id INTEGER,
+            usuario_email VARCHAR(100),
+            acao VARCHAR(50) NOT NULL,
+            entidade VARCHAR(50) NOT NULL,
+            entidade_id INTEGER,
+            dados_antigos JSONB,
+            dados_novos JSONB,
+            ip VARCHAR(45),
+            user_agent VARCHAR(255),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT logs_pkey PRIMARY KEY ({chave}),
+            CONSTRAINT logs_usuario_id_fkey FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        ) {sufixo}
+    """)
+
+
+def _trocar_tabela(antiga: str) -> str:
+    """Renomeia `logs` e libera os nomes dos índices. Retorna a sequência do id."""
+    conn = op.get_bind()
+    sequencia = conn.execute(sa.text("SELECT pg_get_serial_sequence('logs', 'id')")).scalar()
+    op.execute(f"ALTER TABLE logs RENAME TO {antiga}")
+    op.execute(f"ALTER TABLE {antiga} RENAME CONSTRAINT logs_pkey TO {antiga}_pkey")
+    for nome, _, _ in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    op.execute("DROP INDEX IF EXISTS ix_logs_id")
+    return sequencia
+
+
+def _finalizar(antiga: str, sequencia: str) -> None:
+    op.execute(f"INSERT INTO logs ({COLUNAS}) SELECT {COLUNAS} FROM {antiga}")
+    # A sequência passa a pertencer à nova tabela antes da remoção da antiga
+    op.execute(f"ALTER SEQUENCE {sequencia} OWNED BY logs.id")
+    op.execute(f"DROP TABLE {antiga} CASCADE")
+    for nome, colunas, metodo in INDICES:
+        op.create_index(nome, 'logs', colunas, unique=False, postgresql_using=metodo)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    sequencia = _trocar_tabela('logs_antigo')
+    _criar_tabela('logs', sequencia, 'id, created_at', 'PARTITION BY RANGE (created_at)')
+
+    # Uma partição por mês (UTC), do registro mais antigo até MESES_FUTUROS à frente
+    atual = datetime.now(timezone.utc).date().replace(day=1)
+    primeiro = conn.execute(sa.text(
+        "SELECT date_trunc('month', min(created_at) AT TIME ZONE 'UTC')::date FROM logs_antigo"
+    )).scalar() or atual
+    mes = min(primeiro, atual)
+    while mes <= _somar_meses(atual, MESES_FUTUROS):
+        fim = _somar_meses(mes, 1)
+        op.execute(
+            f"CREATE TABLE logs_{mes.year:04d}_{mes.month:02d} PARTITION OF logs "
+            f"FOR VALUES FROM ('{mes.isoformat()} 00:00:00+00') TO ('{fim.isoformat()} 00:00:00+00')"
+        )
+        mes = fim
+    op.execute("CREATE TABLE logs_padrao PARTITION OF logs DEFAULT")
+
+    _finalizar('logs_antigo', sequencia)
+
+
+def downgrade() -> None:
+    # Meses já arquivados em LOGS_ARQUIVO_DIR não voltam para a tabela
+    sequencia = _trocar_tabela('logs_particionada')
+    _criar_tabela('logs', sequencia, 'id')
+    _finalizar('logs_particionada', sequencia)
+    op.create_index('ix_logs_id', 'logs', ['id'], unique=False)
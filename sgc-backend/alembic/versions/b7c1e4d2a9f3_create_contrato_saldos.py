@@ -0,0 +1,71 @@
+"""create contrato_saldos
+
+Revision ID: b7c1e4d2a9f3
+Revises: a1b2c3d4e5f6, f8a3b2c1d9e0
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e4d2a9f3'
+down_revision: Union[str, Sequence[str], None] = ('a1b2c3d4e5f6', 'f8a3b2c1d9e0')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contrato_saldos',
+        sa.Column('contrato_id', sa.Integer(), nullable=False),
+        sa.Column('valor_executado', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('valor_faturado', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('valor_recebido', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('atualizado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['contrato_id'], ['contratos.id'],
+            name='fk_contrato_saldos_contrato',
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('contrato_id')
+    )
+
+    # ─── Carga inicial a partir das tabelas de origem ────────────
+    op.execute("""
+        INSERT INTO contrato_saldos (contrato_id, valor_executado, valor_faturado, valor_recebido)
+        SELECT
+            c.id,
+            COALESCE(exe.valor, 0),
+            COALESCE(fat.valor, 0),
+            COALESCE(rec.valor, 0)
+        FROM contratos c
+        LEFT JOIN (
+            SELECT contrato_id, SUM(valor_aprovado) AS valor
+            FROM boletins_medicao
+            WHERE status IN ('APROVADO', 'FATURADO')
+            GROUP BY contrato_id
+        ) exe ON exe.contrato_id = c.id
+        LEFT JOIN (
+            SELECT bm.contrato_id, SUM(f.valor_bruto_nf) AS valor
+            FROM faturamentos f
+            JOIN boletins_medicao bm ON bm.id = f.bm_id
+            WHERE f.status <> 'CANCELADO'
+            GROUP BY bm.contrato_id
+        ) fat ON fat.contrato_id = c.id
+        LEFT JOIN (
+            SELECT bm.contrato_id, SUM(p.valor_pago) AS valor
+            FROM pagamentos p
+            JOIN faturamentos f ON f.id = p.faturamento_id
+            JOIN boletins_medicao bm ON bm.id = f.bm_id
+            WHERE f.status <> 'CANCELADO'
+            GROUP BY bm.contrato_id
+        ) rec ON rec.contrato_id = c.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('contrato_saldos')
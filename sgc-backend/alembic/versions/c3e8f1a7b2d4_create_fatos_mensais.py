@@ -0,0 +1,85 @@
+"""create fatos_mensais
+
+Revision ID: c3e8f1a7b2d4
+Revises: b7c1e4d2a9f3
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f1a7b2d4'
+down_revision: Union[str, Sequence[str], None] = 'b7c1e4d2a9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'fatos_mensais',
+        sa.Column('contrato_id', sa.Integer(), nullable=False),
+        sa.Column('mes', sa.Date(), nullable=False, comment='Primeiro dia do mês de competência'),
+        sa.Column('valor_medido', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('valor_aprovado', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('qtd_boletins_aprovados', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('valor_faturado', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('valor_retido', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('valor_recebido', sa.DECIMAL(precision=15, scale=2), nullable=False, server_default='0'),
+        sa.Column('atualizado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['contrato_id'], ['contratos.id'],
+            name='fk_fatos_mensais_contrato',
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('contrato_id', 'mes')
+    )
+    op.create_index('idx_fatos_mensais_mes', 'fatos_mensais', ['mes'], unique=False)
+
+    # ─── Carga inicial a partir das tabelas de origem ────────────
+    op.execute("""
+        INSERT INTO fatos_mensais (
+            contrato_id, mes, valor_medido, valor_aprovado, qtd_boletins_aprovados,
+            valor_faturado, valor_retido, valor_recebido
+        )
+        SELECT contrato_id, mes,
+               SUM(medido), SUM(aprovado), SUM(qtd_aprovados),
+               SUM(faturado), SUM(retido), SUM(recebido)
+        FROM (
+            SELECT bm.contrato_id, date_trunc('month', bm.periodo_fim)::date AS mes,
+                   bm.valor_total_medido AS medido, 0 AS aprovado, 0 AS qtd_aprovados,
+                   0 AS faturado, 0 AS retido, 0 AS recebido
+            FROM boletins_medicao bm
+            WHERE bm.status <> 'CANCELADO'
+            UNION ALL
+            SELECT bm.contrato_id, date_trunc('month', bm.periodo_fim)::date,
+                   0, COALESCE(bm.valor_aprovado, 0), 1, 0, 0, 0
+            FROM boletins_medicao bm
+            WHERE bm.status IN ('APROVADO', 'FATURADO')
+            UNION ALL
+            SELECT bm.contrato_id, date_trunc('month', f.data_emissao)::date,
+                   0, 0, 0, f.valor_bruto_nf,
+                   f.iss_retido + f.inss_retido + f.irrf_retido
+                   + f.csll_retido + f.pis_retido + f.cofins_retido,
+                   0
+            FROM faturamentos f
+            JOIN boletins_medicao bm ON bm.id = f.bm_id
+            WHERE f.status <> 'CANCELADO'
+            UNION ALL
+            SELECT bm.contrato_id, date_trunc('month', p.data_pagamento)::date,
+                   0, 0, 0, 0, 0, p.valor_pago
+            FROM pagamentos p
+            JOIN faturamentos f ON f.id = p.faturamento_id
+            JOIN boletins_medicao bm ON bm.id = f.bm_id
+            WHERE f.status <> 'CANCELADO'
+        ) lancamentos
+        GROUP BY contrato_id, mes
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_fatos_mensais_mes', table_name='fatos_mensais')
+    op.drop_table('fatos_mensais')
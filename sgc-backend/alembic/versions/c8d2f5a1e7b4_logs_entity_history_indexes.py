@@ -0,0 +1,34 @@
+"""logs: indexes for the per-entity history
+
+Revision ID: c8d2f5a1e7b4
+Revises: b3f7d1e9a5c2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2f5a1e7b4'
+down_revision: Union[str, Sequence[str], None] = 'b3f7d1e9a5c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Criados na tabela particionada: o Postgres cria o índice em cada partição
+    op.create_index(
+        'idx_logs_entidade_id_created_at', 'logs',
+        ['entidade', 'entidade_id', 'created_at', 'id'], unique=False,
+    )
+    op.create_index(
+        'idx_logs_dados_antigos_gin', 'logs', ['dados_antigos'], unique=False,
+        postgresql_using='gin', postgresql_ops={'dados_antigos': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_logs_dados_antigos_gin', table_name='logs')
+    op.drop_index('idx_logs_entidade_id_created_at', table_name='logs')
@@ -0,0 +1,68 @@
+"""create alertas
+
+Revision ID: d4f2a6b8c1e3
+Revises: c3e8f1a7b2d4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f2a6b8c1e3'
+down_revision: Union[str, Sequence[str], None] = 'c3e8f1a7b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'alertas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chave', sa.String(length=120), nullable=False),
+        sa.Column('tipo', sa.String(length=50), nullable=False),
+        sa.Column('titulo', sa.String(length=200), nullable=False),
+        sa.Column('mensagem', sa.Text(), nullable=False),
+        sa.Column('severidade', sa.String(length=20), nullable=False),
+        sa.Column('contrato_id', sa.Integer(), nullable=False),
+        sa.Column('boletim_id', sa.Integer(), nullable=True),
+        sa.Column('faturamento_id', sa.Integer(), nullable=True),
+        sa.Column('seguro_id', sa.Integer(), nullable=True),
+        sa.Column('primeira_ocorrencia', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('ultima_avaliacao', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('resolvido_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('reconhecido_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('reconhecido_por_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['contrato_id'], ['contratos.id'],
+            name='fk_alertas_contrato',
+            ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['reconhecido_por_id'], ['usuarios.id'],
+            name='fk_alertas_reconhecido_por',
+            ondelete='SET NULL'
+        ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alertas_id', 'alertas', ['id'], unique=False)
+    op.create_index('ix_alertas_contrato_id', 'alertas', ['contrato_id'], unique=False)
+    op.create_index('idx_alertas_aberto_severidade', 'alertas', ['resolvido_em', 'severidade'], unique=False)
+    # No máximo um alerta aberto por chave
+    op.create_index(
+        'uq_alertas_chave_aberto', 'alertas', ['chave'], unique=True,
+        postgresql_where=sa.text('resolvido_em IS NULL')
+    )
+    # A carga inicial é feita pela varredura do avaliador na inicialização
+    # da API (ou manualmente: python -m app.db.avaliar_alertas)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_alertas_chave_aberto', table_name='alertas')
+    op.drop_index('idx_alertas_aberto_severidade', table_name='alertas')
+    op.drop_index('ix_alertas_contrato_id', table_name='alertas')
+    op.drop_index('ix_alertas_id', table_name='alertas')
+    op.drop_table('alertas')
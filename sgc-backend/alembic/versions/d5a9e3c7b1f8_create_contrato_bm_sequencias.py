@@ -0,0 +1,84 @@
+"""create contrato_bm_sequencias and unique BM number per contract
+
+Revision ID: d5a9e3c7b1f8
+Revises: c8d2f5a1e7b4
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9e3c7b1f8'
+down_revision: Union[str, Sequence[str], None] = 'c8d2f5a1e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contrato_bm_sequencias',
+        sa.Column('contrato_id', sa.Integer(), nullable=False),
+        sa.Column('ultimo_numero', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(
+            ['contrato_id'], ['contratos.id'],
+            name='fk_contrato_bm_sequencias_contrato',
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('contrato_id')
+    )
+
+    # ─── Números repetidos (gerados em paralelo pelo MAX()+1 antigo) ───
+    # O BM mais antigo mantém o número; os demais vão para o fim da
+    # sequência do contrato, na ordem de criação
+    op.execute("""
+        WITH repetidos AS (
+            SELECT id, contrato_id,
+                   row_number() OVER (PARTITION BY contrato_id, numero_sequencial ORDER BY id) AS ordem
+            FROM boletins_medicao
+        ),
+        renumerados AS (
+            SELECT r.id,
+                   m.maximo + row_number() OVER (PARTITION BY r.contrato_id ORDER BY r.id) AS numero
+            FROM repetidos r
+            JOIN (
+                SELECT contrato_id, MAX(numero_sequencial) AS maximo
+                FROM boletins_medicao
+                GROUP BY contrato_id
+            ) m ON m.contrato_id = r.contrato_id
+            WHERE r.ordem > 1
+        )
+        UPDATE boletins_medicao b
+        SET numero_sequencial = n.numero
+        FROM renumerados n
+        WHERE b.id = n.id
+    """)
+
+    # Bancos criados pelo metadata já têm a constraint
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_bm_por_contrato') THEN
+                ALTER TABLE boletins_medicao
+                    ADD CONSTRAINT unique_bm_por_contrato UNIQUE (contrato_id, numero_sequencial);
+            END IF;
+        END
+        $$;
+    """)
+
+    # ─── Carga inicial: último número de cada contrato ────────────
+    op.execute("""
+        INSERT INTO contrato_bm_sequencias (contrato_id, ultimo_numero)
+        SELECT contrato_id, MAX(numero_sequencial)
+        FROM boletins_medicao
+        GROUP BY contrato_id
+    """)
+
+
+def downgrade() -> None:
+    # A constraint unique_bm_por_contrato faz parte do modelo desde a
+    # criação da tabela e é mantida
+    op.drop_table('contrato_bm_sequencias')
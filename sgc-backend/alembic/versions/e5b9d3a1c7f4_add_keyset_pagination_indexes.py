@@ -0,0 +1,45 @@
+"""add keyset pagination indexes
+
+Revision ID: e5b9d3a1c7f4
+Revises: d4f2a6b8c1e3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d3a1c7f4'
+down_revision: Union[str, Sequence[str], None] = 'd4f2a6b8c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Logs: (created_at, id) com e sem os filtros mais usados
+    op.create_index('idx_logs_created_at_id', 'logs', ['created_at', 'id'], unique=False)
+    op.create_index('idx_logs_usuario_created_at', 'logs', ['usuario_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_logs_entidade_created_at', 'logs', ['entidade', 'created_at', 'id'], unique=False)
+
+    # Prateleira: (data_execucao, id), global e por contrato
+    op.drop_index('idx_prateleira_data_execucao', table_name='prateleira_execucoes')
+    op.create_index('idx_prateleira_data_execucao', 'prateleira_execucoes', ['data_execucao', 'id'], unique=False)
+    op.create_index(
+        'idx_prateleira_contrato_data_execucao', 'prateleira_execucoes',
+        ['contrato_id', 'data_execucao', 'id'], unique=False
+    )
+
+    # Boletins: listagem global por status, ordenada por id
+    op.create_index('idx_bm_status_id', 'boletins_medicao', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_bm_status_id', table_name='boletins_medicao')
+    op.drop_index('idx_prateleira_contrato_data_execucao', table_name='prateleira_execucoes')
+    op.drop_index('idx_prateleira_data_execucao', table_name='prateleira_execucoes')
+    op.create_index('idx_prateleira_data_execucao', 'prateleira_execucoes', ['data_execucao'], unique=False)
+    op.drop_index('idx_logs_entidade_created_at', table_name='logs')
+    op.drop_index('idx_logs_usuario_created_at', table_name='logs')
+    op.drop_index('idx_logs_created_at_id', table_name='logs')
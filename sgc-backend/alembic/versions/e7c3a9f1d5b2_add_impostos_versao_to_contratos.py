@@ -0,0 +1,34 @@
+"""add impostos_versao to contratos
+
+Revision ID: e7c3a9f1d5b2
+Revises: d5a9e3c7b1f8
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a9f1d5b2'
+down_revision: Union[str, Sequence[str], None] = 'd5a9e3c7b1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Incrementada a cada alteração em contrato_impostos; o cache de
+    # alíquotas de cada processo só é usado se a versão for a mesma
+    op.add_column(
+        'contratos',
+        sa.Column(
+            'impostos_versao', sa.Integer(), nullable=False, server_default='0',
+            comment='Incrementada a cada alteração em contrato_impostos (valida o cache de alíquotas)'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('contratos', 'impostos_versao')
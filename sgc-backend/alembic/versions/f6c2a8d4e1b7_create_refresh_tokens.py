@@ -0,0 +1,51 @@
+"""create refresh_tokens
+
+Revision ID: f6c2a8d4e1b7
+Revises: e5b9d3a1c7f4
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c2a8d4e1b7'
+down_revision: Union[str, Sequence[str], None] = 'e5b9d3a1c7f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'refresh_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('familia', sa.String(length=36), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expira_em', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('usado_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('revogado_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ip', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['usuario_id'], ['usuarios.id'],
+            name='fk_refresh_tokens_usuario',
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash', name='uq_refresh_tokens_token_hash')
+    )
+    op.create_index('ix_refresh_tokens_id', 'refresh_tokens', ['id'], unique=False)
+    op.create_index('idx_refresh_tokens_familia', 'refresh_tokens', ['familia'], unique=False)
+    op.create_index('idx_refresh_tokens_usuario_expira', 'refresh_tokens', ['usuario_id', 'expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_refresh_tokens_usuario_expira', table_name='refresh_tokens')
+    op.drop_index('idx_refresh_tokens_familia', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -1,17 +1,20 @@
 # app/api/deps.py
 
-from typing import Annotated, Generator
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, AsyncGenerator, Generator
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal, get_async_engine
+from app.core.auditoria import ContextoAuditoria, definir_contexto
 from app.core.config import settings
 from app.core.security import decode_access_token
+from app.core.principal import Principal, cache_principais
 from app.core.rls import set_current_user_id
-from app.services.usuario_service import UsuarioService
-from app.models.usuario import Usuario
+from app.repositories.usuario_repo import AsyncUsuarioRepository
+from app.repositories.base import Pagina
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -26,13 +29,27 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependência que fornece uma sessão assíncrona (rotas `async def`).
+    Só obtém conexão do pool na primeira consulta.
+    """
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_db)]
-) -> Usuario:
+    db: Annotated[Session, Depends(get_db)],
+    async_db: Annotated[AsyncSession, Depends(get_async_db)]
+) -> Principal:
     """
-    Valida o token JWT e retorna o usuário atual.
-    Também define a variável de sessão para o RLS.
+    Valida o token JWT e retorna o usuário atual (Principal), lido do cache
+    de principais ou, na falta, do banco pela sessão assíncrona.
+    Também associa o usuário às duas sessões da requisição para o RLS; a
+    variável é aplicada no início da primeira transação de cada uma, sem
+    ida extra ao banco aqui. Por fim, define o contexto de auditoria
+    (usuário, IP e user agent) usado pelos logs gerados no flush.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,20 +65,61 @@ async def get_current_user(
     except (JWTError, ValueError, TypeError):
         raise credentials_exception
     
-    usuario_service = UsuarioService(db)
-    usuario = usuario_service.get_usuario(user_id)
-    if usuario is None:
-        raise credentials_exception
-    
-    # 🔐 Define a variável de sessão para o RLS (PostgreSQL)
-    set_current_user_id(db, usuario.id)
-    
-    return usuario
+    # 🔐 Usuário do RLS (PostgreSQL); o token é assinado, então o id é confiável
+    set_current_user_id(db, user_id)
+    set_current_user_id(async_db, user_id)
+
+    principal = cache_principais.obter(user_id)
+    if principal is None:
+        repo = AsyncUsuarioRepository(async_db)
+        usuario = await repo.get(user_id)
+        if usuario is None:
+            raise credentials_exception
+        principal = Principal(
+            id=usuario.id,
+            email=usuario.email,
+            perfil=usuario.perfil,
+            ativo=bool(usuario.ativo),
+            contrato_ids=frozenset(await repo.get_contrato_ids(usuario.id)),
+        )
+        cache_principais.guardar(principal.id, principal)
+
+    definir_contexto(ContextoAuditoria(
+        usuario_id=principal.id,
+        usuario_email=principal.email,
+        ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    ))
+    return principal
 
 async def get_current_active_user(
-    current_user: Annotated[Usuario, Depends(get_current_user)]
-) -> Usuario:
+    current_user: Annotated[Principal, Depends(get_current_user)]
+) -> Principal:
     """Verifica se o usuário atual está ativo."""
     if not current_user.ativo:
         raise HTTPException(status_code=400, detail="Usuário inativo")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def usar_cache(request: Request) -> bool:
+    """
+    Indica se a requisição aceita resultados do cache de cálculos
+    (app/core/cache.py). `Cache-Control: no-cache` ou `no-store` força o
+    recálculo, que também atualiza o cache.
+    """
+    diretivas = request.headers.get("cache-control", "").lower()
+    return "no-cache" not in diretivas and "no-store" not in diretivas
+
+
+# ----------------------------------------------------------------------
+# PAGINAÇÃO POR CURSOR
+# ----------------------------------------------------------------------
+CURSOR_QUERY = Query(
+    None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); quando informado, skip é ignorado"
+)
+
+
+def itens_da_pagina(response: Response, pagina: Pagina) -> list:
+    """Devolve os itens da página e publica o cursor da seguinte em X-Next-Cursor."""
+    if pagina.proximo_cursor:
+        response.headers["X-Next-Cursor"] = pagina.proximo_cursor
+    return pagina.itens
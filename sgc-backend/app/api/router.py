@@ -16,6 +16,7 @@ from app.api.routes.graficos import router as graficos_router
 from app.api.routes.logs import router as logs_router
 from app.api.routes.prateleira import router as prateleira_router
 from app.api.routes.arquivos import router as arquivos_router
+from app.api.routes.metricas import router as metricas_router
 
 
 api_router = APIRouter()
@@ -37,3 +38,4 @@ api_router.include_router(graficos_router, prefix="/graficos", tags=["gráficos"
 api_router.include_router(logs_router, prefix="/logs", tags=["logs"])
 api_router.include_router(prateleira_router, prefix="", tags=["prateleira"])
 api_router.include_router(arquivos_router, prefix="/arquivos", tags=["arquivos"])
+api_router.include_router(metricas_router, prefix="/metricas", tags=["métricas"])
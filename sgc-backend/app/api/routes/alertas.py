@@ -1,17 +1,52 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.api.deps import get_db, get_current_user
+from app.repositories.alerta_repository import AlertaRepository
+from app.schemas.alerta import AlertaResponse
 from app.services.alerta_service import AlertaService
 
 router = APIRouter()
 
-@router.get("/")
+SEVERIDADES = ("critica", "alta", "media", "baixa")
+
+
+@router.get("/", response_model=List[AlertaResponse])
 def listar_alertas(
     contrato_id: Optional[int] = Query(None, description="Filtrar por contrato"),
+    severidade: Optional[List[str]] = Query(None, description="Filtrar por severidade (pode repetir)"),
+    incluir_resolvidos: bool = Query(False, description="Incluir alertas já resolvidos"),
+    incluir_reconhecidos: bool = Query(True, description="Incluir alertas já reconhecidos"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Lista os alertas persistidos (mais severos primeiro). Os alertas são
+    mantidos pelo avaliador em segundo plano; nada é recalculado aqui.
+    """
+    for s in severidade or []:
+        if s not in SEVERIDADES:
+            raise HTTPException(status_code=422, detail=f"Severidade inválida: {s}")
+    return AlertaRepository(db).list(
+        contrato_id=contrato_id,
+        severidades=severidade,
+        incluir_resolvidos=incluir_resolvidos,
+        incluir_reconhecidos=incluir_reconhecidos,
+        skip=skip,
+        limit=limit,
+    )
+
+
+@router.post("/{alerta_id}/reconhecer", response_model=AlertaResponse)
+def reconhecer_alerta(
+    alerta_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    service = AlertaService(db)
-    alertas = service.gerar_alertas(contrato_id)
-    return alertas
\ No newline at end of file
+    alerta = AlertaRepository(db).get_visivel(alerta_id)
+    if not alerta:
+        raise HTTPException(status_code=404, detail="Alerta não encontrado")
+    alerta = AlertaService(db).reconhecer_alerta(alerta, current_user.id)
+    return alerta
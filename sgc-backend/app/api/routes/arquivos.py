@@ -1,41 +1,21 @@
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.models.usuario import Usuario
-from app.models.contrato import Contrato
-from app.models.boletim_medicao import BoletimMedicao
-from app.models.faturamento import Faturamento
-from app.models.pagamento import Pagamento
 from app.schemas.arquivo import ArquivoInDB
 from app.services.arquivo_service import ArquivoService
-from app.services.log_service import LogService
+from app.services import arvore_arquivos_service
 
 router = APIRouter()
 
 
-def _to_schema(arquivo) -> dict:
-    return {
-        "id": arquivo.id,
-        "nome_original": arquivo.nome_original,
-        "tamanho": arquivo.tamanho,
-        "tipo_mime": arquivo.tipo_mime,
-        "entidade_tipo": arquivo.entidade_tipo,
-        "entidade_id": arquivo.entidade_id,
-        "descricao": arquivo.descricao,
-        "created_at": arquivo.created_at,
-        "url_download": f"/api/arquivos/{arquivo.id}/download",
-    }
-
-
 @router.post("/upload", response_model=ArquivoInDB, status_code=status.HTTP_201_CREATED)
 async def upload_arquivo(
-    request: Request,
     file: UploadFile = File(...),
     entidade_tipo: str = Form(...),
     entidade_id: int = Form(...),
@@ -52,23 +32,6 @@ async def upload_arquivo(
         descricao=descricao,
         usuario_id=current_user.id,
     )
-    LogService(db).registrar_log(
-        usuario_id=current_user.id,
-        usuario_email=current_user.email,
-        acao="UPLOAD",
-        entidade="arquivos",
-        entidade_id=arquivo.id,
-        dados_novos={
-            "nome_original": arquivo.nome_original,
-            "tipo_mime": arquivo.tipo_mime,
-            "tamanho": arquivo.tamanho,
-            "entidade_tipo": entidade_tipo,
-            "entidade_id": entidade_id,
-            "descricao": descricao,
-        },
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     result = ArquivoInDB.model_validate(arquivo)
     result.url_download = f"/api/arquivos/{arquivo.id}/download"
     return result
@@ -77,62 +40,38 @@ async def upload_arquivo(
 @router.get("/arvore")
 def get_arvore_arquivos(
     contrato_id: int = Query(..., description="ID do contrato para montar a hierarquia"),
+    profundidade: int = Query(3, ge=0, le=3, description="Níveis carregados abaixo do contrato (BMs, NFs, pagamentos)"),
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user),
 ):
-    """Retorna a hierarquia de arquivos de um contrato: contrato -> BMs -> NFs -> Pagamentos."""
-    service = ArquivoService(db)
-    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
-    if not contrato:
-        raise HTTPException(status_code=404, detail="Contrato nao encontrado.")
-    arquivos_contrato = service.get_by_entidade("contrato", contrato_id)
-    boletins = (
-        db.query(BoletimMedicao)
-        .filter(BoletimMedicao.contrato_id == contrato_id)
-        .order_by(BoletimMedicao.numero_sequencial)
-        .all()
-    )
-    boletins_data = []
-    for bm in boletins:
-        arquivos_bm = service.get_by_entidade("boletim", bm.id)
-        faturamentos = db.query(Faturamento).filter(Faturamento.bm_id == bm.id).all()
-        faturamentos_data = []
-        for fat in faturamentos:
-            arquivos_fat = service.get_by_entidade("faturamento", fat.id)
-            pagamentos = db.query(Pagamento).filter(Pagamento.faturamento_id == fat.id).all()
-            pagamentos_data = []
-            for pag in pagamentos:
-                arquivos_pag = service.get_by_entidade("pagamento", pag.id)
-                pagamentos_data.append({
-                    "id": pag.id,
-                    "data_pagamento": str(pag.data_pagamento) if pag.data_pagamento else None,
-                    "valor_pago": float(pag.valor_pago) if pag.valor_pago else 0,
-                    "arquivos": [_to_schema(a) for a in arquivos_pag],
-                })
-            faturamentos_data.append({
-                "id": fat.id,
-                "numero_nf": fat.numero_nf,
-                "valor_bruto_nf": float(fat.valor_bruto_nf) if fat.valor_bruto_nf else 0,
-                "arquivos": [_to_schema(a) for a in arquivos_fat],
-                "pagamentos": pagamentos_data,
-            })
-        boletins_data.append({
-            "id": bm.id,
-            "numero_sequencial": bm.numero_sequencial,
-            "periodo_inicio": str(bm.periodo_inicio) if bm.periodo_inicio else None,
-            "periodo_fim": str(bm.periodo_fim) if bm.periodo_fim else None,
-            "arquivos": [_to_schema(a) for a in arquivos_bm],
-            "faturamentos": faturamentos_data,
-        })
-    return {
-        "contrato": {
-            "id": contrato.id,
-            "numero_contrato": contrato.numero_contrato,
-            "nome": contrato.numero_contrato,
-            "arquivos": [_to_schema(a) for a in arquivos_contrato],
-        },
-        "boletins": boletins_data,
-    }
+    """
+    Retorna a hierarquia de arquivos de um contrato: contrato -> BMs -> NFs -> Pagamentos.
+    Nós além da `profundidade` vêm com a lista de filhos nula e `qtd_*`;
+    use /arvore/boletins/{id} ou /arvore/faturamentos/{id} para expandi-los.
+    """
+    return arvore_arquivos_service.montar_arvore_contrato(db, contrato_id, profundidade)
+
+
+@router.get("/arvore/boletins/{boletim_id}")
+def get_subarvore_boletim(
+    boletim_id: int,
+    profundidade: int = Query(2, ge=0, le=2, description="Níveis carregados abaixo do BM (NFs, pagamentos)"),
+    db: Session = Depends(deps.get_db),
+    current_user: Usuario = Depends(deps.get_current_active_user),
+):
+    """Subárvore de um BM (expansão sob demanda)."""
+    return arvore_arquivos_service.montar_subarvore(db, "boletim", boletim_id, profundidade)
+
+
+@router.get("/arvore/faturamentos/{faturamento_id}")
+def get_subarvore_faturamento(
+    faturamento_id: int,
+    profundidade: int = Query(1, ge=0, le=1, description="Níveis carregados abaixo da NF (pagamentos)"),
+    db: Session = Depends(deps.get_db),
+    current_user: Usuario = Depends(deps.get_current_active_user),
+):
+    """Subárvore de uma NF (expansão sob demanda)."""
+    return arvore_arquivos_service.montar_subarvore(db, "faturamento", faturamento_id, profundidade)
 
 
 @router.get("/", response_model=List[ArquivoInDB])
@@ -175,28 +114,9 @@ def download_arquivo(
 @router.delete("/{arquivo_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_arquivo(
     arquivo_id: int,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user),
 ):
     """Remove um arquivo (disco + banco)."""
     service = ArquivoService(db)
-    arquivo_obj = service.get_arquivo(arquivo_id)
-    dados_antigos = {
-        "id": arquivo_obj.id,
-        "nome_original": arquivo_obj.nome_original,
-        "entidade_tipo": arquivo_obj.entidade_tipo,
-        "entidade_id": arquivo_obj.entidade_id,
-        "tamanho": arquivo_obj.tamanho,
-    }
     service.delete_arquivo(arquivo_id)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id,
-        usuario_email=current_user.email,
-        acao="DELETE",
-        entidade="arquivos",
-        entidade_id=arquivo_id,
-        dados_antigos=dados_antigos,
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
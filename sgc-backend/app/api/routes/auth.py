@@ -1,36 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import timedelta
 
 from app.api import deps
-from app.core.security import create_access_token
+from app.core.limite_login import limitador_login
+from app.core.security import VerificacaoSenhaOcupada, create_access_token
+from app.services.refresh_token_service import RefreshTokenService
 from app.services.usuario_service import UsuarioService
-from app.schemas.usuario import LoginResponse, UsuarioInDB
+from app.schemas.usuario import LoginResponse, RefreshTokenRequest, UsuarioInDB
 
 router = APIRouter()
 
+
+def _ip(request: Request) -> str:
+    return request.client.host if request.client else "desconhecido"
+
+
+def _resposta_sessao(usuario, refresh_token: str) -> LoginResponse:
+    # Access token curto (ACCESS_TOKEN_EXPIRE_MINUTES) + refresh token da sessão
+    access_token = create_access_token(data={"sub": str(usuario.id)})
+    return LoginResponse(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+        usuario=UsuarioInDB.from_orm(usuario)
+    )
+
+
 @router.post("/login", response_model=LoginResponse)
 def login(
+    request: Request,
     db: Session = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
+    # Limite por usuário/IP antes de qualquer bcrypt ou consulta ao AD
+    ip = _ip(request)
+    espera = limitador_login.registrar_tentativa(ip, form_data.username)
+    if espera is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Muitas tentativas de login. Tente novamente em {espera} segundos.",
+            headers={"Retry-After": str(espera)},
+        )
+
     service = UsuarioService(db)
-    usuario = service.authenticate(form_data.username, form_data.password)
+    try:
+        usuario = service.authenticate(form_data.username, form_data.password)
+    except VerificacaoSenhaOcupada:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de autenticação sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": "5"},
+        )
     if not usuario:
+        limitador_login.registrar_falha(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    # Criar token de acesso
-    access_token_expires = timedelta(minutes=30)  # usar settings
-    access_token = create_access_token(
-        data={"sub": str(usuario.id)}, expires_delta=access_token_expires
+    limitador_login.registrar_sucesso(form_data.username)
+    # Nova sessão: access token + refresh token (nova família)
+    refresh_token = RefreshTokenService(db).emitir(
+        usuario.id, ip=ip, user_agent=request.headers.get("user-agent")
     )
-    # Retornar token e dados do usuário
-    return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        usuario=UsuarioInDB.from_orm(usuario)
-    )
\ No newline at end of file
+    return _resposta_sessao(usuario, refresh_token)
+
+
+@router.post("/refresh", response_model=LoginResponse)
+def refresh(
+    dados: RefreshTokenRequest,
+    request: Request,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Emite um novo access token a partir do refresh token, sem verificar a
+    senha. O refresh token é rotacionado: use o da resposta na próxima vez.
+    """
+    usuario, refresh_token = RefreshTokenService(db).rotacionar(
+        dados.refresh_token, ip=_ip(request), user_agent=request.headers.get("user-agent")
+    )
+    return _resposta_sessao(usuario, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    dados: RefreshTokenRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """Encerra a sessão: revoga o refresh token e os demais da mesma família."""
+    RefreshTokenService(db).revogar(dados.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,17 +1,24 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.schemas.contrato import ContratoCreate, ContratoInDB, ContratoUpdate
 from app.services.contrato_service import ContratoService
+from app.repositories.contrato_repo import AsyncContratoRepository
 from app.models.usuario import Usuario
 from app.core.exceptions import BusinessError
+from app.core.cache import cache_calculos
+from app.core.etag import verificar_etag
+from app.models.contrato import Contrato
+from app.services import versao_service
 from app.services import financeiro_service
 from app.api.deps import get_db, get_current_user
-from app.schemas.projecao import ProjecaoFinanceiraResponse
+from app.schemas.projecao import ProjecaoFinanceiraResponse, SimulacaoProjecaoResponse
 from app.services import projecao_service
-from app.schemas.analise_ritmo import AnaliseRitmoResponse
+from app.services import simulacao_projecao_service
+from app.schemas.analise_ritmo import AnaliseRitmoResponse, AnaliseRitmoContratoResponse
 from app.services import analise_ritmo_service
 from app.models.contrato_imposto import ContratoImposto
 from app.schemas.contrato_imposto import ContratoImpostoInDB, ContratoImpostosBulkSet
@@ -28,29 +35,104 @@ router = APIRouter()
 # GET /contratos/
 # ----------------------------------------------------------------------
 @router.get("/", response_model=List[ContratoInDB])
-def list_contratos(
-    db: Session = Depends(deps.get_db),
+async def list_contratos(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = deps.CURSOR_QUERY,
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
-    """Listar contratos com paginação."""
-    service = ContratoService(db)
-    return service.list_contratos(skip=skip, limit=limit)
+    """Listar contratos com paginação (offset ou cursor)."""
+    nao_modificado = verificar_etag(
+        request, response, "contratos", current_user.id, skip, limit, cursor,
+        await db.run_sync(versao_service.versao_tabela, Contrato),
+    )
+    if nao_modificado:
+        return nao_modificado
+    pagina = await AsyncContratoRepository(db).get_pagina(skip=skip, limit=limit, cursor=cursor)
+    return deps.itens_da_pagina(response, pagina)
+
+
+# ----------------------------------------------------------------------
+# GET /contratos/analise-ritmo  — ranking da carteira
+# (declarado antes de /{contrato_id} para não ser capturado por ele)
+# ----------------------------------------------------------------------
+@router.get("/analise-ritmo", response_model=List[AnaliseRitmoContratoResponse])
+def get_analise_ritmo_carteira(
+    request: Request,
+    response: Response,
+    status_ritmo: Optional[str] = Query(
+        None, alias="status", pattern="^(ATRASADO|ADIANTADO|NO_PRAZO)$",
+        description="Filtrar por status de ritmo"
+    ),
+    status_contrato: Optional[str] = Query(None, description="Filtrar por status do contrato (ex.: ATIVO)"),
+    ordenar_por: str = Query(
+        "desvio_percentual",
+        pattern="^(" + "|".join(analise_ritmo_service.CAMPOS_ORDENACAO) + ")$",
+        description="Campo de ordenação"
+    ),
+    ordem: str = Query("asc", pattern="^(asc|desc)$"),
+    limite: Optional[int] = Query(None, ge=1, le=1000, description="Retornar apenas os N primeiros"),
+    db: Session = Depends(deps.get_db),
+    current_user: Usuario = Depends(deps.get_current_active_user),
+    usar_cache: bool = Depends(deps.usar_cache)
+):
+    """
+    Análise de ritmo de todos os contratos visíveis, calculada em lote.
+    Por padrão ordena do mais atrasado (menor desvio percentual) ao mais adiantado.
+    """
+    parametros = (status_ritmo, status_contrato, ordenar_por, ordem, limite)
+    versao = versao_service.versao_carteira(db)
+    nao_modificado = verificar_etag(
+        request, response, "analise-ritmo", current_user.id, *parametros, versao,
+    )
+    if nao_modificado:
+        return nao_modificado
+
+    # A versão do banco entra na chave: corpo e ETag sempre da mesma versão,
+    # mesmo que a alteração tenha sido feita por outro worker
+    chave = cache_calculos.chave_carteira("analise-ritmo", current_user.id, *parametros, versao)
+    return cache_calculos.obter_ou_calcular(
+        chave,
+        lambda: analise_ritmo_service.calcular_analise_ritmo_carteira(
+            db,
+            status=status_ritmo,
+            status_contrato=status_contrato,
+            ordenar_por=ordenar_por,
+            decrescente=ordem == "desc",
+            limite=limite,
+        ),
+        usar_cache,
+    )
 
 
 # ----------------------------------------------------------------------
 # GET /contratos/{id}
 # ----------------------------------------------------------------------
 @router.get("/{contrato_id}", response_model=ContratoInDB)
-def get_contrato(
+async def get_contrato(
     contrato_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     """Obter detalhes de um contrato pelo ID."""
-    service = ContratoService(db)
-    return service.get_contrato(contrato_id)
+    nao_modificado = verificar_etag(
+        request, response, "contrato", current_user.id,
+        await db.run_sync(versao_service.versao_tabela, Contrato, Contrato.id == contrato_id),
+    )
+    if nao_modificado:
+        return nao_modificado
+    contrato = await AsyncContratoRepository(db).get(contrato_id)
+    if not contrato:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contrato não encontrado."
+        )
+    return contrato
 
 
 # ----------------------------------------------------------------------
@@ -66,18 +148,36 @@ def get_contrato(
 @router.get("/{contrato_id}/resumo-financeiro")
 def get_resumo_financeiro_contrato(
     contrato_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    usar_cache: bool = Depends(deps.usar_cache)
 ):
     """
     Retorna o resumo financeiro completo de um contrato específico.
     """
+    versao = versao_service.versao_contrato(db, contrato_id)
+    nao_modificado = verificar_etag(request, response, "resumo-financeiro", current_user.id, versao)
+    if nao_modificado:
+        return nao_modificado
     try:
-        resumo = financeiro_service.calcular_resumo_contrato(db, contrato_id)
-        desempenho = financeiro_service.calcular_status_desempenho(db, contrato_id)
-        return {**resumo, **desempenho}
+        resumo = cache_calculos.obter_ou_calcular(
+            cache_calculos.chave_contrato("resumo-financeiro", contrato_id, current_user.id, versao),
+            lambda: financeiro_service.calcular_resumo_contrato(db, contrato_id),
+            usar_cache,
+        )
     except BusinessError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    try:
+        desempenho = cache_calculos.obter_ou_calcular(
+            cache_calculos.chave_contrato("desempenho", contrato_id, current_user.id, versao),
+            lambda: financeiro_service.calcular_status_desempenho(
+                db, contrato_id, percentual_fisico=resumo["percentual_fisico"]
+            ),
+            usar_cache,
+        )
+        return {**resumo, **desempenho}
     except Exception as e:
         # Log do erro e retorne apenas o resumo (ou um erro amigável)
         print(f"Erro ao calcular desempenho: {e}")
@@ -88,13 +188,12 @@ def get_resumo_financeiro_contrato(
 @router.post("/", response_model=ContratoInDB, status_code=status.HTTP_201_CREATED)
 def create_contrato(
     *,
-    request: Request,
     db: Session = Depends(deps.get_db),
     contrato_in: ContratoCreate,
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = ContratoService(db)
-    return service.create_contrato(contrato_in, current_user=current_user, request=request)
+    return service.create_contrato(contrato_in)
 
 
 
@@ -103,30 +202,31 @@ def create_contrato(
 def update_contrato(
     contrato_id: int,
     contrato_in: ContratoUpdate,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = ContratoService(db)
-    return service.update_contrato(contrato_id, contrato_in, current_user=current_user, request=request)
+    return service.update_contrato(contrato_id, contrato_in)
 
 
 @router.delete("/{contrato_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_contrato(
     contrato_id: int,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = ContratoService(db)
-    service.delete_contrato(contrato_id, current_user=current_user, request=request)
+    service.delete_contrato(contrato_id)
     return None
 
 @router.get("/{contrato_id}/projecao-financeira", response_model=ProjecaoFinanceiraResponse)
 def get_projecao_financeira_contrato(
     contrato_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
-    current_user: Usuario = Depends(deps.get_current_active_user)
+    current_user: Usuario = Depends(deps.get_current_active_user),
+    usar_cache: bool = Depends(deps.usar_cache)
 ):
     """
     Retorna projeção financeira para um contrato específico.
@@ -135,23 +235,63 @@ def get_projecao_financeira_contrato(
     - **previsao_termino**: data estimada de término (dd/mm/aaaa)
     - **faturamento_30d/60d/90d**: projeção de faturamento para os próximos meses
     """
+    versao = versao_service.versao_contrato(db, contrato_id)
+    nao_modificado = verificar_etag(request, response, "projecao-financeira", current_user.id, versao)
+    if nao_modificado:
+        return nao_modificado
     try:
-        projecao = projecao_service.calcular_projecao_contrato(db, contrato_id)
+        projecao = cache_calculos.obter_ou_calcular(
+            cache_calculos.chave_contrato("projecao-financeira", contrato_id, current_user.id, versao),
+            lambda: projecao_service.calcular_projecao_contrato(db, contrato_id),
+            usar_cache,
+        )
         return projecao
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Erro interno ao calcular projeção")
-    
+
+
+@router.get("/{contrato_id}/projecao-financeira/simulacao", response_model=SimulacaoProjecaoResponse)
+def get_projecao_financeira_simulacao(
+    contrato_id: int,
+    cenarios: int = Query(5000, ge=100, le=100000, description="Quantidade de cenários simulados"),
+    seed: Optional[int] = Query(None, description="Semente para resultados reprodutíveis"),
+    db: Session = Depends(deps.get_db),
+    current_user: Usuario = Depends(deps.get_current_active_user)
+):
+    """
+    Projeção do contrato por simulação Monte Carlo, sorteando ritmos mensais
+    do histórico: datas de término P50/P80/P95 e faixas P10/P50/P90 de
+    faturamento em 30/60/90 dias.
+    """
+    try:
+        return simulacao_projecao_service.simular_projecao_contrato(db, contrato_id, cenarios, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno ao simular projeção")
+
 
 @router.get("/{contrato_id}/analise-ritmo", response_model=AnaliseRitmoResponse)
 def get_analise_ritmo(
     contrato_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
-    current_user: Usuario = Depends(deps.get_current_active_user)
+    current_user: Usuario = Depends(deps.get_current_active_user),
+    usar_cache: bool = Depends(deps.usar_cache)
 ):
+    versao = versao_service.versao_contrato(db, contrato_id)
+    nao_modificado = verificar_etag(request, response, "analise-ritmo", current_user.id, versao)
+    if nao_modificado:
+        return nao_modificado
     try:
-        return analise_ritmo_service.calcular_analise_ritmo(db, contrato_id)
+        return cache_calculos.obter_ou_calcular(
+            cache_calculos.chave_contrato("analise-ritmo", contrato_id, current_user.id, versao),
+            lambda: analise_ritmo_service.calcular_analise_ritmo(db, contrato_id),
+            usar_cache,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -191,10 +331,12 @@ def configurar_impostos_contrato(
     service = ContratoService(db)
     service.get_contrato(contrato_id)  # lança HTTPException 404 se não encontrar
 
-    # Remover impostos existentes
-    db.query(ContratoImposto).filter(
-        ContratoImposto.contrato_id == contrato_id
-    ).delete(synchronize_session='fetch')
+    # Remover impostos existentes (pelo ORM: a alteração incrementa a versão
+    # dos impostos do contrato, events.py seção 4). O flush grava as
+    # exclusões antes das novas linhas com a mesma chave.
+    for imposto in db.query(ContratoImposto).filter(ContratoImposto.contrato_id == contrato_id):
+        db.delete(imposto)
+    db.flush()
 
     # Inserir novos
     novos = [
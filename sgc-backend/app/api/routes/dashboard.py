@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from typing import Dict, Any, Optional
 from app.api import deps
+from app.core.cache import cache_calculos
+from app.core.etag import verificar_etag
 from app.models.contrato import Contrato
 from app.services import financeiro_service
 from app.services import projecao_service
-from app.services.alerta_service import AlertaService
-from app.schemas.projecao import ProjecaoFinanceiraResponse
+from app.services import simulacao_projecao_service
+from app.services import versao_service
+from app.repositories.alerta_repository import AlertaRepository
+from app.schemas.projecao import ProjecaoFinanceiraResponse, SimulacaoProjecaoResponse
 from app.models.usuario import Usuario
 from app.repositories.prateleira_repository import PrateleiraRepository
 
@@ -19,68 +24,81 @@ _SEVERIDADE_TO_TIPO = {
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+def _indicadores_carteira(db: Session) -> Dict[str, Any]:
+    """Totais financeiros e contratos recentes da carteira ativa (parte cacheável do resumo)."""
+    # Busca apenas contratos ativos (cliente carregado junto, sem lazy load por contrato)
+    contratos = (
+        db.query(Contrato)
+        .options(joinedload(Contrato.cliente))
+        .filter(Contrato.status == "ATIVO")
+        .all()
+    )
+
+    # Resumo + desempenho de toda a carteira com um número fixo de consultas
+    resumos = financeiro_service.calcular_resumos_de_contratos(db, contratos)
+
+    # 5 contratos mais recentes (id decrescente)
+    contratos_recentes = [
+        {
+            "id": c.id,
+            "numero_contrato": c.numero_contrato,
+            "cliente_nome": c.cliente.nome if c.cliente else None,
+            "percentual_fisico": resumos[c.id]["percentual_fisico"],
+            "status_desempenho": resumos[c.id]["status_desempenho"],
+        }
+        for c in sorted(contratos, key=lambda c: c.id, reverse=True)[:5]
+    ]
+
+    return {
+        "total_contratos": len(contratos),
+        "valor_total_contratado": sum(float(c.valor_total or 0) for c in contratos),
+        "valor_executado_total": sum(r["valor_executado"] for r in resumos.values()),
+        "valor_faturado_total": sum(r["valor_faturado"] for r in resumos.values()),
+        "valor_recebido_total": sum(r["valor_recebido"] for r in resumos.values()),
+        "contratos_recentes": contratos_recentes,
+    }
+
+
 @router.get("/resumo")
-def get_dashboard_resumo(
-    db: Session = Depends(deps.get_db),
-    current_user: Usuario = Depends(deps.get_current_active_user)
+async def get_dashboard_resumo(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Usuario = Depends(deps.get_current_active_user),
+    usar_cache: bool = Depends(deps.usar_cache)
 ) -> Dict[str, Any]:
     """
     Retorna indicadores consolidados para o dashboard (visão global).
+    Os indicadores financeiros vêm do cache de cálculos; alertas e
+    prateleira são sempre lidos na hora. Roda na sessão assíncrona; os
+    cálculos ainda síncronos são executados via run_sync.
     """
-    # Busca apenas contratos ativos
-    contratos = db.query(Contrato).filter(Contrato.status == "ATIVO").all()
-    
-    total_contratos = len(contratos)
-    valor_total_contratado = sum(c.valor_total or 0 for c in contratos)
-    
-    valor_executado_total = 0.0
-    valor_faturado_total = 0.0
-    valor_recebido_total = 0.0
-    contratos_recentes = []
-
-    for c in contratos:
-        try:
-            resumo = financeiro_service.calcular_resumo_contrato(db, c.id)
-            desempenho = financeiro_service.calcular_status_desempenho(db, c.id)
-        except Exception as e:
-            # Log do erro e continua com o próximo contrato
-            print(f"Erro ao processar contrato {c.id}: {e}")
-            continue
-
-        valor_executado_total += resumo.get("valor_executado", 0.0)
-        valor_faturado_total += resumo.get("valor_faturado", 0.0)
-        valor_recebido_total += resumo.get("valor_recebido", 0.0)
-        
-        # Monta o objeto do contrato recente (sem o campo 'nome', que não existe no modelo)
-        contratos_recentes.append({
-            "id": c.id,
-            "numero_contrato": c.numero_contrato,
-            "cliente_nome": c.cliente.nome if c.cliente else None,
-            "percentual_fisico": resumo.get("percentual_fisico", 0.0),
-            "status_desempenho": desempenho.get("status_desempenho", "SEM_PRAZO")
-        })
-    
-    # Ordena por id decrescente e pega os 5 mais recentes
-    contratos_recentes.sort(key=lambda x: x["id"], reverse=True)
-    contratos_recentes = contratos_recentes[:5]
-
-    # Alertas reais gerados pelo AlertaService (todos os contratos, top 5 por severidade)
+    def indicadores(s: Session) -> Dict[str, Any]:
+        # Versão lida do banco na chave: alterações feitas em outro worker também valem
+        versao = versao_service.versao_carteira(s)
+        chave = cache_calculos.chave_carteira("dashboard-resumo", current_user.id, versao)
+        return cache_calculos.obter_ou_calcular(chave, lambda: _indicadores_carteira(s), usar_cache)
+
+    carteira = await db.run_sync(indicadores)
+    total_contratos = carteira["total_contratos"]
+    valor_total_contratado = carteira["valor_total_contratado"]
+    valor_executado_total = carteira["valor_executado_total"]
+    valor_faturado_total = carteira["valor_faturado_total"]
+    valor_recebido_total = carteira["valor_recebido_total"]
+    contratos_recentes = carteira["contratos_recentes"]
+
+    # Alertas abertos mantidos pelo avaliador (top 5 por severidade)
     try:
-        alerta_svc = AlertaService(db)
-        todos_alertas = alerta_svc.gerar_alertas()
-        _ordem = {"critica": 0, "alta": 1, "media": 2, "baixa": 3}
-        todos_alertas.sort(key=lambda a: _ordem.get(a.get("severidade", "baixa"), 4))
+        alertas_abertos = await db.run_sync(lambda s: AlertaRepository(s).list(limit=5))
         alertas_recentes = [
             {
-                "tipo":     _SEVERIDADE_TO_TIPO.get(a.get("severidade", "media"), "warning"),
-                "titulo":   a["titulo"],
-                "mensagem": a["mensagem"],
-                "data":     "Agora",
+                "tipo":     _SEVERIDADE_TO_TIPO.get(a.severidade, "warning"),
+                "titulo":   a.titulo,
+                "mensagem": a.mensagem,
+                "data":     a.primeira_ocorrencia.strftime("%d/%m/%Y %H:%M"),
             }
-            for a in todos_alertas[:5]
+            for a in alertas_abertos
         ]
     except Exception as e:
-        print(f"Erro ao gerar alertas para dashboard: {e}")
+        print(f"Erro ao carregar alertas para dashboard: {e}")
         alertas_recentes = []
 
     # Cálculo dos percentuais globais
@@ -94,8 +112,7 @@ def get_dashboard_resumo(
 
     # ── Métricas da Prateleira ───────────────────────────────────
     try:
-        prateleira_repo = PrateleiraRepository(db)
-        resumo_prateleira = prateleira_repo.get_resumo_global()
+        resumo_prateleira = await db.run_sync(lambda s: PrateleiraRepository(s).get_resumo_global())
     except Exception as e:
         print(f"Erro ao calcular métricas da prateleira: {e}")
         resumo_prateleira = {
@@ -125,17 +142,46 @@ def get_dashboard_resumo(
 
 @router.get("/projecao-global", response_model=ProjecaoFinanceiraResponse)
 def get_projecao_global(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
-    current_user: Usuario = Depends(deps.get_current_active_user)
+    current_user: Usuario = Depends(deps.get_current_active_user),
+    usar_cache: bool = Depends(deps.usar_cache)
 ):
     """
     Retorna projeção financeira agregada de todos os contratos ativos.
     Os cálculos são baseados na média dos ritmos individuais.
     """
+    versao = versao_service.versao_carteira(db)
+    nao_modificado = verificar_etag(request, response, "projecao-global", current_user.id, versao)
+    if nao_modificado:
+        return nao_modificado
     try:
-        projecao = projecao_service.calcular_projecao_global(db)
+        projecao = cache_calculos.obter_ou_calcular(
+            cache_calculos.chave_carteira("projecao-global", current_user.id, versao),
+            lambda: projecao_service.calcular_projecao_global(db),
+            usar_cache,
+        )
         return projecao
     except Exception as e:
         # Em produção, logar o erro real
         print(f"Erro na projeção global: {e}")
-        raise HTTPException(status_code=500, detail="Erro ao calcular projeção global")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erro ao calcular projeção global")
+
+
+@router.get("/projecao-global/simulacao", response_model=SimulacaoProjecaoResponse)
+def get_projecao_global_simulacao(
+    cenarios: int = Query(5000, ge=100, le=100000, description="Quantidade de cenários simulados"),
+    seed: Optional[int] = Query(None, description="Semente para resultados reprodutíveis"),
+    db: Session = Depends(deps.get_db),
+    current_user: Usuario = Depends(deps.get_current_active_user)
+):
+    """
+    Projeção da carteira de contratos ativos por simulação Monte Carlo:
+    datas de término P50/P80/P95 e faixas de faturamento em 30/60/90 dias.
+    """
+    try:
+        return simulacao_projecao_service.simular_projecao_global(db, cenarios, seed)
+    except Exception as e:
+        print(f"Erro na simulação da projeção global: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao simular projeção global")
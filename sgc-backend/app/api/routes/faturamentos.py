@@ -1,27 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.etag import verificar_etag
 from app.schemas.faturamento import FaturamentoCreate, FaturamentoInDB, FaturamentoUpdate
 from app.services.faturamento_service import FaturamentoService
-from app.services.log_service import LogService
+from app.services import versao_service
 from app.models.usuario import Usuario
 from app.models.boletim_medicao import BoletimMedicao
+from app.models.faturamento import Faturamento
 from app.models.contrato_imposto import ContratoImposto
 
 router = APIRouter()
 
 
-def _log_dict(obj):
-    return jsonable_encoder({k: v for k, v in obj.__dict__.items() if not k.startswith('_')})
-
-
 @router.post("/", response_model=FaturamentoInDB, status_code=status.HTTP_201_CREATED)
 def create_faturamento(
     faturamento_in: FaturamentoCreate,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
@@ -46,30 +42,37 @@ def create_faturamento(
 
     service = FaturamentoService(db)
     faturamento = service.create_faturamento(faturamento_in)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id,
-        usuario_email=current_user.email,
-        acao="CREATE",
-        entidade="faturamentos",
-        entidade_id=faturamento.id,
-        dados_novos=_log_dict(faturamento),
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return faturamento
 
 
 @router.get("/", response_model=List[FaturamentoInDB])
 def list_faturamentos(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     bm_id: Optional[int] = Query(None),
     contrato_id: Optional[int] = Query(None, description="Filtrar por contrato (via boletins)"),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = deps.CURSOR_QUERY,
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
+    condicoes, joins = [], []
+    if bm_id:
+        condicoes.append(Faturamento.bm_id == bm_id)
+    if contrato_id:
+        joins.append((BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id))
+        condicoes.append(BoletimMedicao.contrato_id == contrato_id)
+    nao_modificado = verificar_etag(
+        request, response, "faturamentos", current_user.id, bm_id, contrato_id, skip, limit, cursor,
+        versao_service.versao_tabela(db, Faturamento, *condicoes, joins=joins),
+    )
+    if nao_modificado:
+        return nao_modificado
+
     service = FaturamentoService(db)
-    return service.list_faturamentos(bm_id=bm_id, contrato_id=contrato_id, skip=skip, limit=limit)
+    pagina = service.list_faturamentos(bm_id=bm_id, contrato_id=contrato_id, skip=skip, limit=limit, cursor=cursor)
+    return deps.itens_da_pagina(response, pagina)
 
 
 @router.get("/{faturamento_id}", response_model=FaturamentoInDB)
@@ -86,24 +89,9 @@ def get_faturamento(
 def update_faturamento(
     faturamento_id: int,
     faturamento_in: FaturamentoUpdate,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = FaturamentoService(db)
-    fat_antes = service.get_faturamento(faturamento_id)
-    dados_antigos = _log_dict(fat_antes)
-    acao = "CANCEL" if getattr(faturamento_in, 'status', None) == "CANCELADO" else "UPDATE"
     faturamento = service.update_faturamento(faturamento_id, faturamento_in)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id,
-        usuario_email=current_user.email,
-        acao=acao,
-        entidade="faturamentos",
-        entidade_id=faturamento_id,
-        dados_antigos=dados_antigos,
-        dados_novos=_log_dict(faturamento),
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return faturamento
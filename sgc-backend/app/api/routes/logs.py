@@ -1,37 +1,159 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
-from datetime import date
+from typing import Literal, Optional
+from datetime import date, datetime
 
 from app.api import deps
-from app.services.log_service import LogService
+from app.services import log_retencao_service
+from app.services.log_service import LogService, exportar_logs
 from app.schemas.log import LogResponse  # vamos criar esse schema
 
 router = APIRouter()
 
 @router.get("/", response_model=list[LogResponse])
 def listar_logs(
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
     usuario_id: Optional[int] = Query(None),
     entidade: Optional[str] = Query(None),
+    entidade_id: Optional[int] = Query(None),
+    campo: Optional[str] = Query(None, description="Apenas registros que alteraram este campo (ex.: valor_total)"),
     acao: Optional[str] = Query(None),
     data_inicio: Optional[date] = Query(None),
     data_fim: Optional[date] = Query(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=500)
+    limit: int = Query(100, le=500),
+    cursor: Optional[str] = deps.CURSOR_QUERY
 ):
     # Opcional: restringir acesso a administradores/TI
     if current_user.perfil not in ["ADMIN", "TI"]:
-        from fastapi import HTTPException
         raise HTTPException(status_code=403, detail="Acesso negado")
     service = LogService(db)
-    return service.listar_logs(
+    pagina = service.listar_logs(
         usuario_id=usuario_id,
         entidade=entidade,
+        entidade_id=entidade_id,
+        campo=campo,
         acao=acao,
         data_inicio=data_inicio,
         data_fim=data_fim,
         skip=skip,
-        limit=limit
-    )
\ No newline at end of file
+        limit=limit,
+        cursor=cursor
+    )
+    return deps.itens_da_pagina(response, pagina)
+
+
+MIDIA_EXPORTACAO = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get("/export")
+def exportar(
+    current_user = Depends(deps.get_current_active_user),
+    formato: Literal["ndjson", "csv"] = Query("ndjson"),
+    usuario_id: Optional[int] = Query(None),
+    entidade: Optional[str] = Query(None),
+    entidade_id: Optional[int] = Query(None),
+    campo: Optional[str] = Query(None),
+    acao: Optional[str] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+):
+    """
+    Exporta todos os logs que atendem aos filtros, em ordem cronológica,
+    como NDJSON (um objeto por linha) ou CSV (dados_* em JSON). A resposta é
+    transmitida à medida que as linhas são lidas do banco, sem limite de
+    tamanho e com memória constante.
+    """
+    if current_user.perfil not in ["ADMIN", "TI"]:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    conteudo = exportar_logs(
+        formato,
+        current_user.id,
+        usuario_id=usuario_id,
+        entidade=entidade,
+        entidade_id=entidade_id,
+        campo=campo,
+        acao=acao,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+    )
+    nome = f"logs_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    return StreamingResponse(
+        conteudo,
+        media_type=MIDIA_EXPORTACAO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'},
+    )
+
+@router.get("/arquivo", response_model=list[str])
+def listar_meses_arquivados(current_user = Depends(deps.get_current_active_user)):
+    """Meses (AAAA-MM) já retirados do banco e disponíveis no arquivo de logs."""
+    if current_user.perfil not in ["ADMIN", "TI"]:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return [mes.strftime("%Y-%m") for mes in log_retencao_service.meses_arquivados()]
+
+
+@router.get("/arquivo/{ano}/{mes}", response_model=list[LogResponse])
+def listar_logs_arquivados(
+    ano: int = Path(..., ge=2000, le=9999),
+    mes: int = Path(..., ge=1, le=12),
+    current_user = Depends(deps.get_current_active_user),
+    usuario_id: Optional[int] = Query(None),
+    entidade: Optional[str] = Query(None),
+    entidade_id: Optional[int] = Query(None),
+    campo: Optional[str] = Query(None),
+    acao: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=500),
+):
+    """
+    Logs de um mês arquivado (lidos do arquivo .jsonl.gz sob demanda), em
+    ordem cronológica. Mesmos filtros da listagem principal.
+    """
+    if current_user.perfil not in ["ADMIN", "TI"]:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    registros = log_retencao_service.ler_arquivo(
+        date(ano, mes, 1),
+        usuario_id=usuario_id,
+        entidade=entidade,
+        entidade_id=entidade_id,
+        acao=acao,
+        campo=campo,
+        skip=skip,
+        limit=limit,
+    )
+    if registros is None:
+        raise HTTPException(status_code=404, detail="Mês não arquivado")
+    return registros
+
+
+# Declarada por último: /{entidade}/{entidade_id} não deve capturar as rotas acima
+@router.get("/{entidade}/{entidade_id}", response_model=list[LogResponse])
+def historico_entidade(
+    entidade: str,
+    entidade_id: int,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user),
+    incluir_filhos: bool = Query(True, description="Incluir os logs das entidades filhas (ex.: BMs, NFs e pagamentos de um contrato)"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=500),
+    cursor: Optional[str] = deps.CURSOR_QUERY
+):
+    """
+    Histórico de alterações de uma entidade (ex.: /logs/contratos/12), do
+    mais recente ao mais antigo, com paginação por cursor (X-Next-Cursor).
+    """
+    if current_user.perfil not in ["ADMIN", "TI"]:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    pagina = LogService(db).historico_entidade(
+        entidade,
+        entidade_id,
+        incluir_filhos=incluir_filhos,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+    )
+    return deps.itens_da_pagina(response, pagina)
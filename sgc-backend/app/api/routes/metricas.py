@@ -0,0 +1,71 @@
+import os
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api import deps
+from app.core.aliquotas import cache_aliquotas
+from app.core.cache import cache_calculos
+from app.core.ldap_auth import disjuntor_ldap
+from app.core.limite_login import limitador_login
+from app.core.principal import cache_principais
+from app.db.session import estado_pools
+from app.models.usuario import Usuario
+from app.services.auditoria_writer import gravador_auditoria
+
+router = APIRouter()
+
+
+def _exigir_admin(current_user: Usuario = Depends(deps.get_current_active_user)) -> Usuario:
+    # Métricas operacionais: restritas a administradores/TI
+    if current_user.perfil not in ["ADMIN", "TI"]:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return current_user
+
+
+@router.get("/cache")
+def get_metricas_cache(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """
+    Métricas do cache de cálculos deste processo: acertos, falhas,
+    recálculos forçados (Cache-Control: no-cache), expirados por TTL e
+    removidos por LRU.
+    """
+    return cache_calculos.metricas()
+
+
+@router.get("/principais")
+def get_metricas_principais(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """Métricas do cache de usuários autenticados deste processo."""
+    return cache_principais.metricas()
+
+
+@router.get("/aliquotas")
+def get_metricas_aliquotas(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """Métricas do cache de alíquotas de impostos por contrato deste processo."""
+    return cache_aliquotas.metricas()
+
+
+@router.get("/login")
+def get_metricas_login(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """Limitador de tentativas de login e estado do disjuntor do AD neste processo."""
+    return {**limitador_login.metricas(), "disjuntor_ldap": disjuntor_ldap.estado()}
+
+
+@router.get("/pool")
+def get_metricas_pool(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """
+    Pools de conexão deste worker: tamanho, conexões em uso e livres,
+    overflow, checkouts e tempo de espera por uma conexão (média/máxima)
+    e timeouts. Cada worker do uvicorn tem os seus pools (ver `processo`).
+    """
+    return {"processo": os.getpid(), "pools": estado_pools()}
+
+
+@router.get("/auditoria")
+def get_metricas_auditoria(current_user: Usuario = Depends(_exigir_admin)) -> Dict[str, Any]:
+    """
+    Gravador de auditoria deste processo: profundidade da fila, registros
+    enfileirados e gravados, lotes, falhas, gravações síncronas (fila cheia
+    ou gravador parado) e duração do último lote.
+    """
+    return gravador_auditoria.metricas()
@@ -1,54 +1,47 @@
 from decimal import Decimal
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.etag import verificar_etag
+from app.models.prateleira import PrateleiraExecucao
 from app.models.usuario import Usuario
 from app.schemas.prateleira import (
     PrateleiraCreate, PrateleiraUpdate, PrateleiraInDB, PrateleiraCancelar,
     VinculoPrateleiraInDB, VincularPrateleiraAoBoletimRequest, ResumoPrateleira,
 )
 from app.services.prateleira_service import PrateleiraService
-from app.services.log_service import LogService
+from app.services import versao_service
 
 router = APIRouter()
 
 
-def _log_dict(obj):
-    return jsonable_encoder({k: v for k, v in obj.__dict__.items() if not k.startswith('_')})
-
-
 @router.post("/contratos/{contrato_id}/prateleira", response_model=PrateleiraInDB, status_code=201, summary="Registrar execucao na prateleira")
 def create_execucao(
     contrato_id: int,
     execucao_in: PrateleiraCreate,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = PrateleiraService(db)
     execucao = service.create_execucao(contrato_id, execucao_in, current_user)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id, usuario_email=current_user.email, acao="CREATE",
-        entidade="prateleira", entidade_id=execucao.id, dados_novos=_log_dict(execucao),
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return _enriquecer(execucao)
 
 
 @router.get("/contratos/{contrato_id}/prateleira", response_model=List[PrateleiraInDB])
 def list_por_contrato(
     contrato_id: int,
+    response: Response,
     status: Optional[str] = Query(None),
     skip: int = 0, limit: int = 100,
+    cursor: Optional[str] = deps.CURSOR_QUERY,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
-    return [_enriquecer(e) for e in PrateleiraService(db).list_por_contrato(contrato_id, status, skip, limit)]
+    pagina = PrateleiraService(db).list_por_contrato(contrato_id, status, skip, limit, cursor)
+    return [_enriquecer(e) for e in deps.itens_da_pagina(response, pagina)]
 
 
 @router.get("/contratos/{contrato_id}/prateleira/pendentes", response_model=List[PrateleiraInDB])
@@ -62,13 +55,28 @@ def get_pendentes_para_medicao(
 
 @router.get("/prateleira/", response_model=List[PrateleiraInDB])
 def list_global(
+    request: Request,
+    response: Response,
     contrato_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
     skip: int = 0, limit: int = 100,
+    cursor: Optional[str] = deps.CURSOR_QUERY,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
-    return [_enriquecer(e) for e in PrateleiraService(db).list_global(contrato_id, status, skip, limit)]
+    condicoes = []
+    if contrato_id:
+        condicoes.append(PrateleiraExecucao.contrato_id == contrato_id)
+    if status:
+        condicoes.append(PrateleiraExecucao.status == status)
+    nao_modificado = verificar_etag(
+        request, response, "prateleira", current_user.id, contrato_id, status, skip, limit, cursor,
+        versao_service.versao_tabela(db, PrateleiraExecucao, *condicoes),
+    )
+    if nao_modificado:
+        return nao_modificado
+    pagina = PrateleiraService(db).list_global(contrato_id, status, skip, limit, cursor)
+    return [_enriquecer(e) for e in deps.itens_da_pagina(response, pagina)]
 
 
 @router.get("/prateleira/resumo", response_model=ResumoPrateleira)
@@ -85,40 +93,22 @@ def get_execucao(execucao_id: int, db: Session = Depends(deps.get_db), current_u
 def update_execucao(
     execucao_id: int,
     execucao_in: PrateleiraUpdate,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = PrateleiraService(db)
-    exec_antes = service.get_execucao(execucao_id)
-    dados_antigos = _log_dict(exec_antes)
     execucao = service.update_execucao(execucao_id, execucao_in)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id, usuario_email=current_user.email, acao="UPDATE",
-        entidade="prateleira", entidade_id=execucao_id,
-        dados_antigos=dados_antigos, dados_novos=_log_dict(execucao),
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return _enriquecer(execucao)
 
 
 @router.post("/prateleira/{execucao_id}/aguardar-medicao", response_model=PrateleiraInDB)
 def marcar_aguardando_medicao(
     execucao_id: int,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = PrateleiraService(db)
     execucao = service.marcar_aguardando_medicao(execucao_id)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id, usuario_email=current_user.email, acao="STATUS_UPDATE",
-        entidade="prateleira", entidade_id=execucao_id,
-        dados_novos={"status": execucao.status},
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return _enriquecer(execucao)
 
 
@@ -126,19 +116,11 @@ def marcar_aguardando_medicao(
 def cancelar_execucao(
     execucao_id: int,
     payload: PrateleiraCancelar,
-    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: Usuario = Depends(deps.get_current_active_user)
 ):
     service = PrateleiraService(db)
     execucao = service.cancelar_execucao(execucao_id, payload.motivo)
-    LogService(db).registrar_log(
-        usuario_id=current_user.id, usuario_email=current_user.email, acao="CANCEL",
-        entidade="prateleira", entidade_id=execucao_id,
-        dados_novos={"motivo": payload.motivo, "status": execucao.status},
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
-    )
     return _enriquecer(execucao)
 
 
@@ -1,12 +1,14 @@
 # app/api/routes/usuarios.py
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.schemas.usuario import UsuarioCreate, UsuarioInDB
 from app.services.usuario_service import UsuarioService
-from app.models.usuario import Usuario
+from app.core.principal import Principal
+from app.repositories.usuario_repo import AsyncUsuarioRepository
 
 router = APIRouter()
 
@@ -22,12 +24,16 @@ def create_usuario(
     return service.create_usuario(usuario_in)
 
 @router.get("/me", response_model=UsuarioInDB)
-def read_users_me(
-    current_user: Usuario = Depends(deps.get_current_active_user)
+async def read_users_me(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_active_user)
 ):
     """
     Retorna os dados do usuário atualmente autenticado.
     """
-    # O objeto current_user já vem do banco, então podemos retorná-lo diretamente.
-    # O Pydantic converterá para UsuarioInDB usando from_attributes.
-    return current_user
\ No newline at end of file
+    # current_user é o principal em cache (só os campos usados na autorização);
+    # o cadastro completo vem do banco.
+    usuario = await AsyncUsuarioRepository(db).get(current_user.id)
+    if usuario is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado")
+    return usuario
\ No newline at end of file
@@ -0,0 +1,23 @@
+# app/core/aliquotas.py
+"""
+Cache em memória (por processo) das alíquotas de impostos de cada contrato
+(contrato_impostos), usadas no cálculo das retenções das NFs
+(app/services/retencao_service.py).
+
+O rateio de um BM em N NFs, ou qualquer atualização de NFs, deixa de
+consultar contrato_impostos a cada NF. Cada entrada guarda a versão dos
+impostos do contrato (contratos.impostos_versao, incrementada na mesma
+transação de qualquer alteração) e só é usada se a versão lida do banco
+junto com os BMs for a mesma: com vários processos, uma alteração feita em
+outro é vista já no próximo cálculo. As entradas também saem do cache após
+o commit (ou rollback) de alterações nos impostos (app/models/events.py,
+seção 4) e por TTL/LRU (app/core/cache.py, CacheTTL).
+"""
+from app.core.cache import CacheTTL
+from app.core.config import settings
+
+# {contrato_id: {tipo_imposto: aliquota}}, com a versão impostos_versao
+cache_aliquotas = CacheTTL(
+    ttl_segundos=settings.ALIQUOTAS_CACHE_TTL_SEGUNDOS,
+    habilitado=settings.ALIQUOTAS_CACHE_ENABLED,
+)
@@ -0,0 +1,36 @@
+# app/core/auditoria.py
+"""
+Contexto de auditoria da requisição: quem está alterando os dados e de onde.
+
+deps.get_current_user define o contexto ao autenticar a requisição; o hook
+de auditoria do unit of work (app/models/events.py, seção 12) o lê ao
+gravar os logs das entidades alteradas no flush. Sem contexto (avaliador
+de alertas, gravador de auditoria, scripts de manutenção), as alterações
+não geram log.
+
+Cada requisição é executada na sua própria task (e as rotas síncronas
+recebem uma cópia do contexto na thread do pool), então o contexto não
+vaza entre requisições.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ContextoAuditoria:
+    usuario_id: Optional[int]
+    usuario_email: Optional[str]
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
+
+
+_contexto: ContextVar[Optional[ContextoAuditoria]] = ContextVar("contexto_auditoria", default=None)
+
+
+def definir_contexto(contexto: Optional[ContextoAuditoria]) -> None:
+    _contexto.set(contexto)
+
+
+def contexto_atual() -> Optional[ContextoAuditoria]:
+    return _contexto.get()
@@ -0,0 +1,174 @@
+# app/core/cache.py
+"""
+Cache em memória (por processo) dos cálculos derivados de contratos:
+resumo financeiro, projeções, análise de ritmo, gráficos e dashboard.
+
+A invalidação é feita por versão: cada contrato tem um contador que é
+incrementado após o commit de qualquer transação que altere seus BMs, NFs,
+pagamentos, aditivos ou o próprio contrato (app/models/events.py, seção 10).
+A versão faz parte da chave, então entradas antigas simplesmente deixam de
+ser encontradas e saem por LRU/TTL. Visões da carteira usam a versão global,
+incrementada junto com a de qualquer contrato.
+
+Com vários processos (ex.: uvicorn --workers N) cada um tem o seu cache e só
+vê as alterações feitas por ele mesmo. Rotas com ETag incluem na chave a
+versão lida do banco (app/services/versao_service.py), a mesma da ETag:
+uma alteração feita em outro worker muda a chave e o corpo é recalculado.
+Nas demais, o TTL limita a defasagem.
+
+CacheTTL é o armazenamento comum (TTL, LRU, contadores) deste e dos demais
+caches em memória: principais (app/core/principal.py) e alíquotas
+(app/core/aliquotas.py). Cada entrada pode guardar a versão dos dados de
+origem; a leitura só a devolve se a versão informada for a mesma.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class CacheTTL:
+    """Cache chave → valor com expiração (TTL), limite de itens (LRU) e versão opcional."""
+
+    def __init__(self, max_itens: int = 10_000, ttl_segundos: float = 300, habilitado: bool = True):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self.habilitado = habilitado
+        self._itens: "OrderedDict[Hashable, Tuple[float, Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {
+            "hits": 0, "misses": 0, "expirados": 0, "desatualizados": 0,
+            "invalidacoes": 0, "removidos_lru": 0,
+        }
+
+    def obter(self, chave: Hashable, versao: Hashable = None) -> Optional[Any]:
+        """
+        Valor guardado para `chave` ou None se não existe, expirou ou foi
+        guardado com outra `versao` (a entrada é descartada nos dois casos).
+        """
+        if not self.habilitado:
+            return None
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, versao_guardada, valor = item
+                if expira_em > agora and versao_guardada == versao:
+                    self._itens.move_to_end(chave)
+                    self._contadores["hits"] += 1
+                    return valor
+                del self._itens[chave]
+                self._contadores["expirados" if expira_em <= agora else "desatualizados"] += 1
+            self._contadores["misses"] += 1
+            return None
+
+    def guardar(self, chave: Hashable, valor: Any, versao: Hashable = None) -> None:
+        if not self.habilitado:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, versao, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self._contadores["removidos_lru"] += 1
+
+    def invalidar(self, chaves: Iterable[Hashable]) -> None:
+        with self._lock:
+            for chave in chaves:
+                if self._itens.pop(chave, None) is not None:
+                    self._contadores["invalidacoes"] += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self._contadores["hits"] + self._contadores["misses"]
+            return {
+                "habilitado": self.habilitado,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "ttl_segundos": self.ttl_segundos,
+                **self._contadores,
+                "taxa_acerto": round(self._contadores["hits"] / consultas, 4) if consultas else None,
+            }
+
+
+class CacheCalculos:
+    def __init__(self, max_itens: int = 2048, ttl_segundos: float = 300, habilitado: bool = True):
+        self.habilitado = habilitado
+        self._itens = CacheTTL(max_itens=max_itens, ttl_segundos=ttl_segundos, habilitado=habilitado)
+        self._versoes: Dict[int, int] = {}
+        self._versao_global = 0
+        self._lock = threading.Lock()
+        self._bypass = 0
+
+    # ------------------------------------------------------------------
+    # VERSÕES
+    # ------------------------------------------------------------------
+    def versao(self, contrato_id: Optional[int] = None) -> int:
+        """Versão de um contrato ou, sem argumento, a versão global da carteira."""
+        with self._lock:
+            if contrato_id is None:
+                return self._versao_global
+            return self._versoes.get(contrato_id, 0)
+
+    def invalidar(self, contrato_ids: Iterable[int]) -> None:
+        """Incrementa a versão dos contratos informados e a versão global."""
+        with self._lock:
+            for contrato_id in contrato_ids:
+                self._versoes[contrato_id] = self._versoes.get(contrato_id, 0) + 1
+            self._versao_global += 1
+
+    def chave_contrato(self, nome: str, contrato_id: int, *parametros: Hashable) -> tuple:
+        """Chave de um cálculo de um contrato (inclui versão do contrato e a data)."""
+        return (nome, contrato_id, self.versao(contrato_id), date.today(), *parametros)
+
+    def chave_carteira(self, nome: str, *parametros: Hashable) -> tuple:
+        """Chave de um cálculo sobre a carteira (inclui versão global e a data)."""
+        return (nome, None, self.versao(), date.today(), *parametros)
+
+    # ------------------------------------------------------------------
+    # LEITURA / ESCRITA
+    # ------------------------------------------------------------------
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], T], usar_cache: bool = True) -> T:
+        """
+        Retorna o valor em cache para `chave` ou executa `calcular()` e guarda
+        o resultado. Com `usar_cache=False` sempre recalcula (e atualiza o cache).
+        Exceções não são guardadas.
+        """
+        if not self.habilitado:
+            return calcular()
+
+        if usar_cache:
+            # (valor,): distingue um resultado None de "não está no cache"
+            item = self._itens.obter(chave)
+            if item is not None:
+                return item[0]
+        else:
+            with self._lock:
+                self._bypass += 1
+
+        valor = calcular()
+        self._itens.guardar(chave, (valor,))
+        return valor
+
+    def limpar(self) -> None:
+        self._itens.limpar()
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._itens.metricas(), "bypass": self._bypass, "versao_global": self._versao_global}
+
+
+cache_calculos = CacheCalculos(
+    max_itens=settings.CACHE_MAX_ITENS,
+    ttl_segundos=settings.CACHE_TTL_SEGUNDOS,
+    habilitado=settings.CACHE_ENABLED,
+)
@@ -1,14 +1,24 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # Banco de Dados
     DATABASE_URL: str
 
+    # Mostrar o SQL executado no console (padrão: somente em development)
+    DB_ECHO: Optional[bool] = None
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Refresh token (app/services/refresh_token_service.py): validade da
+    # sessão de login e tolerância para o mesmo token usado por duas abas
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REFRESH_TOKEN_REUSO_TOLERANCIA_SEGUNDOS: int = 10
+
     # Ambiente (development, production)
     ENVIRONMENT: str = "development"
 
@@ -39,6 +49,105 @@ class Settings(BaseSettings):
     # Se False: nega o login se o LDAP estiver fora do ar.
     LDAP_FALLBACK_LOCAL: bool = True
 
+    # Conexões reutilizadas com o AD e timeouts (segundos)
+    LDAP_POOL_SIZE: int = 4
+    LDAP_CONNECT_TIMEOUT: int = 5
+    LDAP_RECEIVE_TIMEOUT: int = 10
+
+    # Disjuntor: após N falhas de rede seguidas, não tenta o AD por X segundos
+    LDAP_DISJUNTOR_FALHAS: int = 3
+    LDAP_DISJUNTOR_ESPERA_SEGUNDOS: int = 30
+
+    # ----------------------------------------------------------------
+    # Login
+    # ----------------------------------------------------------------
+    # Processos para verificação bcrypt (0 = número de CPUs) e quantas
+    # verificações podem aguardar na fila antes de recusar com 503
+    LOGIN_SENHA_PROCESSOS: int = 2
+    LOGIN_SENHA_FILA_MAXIMA: int = 32
+    LOGIN_SENHA_TIMEOUT_SEGUNDOS: float = 10.0
+
+    # Limite de tentativas (429): falhas por usuário e tentativas por IP na janela
+    LOGIN_JANELA_SEGUNDOS: int = 300
+    LOGIN_MAX_FALHAS_USUARIO: int = 5
+    LOGIN_MAX_TENTATIVAS_IP: int = 100
+
+    # ----------------------------------------------------------------
+    # Pools de conexão (app/db/session.py)
+    # ----------------------------------------------------------------
+    # Perfil "web": requisições da API (engines síncrono e assíncrono).
+    # Cada worker do uvicorn tem os seus pools; o total de conexões no
+    # PostgreSQL é workers x (POOL_SIZE + MAX_OVERFLOW) por engine.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0           # espera máxima por uma conexão livre (s)
+    DB_POOL_RECYCLE: int = 1800             # renova conexões mais antigas que isso (s)
+    DB_STATEMENT_TIMEOUT_MS: int = 30000    # 0 = sem limite
+
+    # Perfil "batch": avaliador de alertas e scripts de reconstrução
+    # (app/db/*.py) — poucas conexões, consultas longas permitidas.
+    DB_BATCH_POOL_SIZE: int = 2
+    DB_BATCH_MAX_OVERFLOW: int = 0
+    DB_BATCH_POOL_TIMEOUT: float = 60.0
+    DB_BATCH_POOL_RECYCLE: int = 1800
+    DB_BATCH_STATEMENT_TIMEOUT_MS: int = 0
+
+    # ----------------------------------------------------------------
+    # Alertas
+    # ----------------------------------------------------------------
+    # Avaliador em segundo plano que mantém a tabela `alertas`
+    ALERTAS_AVALIADOR_ENABLED: bool = True
+
+    # Janela (segundos) para agrupar contratos alterados antes de reavaliar
+    ALERTAS_INTERVALO_SEGUNDOS: float = 2.0
+
+    # Espera mínima (segundos) antes de tentar de novo após uma avaliação com erro
+    ALERTAS_ESPERA_APOS_FALHA_SEGUNDOS: float = 60.0
+
+    # ----------------------------------------------------------------
+    # Auditoria (tabela `logs`)
+    # ----------------------------------------------------------------
+    # Gravação em lote em segundo plano (app/services/auditoria_writer.py).
+    # False: cada log é gravado na hora, na sessão da requisição.
+    AUDITORIA_ASSINCRONA: bool = True
+
+    # O lote é gravado ao atingir LOTE_MAXIMO registros ou INTERVALO_SEGUNDOS
+    # após o primeiro registro pendente
+    AUDITORIA_LOTE_MAXIMO: int = 200
+    AUDITORIA_INTERVALO_SEGUNDOS: float = 1.0
+
+    # Acima disso os logs voltam a ser gravados de forma síncrona
+    AUDITORIA_FILA_MAXIMA: int = 10000
+
+    # Partições mensais de `logs` (app/db/arquivar_logs.py): meses mantidos
+    # no banco, partições criadas com antecedência e destino do arquivo
+    # (.jsonl.gz por mês; caminho relativo a sgc-backend/)
+    LOGS_RETENCAO_MESES: int = 12
+    LOGS_PARTICOES_FUTURAS: int = 3
+    LOGS_ARQUIVO_DIR: str = "arquivo_logs"
+
+    # ----------------------------------------------------------------
+    # Projeções
+    # ----------------------------------------------------------------
+    # Processos do pool da simulação Monte Carlo (0 = número de CPUs)
+    PROJECAO_SIMULACAO_PROCESSOS: int = 0
+
+    # ----------------------------------------------------------------
+    # Cache dos cálculos (resumos, projeções, gráficos, dashboard)
+    # ----------------------------------------------------------------
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ITENS: int = 2048
+    CACHE_TTL_SEGUNDOS: int = 300
+
+    # Cache do usuário autenticado e dos seus contratos (app/core/principal.py).
+    # TTL curto: limita a defasagem entre workers após alterar um usuário.
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SEGUNDOS: int = 60
+
+    # Cache das alíquotas de impostos por contrato (app/core/aliquotas.py)
+    ALIQUOTAS_CACHE_ENABLED: bool = True
+    ALIQUOTAS_CACHE_TTL_SEGUNDOS: int = 300
+
     model_config = SettingsConfigDict(
         env_file=".env",          # carrega do arquivo .env
         env_file_encoding="utf-8",
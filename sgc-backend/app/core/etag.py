@@ -0,0 +1,47 @@
+# app/core/etag.py
+"""
+GET condicional (ETag / If-None-Match).
+
+As rotas calculam uma "impressão digital" barata dos dados que vão devolver
+(ver app/services/versao_service.py) antes de carregar e serializar os
+objetos. Se o cliente já tem essa versão, a resposta é 304 sem corpo.
+As ETags incluem o usuário, pois o RLS muda o que cada um enxerga.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+HEADERS_VARIACAO = {"Vary": "Authorization"}
+
+
+def gerar_etag(*partes: Any) -> str:
+    """ETag fraca a partir das partes informadas (versões, filtros, usuário)."""
+    digest = hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: W/"x" equivale a "x"
+    alvo = etag.removeprefix("W/")
+    return any(
+        candidata.strip().removeprefix("W/") == alvo
+        for candidata in if_none_match.split(",")
+    )
+
+
+def verificar_etag(request: Request, response: Response, *partes: Any) -> Optional[Response]:
+    """
+    Define o ETag da resposta e, se o cliente enviou o mesmo valor em
+    If-None-Match, devolve a resposta 304 que a rota deve retornar.
+    """
+    etag = gerar_etag(*partes)
+    if _corresponde(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, **HEADERS_VARIACAO})
+    response.headers["ETag"] = etag
+    response.headers.update(HEADERS_VARIACAO)
+    return None
@@ -4,16 +4,193 @@ Autenticação via Active Directory (LDAP).
 Fluxo:
   1. Tenta bind simples com as credenciais do usuário (UPN: email@dominio.com).
   2. Se bind OK → busca atributos do AD (nome, email) e retorna dict.
-  3. Se senha errada (LDAPBindError) → retorna (False, None).
+  3. Se senha errada (invalidCredentials) → retorna (False, None).
   4. Se servidor inacessível / erro de rede → retorna (None, None),
      sinalizando ao chamador que deve tentar o fallback local.
+
+As conexões com o AD são reutilizadas (PoolLdap): cada login faz um rebind
+numa conexão já aberta, em vez de abrir TCP/TLS a cada tentativa. Um
+disjuntor (DisjuntorLdap) interrompe as tentativas por alguns segundos após
+falhas de rede seguidas, para que um AD fora do ar não prenda os workers
+até o timeout em cada login.
 """
 
 import logging
+import queue
+import threading
+import time
 from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Código LDAP de credenciais inválidas (RFC 4511)
+INVALID_CREDENTIALS = 49
+
+
+# ----------------------------------------------------------------------
+# DISJUNTOR
+# ----------------------------------------------------------------------
+class DisjuntorLdap:
+    """
+    Fechado: tentativas normais. Após `max_falhas` falhas de rede seguidas,
+    abre por `espera_segundos` (tentativas recusadas na hora). Passada a
+    espera, deixa uma tentativa passar e volta a esperar: sucesso fecha,
+    falha mantém aberto.
+    """
+
+    def __init__(self, max_falhas: int = 3, espera_segundos: float = 30):
+        self.max_falhas = max_falhas
+        self.espera_segundos = espera_segundos
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self._falhas < self.max_falhas:
+                return True
+            agora = time.monotonic()
+            if agora < self._aberto_ate:
+                return False
+            # Meio-aberto: esta tentativa passa; as seguintes aguardam o resultado
+            self._aberto_ate = agora + self.espera_segundos
+            return True
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            self._falhas = 0
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            self._falhas += 1
+            if self._falhas >= self.max_falhas:
+                self._aberto_ate = time.monotonic() + self.espera_segundos
+
+    def estado(self) -> str:
+        with self._lock:
+            if self._falhas < self.max_falhas:
+                return "fechado"
+            return "aberto" if time.monotonic() < self._aberto_ate else "meio-aberto"
+
+
+# ----------------------------------------------------------------------
+# POOL DE CONEXÕES
+# ----------------------------------------------------------------------
+class PoolLdap:
+    """Até `tamanho` conexões abertas com o AD, reutilizadas entre logins."""
+
+    def __init__(self, tamanho: int = 4):
+        self.tamanho = tamanho
+        self._livres: "queue.LifoQueue" = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._server = None
+
+    def _nova_conexao(self):
+        from ldap3 import AUTO_BIND_NONE, NONE, SIMPLE, Connection, Server
+        from app.core.config import settings
+
+        if self._server is None:
+            self._server = Server(
+                settings.LDAP_SERVER,
+                use_ssl=settings.LDAP_USE_SSL,
+                get_info=NONE,      # schema/info do servidor não são usados
+                connect_timeout=settings.LDAP_CONNECT_TIMEOUT,
+            )
+        return Connection(
+            self._server,
+            auto_bind=AUTO_BIND_NONE,   # o bind é feito por login (rebind)
+            authentication=SIMPLE,
+            raise_exceptions=True,
+            receive_timeout=settings.LDAP_RECEIVE_TIMEOUT,
+        )
+
+    def obter(self, timeout: float) -> Tuple[Optional[object], bool]:
+        """
+        (conexão, reutilizada): uma conexão livre ou uma nova, se houver vaga.
+        (None, False) se o pool continuar esgotado após `timeout` segundos.
+        """
+        if not self._vagas.acquire(timeout=timeout):
+            return None, False
+        try:
+            return self._livres.get_nowait(), True
+        except queue.Empty:
+            try:
+                return self._nova_conexao(), False
+            except Exception:
+                self._vagas.release()
+                raise
+
+    def devolver(self, conn) -> None:
+        self._livres.put(conn)
+        self._vagas.release()
+
+    def descartar(self, conn) -> None:
+        try:
+            conn.unbind()
+        except Exception:  # noqa: BLE001 — conexão já quebrada
+            pass
+        self._vagas.release()
+
+    def fechar(self) -> None:
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.unbind()
+            except Exception:  # noqa: BLE001
+                pass
+
+
+def _criar_pool() -> PoolLdap:
+    from app.core.config import settings
+    return PoolLdap(settings.LDAP_POOL_SIZE)
+
+
+def _criar_disjuntor() -> DisjuntorLdap:
+    from app.core.config import settings
+    return DisjuntorLdap(settings.LDAP_DISJUNTOR_FALHAS, settings.LDAP_DISJUNTOR_ESPERA_SEGUNDOS)
+
+
+pool_ldap = _criar_pool()
+disjuntor_ldap = _criar_disjuntor()
+
+
+# ----------------------------------------------------------------------
+# AUTENTICAÇÃO
+# ----------------------------------------------------------------------
+def _buscar_atributos(conn, email: str, base_dn: str) -> dict:
+    user_info: dict = {"email": email, "nome": email.split("@")[0]}
+    if not base_dn:
+        return user_info
+
+    # Sanitizar email para uso em filtro LDAP
+    safe_email = (
+        email
+        .replace("\\", "\\5c")
+        .replace("*",  "\\2a")
+        .replace("(",  "\\28")
+        .replace(")",  "\\29")
+        .replace("\0", "\\00")
+    )
+    conn.search(
+        search_base=base_dn,
+        search_filter=f"(userPrincipalName={safe_email})",
+        attributes=["displayName", "cn", "mail"],
+    )
+    if conn.entries:
+        entry = conn.entries[0]
+        nome = (
+            str(entry.displayName) if entry.displayName
+            else (str(entry.cn) if entry.cn else None)
+        )
+        if nome:
+            user_info["nome"] = nome
+        if entry.mail:
+            user_info["email"] = str(entry.mail)
+    return user_info
+
 
 def ldap_authenticate(email: str, password: str) -> Tuple[Optional[bool], Optional[dict]]:
     """
@@ -21,14 +198,14 @@ def ldap_authenticate(email: str, password: str) -> Tuple[Optional[bool], Option
 
     Retornos:
       (True,  info_dict) — credenciais válidas no AD; info_dict contém 'email' e 'nome'
-      (False, None)      — senha incorreta (LDAPBindError)
-      (None,  None)      — LDAP desabilitado, servidor inacessível ou erro inesperado
+      (False, None)      — senha incorreta (invalidCredentials)
+      (None,  None)      — LDAP desabilitado, servidor inacessível, disjuntor
+                           aberto ou erro inesperado
                            → o chamador pode tentar autenticação local como fallback
     """
     # Importação tardia para evitar ImportError se ldap3 não estiver instalado
     try:
-        from ldap3 import Server, Connection, ALL, SIMPLE
-        from ldap3.core.exceptions import LDAPBindError, LDAPException
+        from ldap3.core.exceptions import LDAPBindError, LDAPInvalidCredentialsResult
     except ImportError:
         logger.error("Biblioteca 'ldap3' não instalada. Execute: pip install ldap3")
         return None, None
@@ -38,64 +215,49 @@ def ldap_authenticate(email: str, password: str) -> Tuple[Optional[bool], Option
     if not settings.LDAP_ENABLED or not settings.LDAP_SERVER:
         return None, None
 
-    try:
-        server = Server(
-            settings.LDAP_SERVER,
-            use_ssl=settings.LDAP_USE_SSL,
-            get_info=ALL,
-            connect_timeout=5,
-        )
+    if not disjuntor_ldap.permitir():
+        logger.warning("LDAP indisponível (disjuntor aberto); usando fallback local se permitido.")
+        return None, None
 
-        conn = Connection(
-            server,
-            user=email,       # UPN: usuario@empresa.com.br
-            password=password,
-            authentication=SIMPLE,
-            raise_exceptions=True,
-        )
-        conn.bind()
-
-        # Credenciais válidas — buscar atributos do usuário
-        user_info: dict = {"email": email, "nome": email.split("@")[0]}
-
-        if settings.LDAP_BASE_DN:
-            # Sanitizar email para uso em filtro LDAP
-            safe_email = (
-                email
-                .replace("\\", "\\5c")
-                .replace("*",  "\\2a")
-                .replace("(",  "\\28")
-                .replace(")",  "\\29")
-                .replace("\0", "\\00")
-            )
-            conn.search(
-                search_base=settings.LDAP_BASE_DN,
-                search_filter=f"(userPrincipalName={safe_email})",
-                attributes=["displayName", "cn", "mail"],
+    # Uma conexão reaproveitada pode ter sido fechada pelo servidor enquanto
+    # ociosa: nesse caso é descartada e a tentativa é repetida com uma nova.
+    for tentativa in range(2):
+        conn = None
+        try:
+            conn, reutilizada = pool_ldap.obter(timeout=settings.LDAP_RECEIVE_TIMEOUT)
+            if conn is None:
+                logger.warning("Pool LDAP esgotado; usando fallback local se permitido.")
+                return None, None
+
+            try:
+                conn.rebind(user=email, password=password, read_server_info=False)
+            except (LDAPBindError, LDAPInvalidCredentialsResult):
+                # LDAPBindError também cobre queda da conexão durante o rebind
+                if (conn.result or {}).get("result") == INVALID_CREDENTIALS:
+                    # Credenciais inválidas (a conexão continua reutilizável)
+                    pool_ldap.devolver(conn)
+                    disjuntor_ldap.registrar_sucesso()
+                    return False, None
+                raise
+
+            # Credenciais válidas — buscar atributos do usuário
+            user_info = _buscar_atributos(conn, email, settings.LDAP_BASE_DN)
+            pool_ldap.devolver(conn)
+            disjuntor_ldap.registrar_sucesso()
+            return True, user_info
+
+        except Exception as exc:  # noqa: BLE001
+            if conn is not None:
+                pool_ldap.descartar(conn)
+                if reutilizada and tentativa == 0:
+                    continue
+            disjuntor_ldap.registrar_falha()
+            logger.warning(
+                "Erro ao conectar ao servidor LDAP '%s': %s. "
+                "Tentando autenticação local como fallback.",
+                settings.LDAP_SERVER,
+                exc,
             )
-            if conn.entries:
-                entry = conn.entries[0]
-                nome = (
-                    str(entry.displayName) if entry.displayName
-                    else (str(entry.cn) if entry.cn else None)
-                )
-                if nome:
-                    user_info["nome"] = nome
-                if entry.mail:
-                    user_info["email"] = str(entry.mail)
-
-        conn.unbind()
-        return True, user_info
-
-    except LDAPBindError:
-        # Credenciais inválidas
-        return False, None
-
-    except Exception as exc:  # noqa: BLE001
-        logger.warning(
-            "Erro ao conectar ao servidor LDAP '%s': %s. "
-            "Tentando autenticação local como fallback.",
-            settings.LDAP_SERVER,
-            exc,
-        )
-        return None, None
+            return None, None
+
+    return None, None
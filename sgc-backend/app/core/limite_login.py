@@ -0,0 +1,103 @@
+# app/core/limite_login.py
+"""
+Limite de tentativas de login por usuário e por IP (janela deslizante).
+
+- Por usuário: conta apenas falhas; um login bem-sucedido zera a contagem.
+  Protege a conta contra tentativa de senhas.
+- Por IP: conta todas as tentativas, com limite alto (vários usuários
+  podem sair pelo mesmo NAT). Impede que um único cliente monopolize o
+  bcrypt e o AD.
+
+Acima do limite o login é recusado com 429 antes de qualquer verificação de
+senha. As contagens ficam em memória, por processo.
+"""
+import threading
+import time
+from collections import deque
+from math import ceil
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+Chave = Tuple[str, str]
+
+# Tentativas entre duas varreduras das chaves expiradas
+LIMPEZA_A_CADA = 1000
+
+
+class LimitadorLogin:
+    def __init__(self, janela_segundos: float = 300, max_falhas_usuario: int = 5,
+                 max_tentativas_ip: int = 100):
+        self.janela_segundos = janela_segundos
+        self.max_falhas_usuario = max_falhas_usuario
+        self.max_tentativas_ip = max_tentativas_ip
+        self._eventos: Dict[Chave, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._bloqueios = 0
+        self._tentativas = 0
+
+    def _recentes(self, chave: Chave, agora: float) -> Deque[float]:
+        eventos = self._eventos.get(chave)
+        if eventos is None:
+            return deque()
+        while eventos and eventos[0] <= agora - self.janela_segundos:
+            eventos.popleft()
+        if not eventos:
+            del self._eventos[chave]
+        return eventos
+
+    def _espera(self, eventos: Deque[float], limite: int, agora: float) -> Optional[int]:
+        if limite <= 0 or len(eventos) < limite:
+            return None
+        # Libera quando o evento que estourou o limite sair da janela
+        return max(1, ceil(eventos[-limite] + self.janela_segundos - agora))
+
+    def registrar_tentativa(self, ip: str, usuario: str) -> Optional[int]:
+        """
+        Registra a tentativa do IP. Retorna os segundos a aguardar se o IP ou
+        o usuário estiverem acima do limite (a tentativa não deve prosseguir),
+        ou None.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            self._tentativas += 1
+            if self._tentativas % LIMPEZA_A_CADA == 0:
+                self._limpar_expirados(agora)
+            espera = self._espera(
+                self._recentes(("usuario", usuario.lower()), agora), self.max_falhas_usuario, agora
+            )
+            tentativas_ip = self._recentes(("ip", ip), agora)
+            espera_ip = self._espera(tentativas_ip, self.max_tentativas_ip, agora)
+            if espera_ip is not None:
+                espera = max(espera or 0, espera_ip)
+            if espera is not None:
+                self._bloqueios += 1
+                return espera
+            self._eventos.setdefault(("ip", ip), tentativas_ip).append(agora)
+            return None
+
+    def registrar_falha(self, usuario: str) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            chave = ("usuario", usuario.lower())
+            self._eventos.setdefault(chave, self._recentes(chave, agora)).append(agora)
+
+    def registrar_sucesso(self, usuario: str) -> None:
+        with self._lock:
+            self._eventos.pop(("usuario", usuario.lower()), None)
+
+    def _limpar_expirados(self, agora: float) -> None:
+        # Remove chaves sem eventos na janela (memória limitada a quem tentou recentemente)
+        for chave in list(self._eventos):
+            self._recentes(chave, agora)
+
+    def metricas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"chaves": len(self._eventos), "tentativas": self._tentativas, "bloqueios": self._bloqueios}
+
+
+limitador_login = LimitadorLogin(
+    janela_segundos=settings.LOGIN_JANELA_SEGUNDOS,
+    max_falhas_usuario=settings.LOGIN_MAX_FALHAS_USUARIO,
+    max_tentativas_ip=settings.LOGIN_MAX_TENTATIVAS_IP,
+)
@@ -0,0 +1,35 @@
+# app/core/principal.py
+"""
+Usuário autenticado (principal) e o seu cache em memória.
+
+get_current_user (app/api/deps.py) só consulta `usuarios` e
+`usuario_contratos` quando o principal não está no cache; nas demais
+requisições o token é validado sem nenhuma ida ao banco.
+
+As entradas são invalidadas após o commit de qualquer alteração em
+Usuario ou UsuarioContrato (app/models/events.py, seção 11). Com vários
+processos cada um tem o seu cache e o TTL curto limita a defasagem
+(ex.: usuário desativado em outro worker).
+"""
+from dataclasses import dataclass
+from typing import FrozenSet
+
+from app.core.cache import CacheTTL
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Dados do usuário necessários às rotas (mesmos nomes de atributo do modelo Usuario)."""
+    id: int
+    email: str
+    perfil: str
+    ativo: bool
+    contrato_ids: FrozenSet[int]
+
+
+# {usuario_id: Principal}
+cache_principais = CacheTTL(
+    ttl_segundos=settings.PRINCIPAL_CACHE_TTL_SEGUNDOS,
+    habilitado=settings.PRINCIPAL_CACHE_ENABLED,
+)
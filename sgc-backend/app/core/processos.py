@@ -0,0 +1,23 @@
+# app/core/processos.py
+"""
+Pools de processos da aplicação (verificação de senha, simulação de
+projeções).
+
+Os processos não são criados por fork: o processo da API já tem threads
+(gravador de auditoria, avaliador de alertas, threadpool do anyio) e um
+filho criado por fork pode herdar um lock preso. Usa-se o forkserver e, onde
+não existe (Windows, macOS antigo), o spawn. Em ambos os filhos importam do
+zero o módulo da função executada.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _contexto_processos():
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(metodo)
+
+
+def criar_pool_processos(max_workers: int) -> ProcessPoolExecutor:
+    """ProcessPoolExecutor com processos iniciados por forkserver/spawn."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_contexto_processos())
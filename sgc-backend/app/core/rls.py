@@ -1,13 +1,33 @@
-from sqlalchemy import text
+from typing import Union
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-def set_current_user_id(db: Session, user_id: int) -> None:
+# Chave em session.info com o id do usuário da requisição
+RLS_USUARIO_ID = "rls_usuario_id"
+
+
+def set_current_user_id(db: Union[Session, AsyncSession], user_id: int) -> None:
     """
-    Define a variável de sessão 'app.current_user_id' no PostgreSQL.
-    Deve ser chamada no início de cada requisição autenticada.
+    Associa o usuário à sessão para o RLS do PostgreSQL. Não executa nada:
+    a variável 'app.current_user_id' é definida com SET LOCAL (set_config
+    com is_local=true) no início de cada transação da sessão, junto com o
+    BEGIN (aplicar_usuario_rls). Deve ser chamada antes da primeira consulta.
     """
-    db.execute(
-        text("SET app.current_user_id = :user_id"),
-        {"user_id": user_id}
-    )
-    # Não precisa de commit; a variável dura apenas durante a sessão/transação.
\ No newline at end of file
+    db.info[RLS_USUARIO_ID] = user_id
+
+
+@event.listens_for(Session, "after_begin")
+def aplicar_usuario_rls(session, transaction, connection):
+    # Vale também para AsyncSession (executa na Session síncrona interna).
+    # set_config em vez de SET LOCAL: o psycopg 3 envia os parâmetros
+    # separados do SQL e o PostgreSQL não aceita parâmetro em SET.
+    user_id = session.info.get(RLS_USUARIO_ID)
+    if user_id is not None:
+        connection.execute(
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": str(user_id)}
+        )
+    # Transação-local: some no COMMIT/ROLLBACK e não vaza para a próxima
+    # requisição que reutilizar a conexão do pool.
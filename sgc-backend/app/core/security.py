@@ -1,3 +1,6 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturoTimeout
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -5,6 +8,7 @@ from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.processos import criar_pool_processos
 
 # Contexto do passlib para bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -13,6 +17,70 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha em texto plano corresponde ao hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
+# ----------------------------------------------------------------------
+# VERIFICAÇÃO DE SENHA EM POOL DE PROCESSOS
+# ----------------------------------------------------------------------
+# O bcrypt é deliberadamente caro (~0,1–0,3 s de CPU por verificação). No
+# login ele roda num pool de processos limitado, para que uma rajada de
+# logins não ocupe a CPU do worker que atende as demais requisições. Além
+# dos processos, no máximo LOGIN_SENHA_FILA_MAXIMA verificações aguardam;
+# acima disso o login é recusado na hora (503).
+class VerificacaoSenhaOcupada(Exception):
+    """Pool de verificação de senha saturado ou sem resposta no prazo."""
+
+
+_executor_senhas: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_vagas_senhas: Optional[threading.BoundedSemaphore] = None
+
+
+def _processos_senha() -> int:
+    return settings.LOGIN_SENHA_PROCESSOS or os.cpu_count() or 1
+
+
+def _obter_executor_senhas() -> ProcessPoolExecutor:
+    global _executor_senhas, _vagas_senhas
+    with _executor_lock:
+        if _executor_senhas is None:
+            processos = _processos_senha()
+            _executor_senhas = criar_pool_processos(processos)
+            _vagas_senhas = threading.BoundedSemaphore(processos + settings.LOGIN_SENHA_FILA_MAXIMA)
+        return _executor_senhas
+
+
+def encerrar_pool_senhas() -> None:
+    """Encerra o pool de processos (chamado no shutdown da aplicação)."""
+    global _executor_senhas
+    with _executor_lock:
+        if _executor_senhas is not None:
+            _executor_senhas.shutdown(wait=False, cancel_futures=True)
+            _executor_senhas = None
+
+
+def verificar_senha(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password executado no pool de processos. Levanta
+    VerificacaoSenhaOcupada se a fila estiver cheia ou se a verificação
+    não terminar em LOGIN_SENHA_TIMEOUT_SEGUNDOS.
+    """
+    executor = _obter_executor_senhas()
+    vagas = _vagas_senhas
+    if not vagas.acquire(blocking=False):
+        raise VerificacaoSenhaOcupada("Muitas verificações de senha em andamento")
+    try:
+        futuro = executor.submit(verify_password, plain_password, hashed_password)
+    except Exception:
+        vagas.release()
+        raise
+    # A vaga só é liberada quando o processo termina (mesmo após timeout)
+    futuro.add_done_callback(lambda _futuro: vagas.release())
+    try:
+        return futuro.result(timeout=settings.LOGIN_SENHA_TIMEOUT_SEGUNDOS)
+    except FuturoTimeout as e:
+        futuro.cancel()
+        raise VerificacaoSenhaOcupada("Verificação de senha excedeu o tempo limite") from e
+
+
 def get_password_hash(password: str) -> str:
     """Gera o hash bcrypt da senha."""
     return pwd_context.hash(password)
@@ -0,0 +1,64 @@
+"""
+Rotina de retenção da auditoria: cria as partições mensais futuras de
+`logs` e arquiva (desanexa, grava .jsonl.gz e remove) as que passaram de
+LOGS_RETENCAO_MESES meses.
+Executar: python -m app.db.arquivar_logs
+Consultar um mês arquivado: python -m app.db.arquivar_logs --ler 2025-01 [--entidade contratos --entidade-id 7]
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path para permitir imports absolutos
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.db.session import BatchSessionLocal
+from app.models import *  # noqa: F401,F403 — registra modelos e listeners
+from app.services.log_retencao_service import aplicar_retencao, diretorio_arquivo, ler_arquivo
+
+
+def arquivar():
+    db = BatchSessionLocal()
+    try:
+        print("🔄 Aplicando retenção dos logs...")
+        resultado = aplicar_retencao(db)
+        for nome in resultado["criadas"]:
+            print(f"   ➕ partição {nome} criada")
+        for nome, total in resultado["arquivadas"].items():
+            print(f"   📦 {nome}: {total} registro(s) arquivado(s)")
+        print(f"✅ Retenção aplicada (arquivo em {diretorio_arquivo()}).")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Erro ao aplicar retenção dos logs: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def ler(mes: str, entidade, entidade_id, campo, limite):
+    ano, numero = (int(parte) for parte in mes.split("-"))
+    registros = ler_arquivo(
+        date(ano, numero, 1), entidade=entidade, entidade_id=entidade_id, campo=campo, limit=limite
+    )
+    if registros is None:
+        print(f"❌ Mês {mes} não arquivado em {diretorio_arquivo()}.")
+        sys.exit(1)
+    for registro in registros:
+        print(json.dumps(registro, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retenção e consulta do arquivo de logs")
+    parser.add_argument("--ler", metavar="AAAA-MM", help="consulta um mês arquivado")
+    parser.add_argument("--entidade")
+    parser.add_argument("--entidade-id", type=int)
+    parser.add_argument("--campo")
+    parser.add_argument("--limite", type=int, default=1000)
+    args = parser.parse_args()
+    if args.ler:
+        ler(args.ler, args.entidade, args.entidade_id, args.campo, args.limite)
+    else:
+        arquivar()
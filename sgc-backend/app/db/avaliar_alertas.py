@@ -0,0 +1,33 @@
+"""
+Reavalia todas as regras de alerta e sincroniza a tabela `alertas`
+(mesma varredura diária feita pelo avaliador em segundo plano).
+Executar: python -m app.db.avaliar_alertas
+"""
+
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path para permitir imports absolutos
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.db.session import BatchSessionLocal
+from app.models import *  # noqa: F401,F403 — registra modelos e listeners
+from app.services.alerta_service import AlertaService
+
+
+def avaliar():
+    db = BatchSessionLocal()
+    try:
+        print("🔄 Avaliando alertas da carteira...")
+        abertos, resolvidos = AlertaService(db).sincronizar_alertas()
+        db.commit()
+        print(f"✅ {abertos} alerta(s) aberto(s), {resolvidos} resolvido(s).")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Erro ao avaliar alertas: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    avaliar()
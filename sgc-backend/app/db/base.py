@@ -1,18 +1,4 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
 
+# Engines e sessões ficam em app/db/session.py
 Base = declarative_base()
-
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # verifica se a conexão está viva antes de usar
-    echo=settings.ENVIRONMENT == "development"  # mostra SQL no console (útil para debug)
-)
-
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
\ No newline at end of file
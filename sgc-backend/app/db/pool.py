@@ -0,0 +1,97 @@
+"""
+Telemetria dos pools de conexão (exposta em GET /metricas/pool).
+
+PoolMonitorado / AsyncPoolMonitorado são o QueuePool padrão com a medição do
+tempo que cada checkout levou para obter uma conexão (espera por uma livre
+ou abertura de uma nova). Junto com o estado atual do pool (conexões em uso,
+overflow), isso mostra se POOL_SIZE e MAX_OVERFLOW (app/core/config.py)
+estão adequados para cada worker.
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class TelemetriaPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            tentativas = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_media_ms": round(self.espera_total * 1000 / tentativas, 3) if tentativas else None,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+            }
+
+
+class _MedirEspera:
+    """Mixin para QueuePool: mede o tempo de obtenção de cada checkout."""
+
+    telemetria: TelemetriaPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            self.telemetria.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.telemetria.registrar(time.perf_counter() - inicio)
+        return conexao
+
+    def recreate(self):
+        # engine.dispose() recria o pool; a telemetria continua acumulando
+        novo = super().recreate()
+        novo.telemetria = self.telemetria
+        return novo
+
+
+class PoolMonitorado(_MedirEspera, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetria = TelemetriaPool()
+
+
+class AsyncPoolMonitorado(_MedirEspera, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetria = TelemetriaPool()
+
+
+def estado_pool(pool) -> Dict[str, Any]:
+    """Estado atual do pool e, se monitorado, a telemetria acumulada."""
+    estado: Dict[str, Any] = {"classe": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            "tamanho": pool.size(),
+            "em_uso": pool.checkedout(),
+            "livres": pool.checkedin(),
+            # overflow() é negativo enquanto o pool base não foi todo aberto
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_segundos": pool.timeout(),
+        })
+    telemetria = getattr(pool, "telemetria", None)
+    if telemetria is not None:
+        estado.update(telemetria.metricas())
+    return estado
@@ -0,0 +1,32 @@
+"""
+Reconstrói o consolidado mensal (fatos_mensais) a partir de
+boletins_medicao, faturamentos e pagamentos.
+Executar: python -m app.db.rebuild_fatos_mensais
+"""
+
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path para permitir imports absolutos
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.db.session import BatchSessionLocal
+from app.models import *  # noqa: F401,F403 — registra modelos e listeners
+from app.services.fato_mensal_service import reconstruir_fatos
+
+
+def rebuild():
+    db = BatchSessionLocal()
+    try:
+        print("🔄 Reconstruindo fatos_mensais...")
+        total = reconstruir_fatos(db)
+        print(f"✅ {total} linha(s) contrato × mês gerada(s).")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Erro ao reconstruir fatos mensais: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,32 @@
+"""
+Reconstrói o razão financeiro (contrato_saldos) a partir de
+boletins_medicao, faturamentos e pagamentos.
+Executar: python -m app.db.rebuild_saldos
+"""
+
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path para permitir imports absolutos
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.db.session import BatchSessionLocal
+from app.models import *  # noqa: F401,F403 — registra modelos e listeners
+from app.services.saldo_service import reconstruir_saldos
+
+
+def rebuild():
+    db = BatchSessionLocal()
+    try:
+        print("🔄 Reconstruindo contrato_saldos...")
+        total = reconstruir_saldos(db)
+        print(f"✅ {total} contrato(s) recalculado(s).")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Erro ao reconstruir saldos: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
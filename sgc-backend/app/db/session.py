@@ -1,16 +1,144 @@
+from typing import Any, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import AsyncPoolMonitorado, PoolMonitorado, estado_pool
+
+
+# ----------------------------------------------------------------------
+# FÁBRICA DE ENGINES
+# ----------------------------------------------------------------------
+# Todos os engines do processo saem daqui, com pool e timeouts definidos em
+# app/core/config.py por perfil:
+#   "web"   -> requisições da API (engine síncrono e assíncrono)
+#   "batch" -> avaliador de alertas e scripts de app/db/ (BatchSessionLocal)
+PERFIS = ("web", "batch")
+
+
+def _config_perfil(perfil: str) -> Dict[str, Any]:
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil de engine desconhecido: {perfil}")
+    prefixo = "DB_BATCH_" if perfil == "batch" else "DB_"
+    return {
+        "pool_size": getattr(settings, f"{prefixo}POOL_SIZE"),
+        "max_overflow": getattr(settings, f"{prefixo}MAX_OVERFLOW"),
+        "pool_timeout": getattr(settings, f"{prefixo}POOL_TIMEOUT"),
+        "pool_recycle": getattr(settings, f"{prefixo}POOL_RECYCLE"),
+        "statement_timeout": getattr(settings, f"{prefixo}STATEMENT_TIMEOUT_MS"),
+    }
+
+
+def _argumentos_engine(url: URL, perfil: str, assincrono: bool) -> Dict[str, Any]:
+    echo = settings.DB_ECHO if settings.DB_ECHO is not None else settings.ENVIRONMENT == "development"
+    argumentos: Dict[str, Any] = {"pool_pre_ping": True, "echo": echo}
+    if url.get_backend_name() != "postgresql":
+        # SQLite (testes locais) usa o pool padrão do dialeto
+        return argumentos
+
+    config = _config_perfil(perfil)
+    argumentos.update(
+        poolclass=AsyncPoolMonitorado if assincrono else PoolMonitorado,
+        pool_size=config["pool_size"],
+        max_overflow=config["max_overflow"],
+        pool_timeout=config["pool_timeout"],
+        pool_recycle=config["pool_recycle"],
+    )
+    if config["statement_timeout"]:
+        # Opção de conexão do libpq (vale para psycopg2 e psycopg 3)
+        argumentos["connect_args"] = {"options": f"-c statement_timeout={config['statement_timeout']}"}
+    return argumentos
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.ENVIRONMENT == "development",
-    
-)
+
+def criar_engine(perfil: str = "web") -> Engine:
+    """Engine síncrono do perfil informado."""
+    url = make_url(settings.DATABASE_URL)
+    return create_engine(url, **_argumentos_engine(url, perfil, assincrono=False))
+
+
+def url_assincrona(url: str) -> URL:
+    """DATABASE_URL com o driver assíncrono do psycopg 3 (postgresql+psycopg)."""
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url
+
+
+def criar_async_engine(perfil: str = "web") -> AsyncEngine:
+    """Engine assíncrono (psycopg 3) do perfil informado."""
+    url = url_assincrona(settings.DATABASE_URL)
+    return create_async_engine(url, **_argumentos_engine(url, perfil, assincrono=True))
+
+
+# ----------------------------------------------------------------------
+# ENGINES E SESSÕES SÍNCRONOS
+# ----------------------------------------------------------------------
+# Criar o engine não abre conexões: o pool batch só conecta quando o
+# avaliador de alertas ou um script o utiliza.
+engine = criar_engine("web")
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
-)
\ No newline at end of file
+)
+
+batch_engine = criar_engine("batch")
+
+BatchSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=batch_engine
+)
+
+
+# ----------------------------------------------------------------------
+# ENGINE ASSÍNCRONO (psycopg 3)
+# ----------------------------------------------------------------------
+# Usado pelas rotas `async def` dos caminhos de leitura mais frequentes
+# (autenticação, consulta e listagem de contratos, dashboard), que assim não
+# ocupam uma thread do threadpool esperando o banco. Convive com o engine
+# síncrono acima (cada um com o seu pool); os serviços migram aos poucos.
+# É criado no primeiro uso, para que scripts e o Alembic não abram um
+# segundo pool.
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = criar_async_engine("web")
+    return _async_engine
+
+
+async def encerrar_async_engine() -> None:
+    """Fecha as conexões do pool assíncrono (shutdown da aplicação)."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+# expire_on_commit=False: objetos continuam legíveis após o commit sem
+# recarga implícita (lazy load não é permitido em sessão assíncrona)
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+# ----------------------------------------------------------------------
+# TELEMETRIA
+# ----------------------------------------------------------------------
+def estado_pools() -> Dict[str, Any]:
+    """Estado e telemetria de cada pool deste processo (GET /metricas/pool)."""
+    pools = {
+        "web": estado_pool(engine.pool),
+        "batch": estado_pool(batch_engine.pool),
+    }
+    if _async_engine is not None:
+        pools["web_async"] = estado_pool(_async_engine.pool)
+    return pools
@@ -1,20 +1,48 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.core.config import settings
+from app.core.ldap_auth import pool_ldap
+from app.core.security import encerrar_pool_senhas
+from app.db.session import encerrar_async_engine
 from app.api.routes import dashboard
+from app.repositories.base import CursorInvalido
 from app.services.arquivo_service import UPLOAD_DIR
+from app.services.alerta_avaliador import avaliador_alertas
+from app.services.auditoria_writer import gravador_auditoria
+from app.services.simulacao_projecao_service import encerrar_pool_simulacao
 
 # Garantir existência do diretório de uploads
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Avaliador de alertas em segundo plano (tabela `alertas`)
+    if settings.ALERTAS_AVALIADOR_ENABLED:
+        avaliador_alertas.iniciar()
+    # Gravação dos logs de auditoria em lote
+    if settings.AUDITORIA_ASSINCRONA:
+        gravador_auditoria.iniciar()
+    yield
+    avaliador_alertas.parar()
+    gravador_auditoria.parar()
+    encerrar_pool_simulacao()
+    encerrar_pool_senhas()
+    pool_ldap.fechar()
+    await encerrar_async_engine()
+
+
 app = FastAPI(
     title="SGC - Sistema de Gestão de Contratos",
     description="API para gerenciamento de contratos, medições e financeiro",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configuração CORS
@@ -33,8 +61,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos de GET condicional e paginação por cursor lidos pelo frontend
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+
+@app.exception_handler(CursorInvalido)
+async def cursor_invalido_handler(request: Request, exc: CursorInvalido):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # Inclui todas as rotas da aplicação
 app.include_router(api_router)
 
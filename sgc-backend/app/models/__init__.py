@@ -11,6 +11,11 @@ from .pagamento import Pagamento
 from .contrato_imposto import ContratoImposto
 from .usuario_contrato import UsuarioContrato
 from .prateleira import PrateleiraExecucao, BoletimPrateleiraExecucao
+from .contrato_saldo import ContratoSaldo
+from .contrato_bm_sequencia import ContratoBmSequencia
+from .fato_mensal import FatoMensal
+from .alerta import Alerta
+from .refresh_token import RefreshToken
 from . import events
 
 __all__ = [
@@ -28,5 +33,10 @@ __all__ = [
     "UsuarioContrato",
     "PrateleiraExecucao",
     "BoletimPrateleiraExecucao",
+    "ContratoSaldo",
+    "ContratoBmSequencia",
+    "FatoMensal",
+    "Alerta",
+    "RefreshToken",
     "events"
 ]
\ No newline at end of file
@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+class Alerta(Base):
+    """
+    Alerta persistido, gerado pelas regras de app/services/alerta_service.py.
+
+    A `chave` identifica o alerta de forma estável (tipo + contrato + entidade
+    de origem). Enquanto a condição persistir, o mesmo registro é mantido e
+    apenas atualizado; quando deixa de ocorrer recebe `resolvido_em`. Se a
+    condição voltar a ocorrer, um novo registro é aberto com a mesma chave.
+    """
+    __tablename__ = "alertas"
+    __table_args__ = (
+        # No máximo um alerta aberto por chave
+        Index("uq_alertas_chave_aberto", "chave", unique=True,
+              postgresql_where=text("resolvido_em IS NULL")),
+        Index("idx_alertas_aberto_severidade", "resolvido_em", "severidade"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(120), nullable=False)
+    tipo = Column(String(50), nullable=False)
+    titulo = Column(String(200), nullable=False)
+    mensagem = Column(Text, nullable=False)
+    severidade = Column(String(20), nullable=False)  # critica, alta, media, baixa
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    boletim_id = Column(Integer, nullable=True)
+    faturamento_id = Column(Integer, nullable=True)
+    seguro_id = Column(Integer, nullable=True)
+
+    primeira_ocorrencia = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ultima_avaliacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    resolvido_em = Column(DateTime(timezone=True), nullable=True)
+    reconhecido_em = Column(DateTime(timezone=True), nullable=True)
+    reconhecido_por_id = Column(
+        Integer,
+        ForeignKey("usuarios.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    # Relacionamentos
+    contrato = relationship("Contrato")
+    reconhecido_por = relationship("Usuario")
@@ -13,6 +13,7 @@ class BoletimMedicao(Base):
     __table_args__ = (
         UniqueConstraint("contrato_id", "numero_sequencial", name="unique_bm_por_contrato"),
         Index("idx_bm_contrato_status", "contrato_id", "status"),
+        Index("idx_bm_status_id", "status", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -77,6 +77,14 @@ class Contrato(Base):
         comment="Alíquota padrão de ISS para este contrato (pode ser sobrescrita em contrato_impostos)"
     )
 
+    impostos_versao = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="Incrementada a cada alteração em contrato_impostos (valida o cache de alíquotas)"
+    )
+
     # ------------------------------------------------------------
     # Chave estrangeira: cliente (tabela empresas)
     # ------------------------------------------------------------
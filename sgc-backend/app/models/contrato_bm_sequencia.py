@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey
+
+from app.db.base import Base
+
+class ContratoBmSequencia(Base):
+    """
+    Último número sequencial de BM emitido por contrato (uma linha por
+    contrato). Incrementado atomicamente ao inserir BMs
+    (app/services/bm_sequencia_service.py); a linha fica bloqueada até o
+    fim da transação, o que serializa apenas a criação de BMs do mesmo
+    contrato.
+    """
+    __tablename__ = "contrato_bm_sequencias"
+
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    ultimo_numero = Column(Integer, default=0, nullable=False)
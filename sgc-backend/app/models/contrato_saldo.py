@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, DateTime, DECIMAL, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+class ContratoSaldo(Base):
+    """
+    Razão financeiro consolidado de um contrato (uma linha por contrato).
+    Mantido na mesma transação pelos listeners de BM, NF e pagamento
+    (app/models/events.py). Pode ser reconstruído a partir das tabelas
+    de origem com: python -m app.db.rebuild_saldos
+    """
+    __tablename__ = "contrato_saldos"
+
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    valor_executado = Column(DECIMAL(15, 2), default=0, nullable=False,
+                             comment="Soma do valor aprovado dos BMs APROVADOS/FATURADOS")
+    valor_faturado = Column(DECIMAL(15, 2), default=0, nullable=False,
+                            comment="Soma do valor bruto das NFs não canceladas")
+    valor_recebido = Column(DECIMAL(15, 2), default=0, nullable=False,
+                            comment="Soma dos pagamentos de NFs não canceladas")
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relacionamento
+    contrato = relationship("Contrato")
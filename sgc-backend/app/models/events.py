@@ -1,5 +1,5 @@
 from decimal import Decimal  
-from sqlalchemy import event, select, func
+from sqlalchemy import event, insert, select, func, inspect
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from app.models.aditivo import Aditivo
@@ -7,31 +7,88 @@ from app.models.contrato import Contrato
 from datetime import timedelta
 
 from app.models import (
+    Alerta,
     BoletimMedicao,
+    Empresa,
+    PrateleiraExecucao,
     Faturamento,
     Pagamento,
     Contrato,
     Aditivo,
     ContratoImposto,
+    ContratoArt,
+    ContratoSeguro,
+    Usuario,
+    UsuarioContrato,
 )
+from app.models.arquivo import Arquivo
+from app.models.log import Log
 
 # ----------------------------------------------------------------------
 # 1. GERAÇÃO AUTOMÁTICA DO NÚMERO SEQUENCIAL DO BOLETIM DE MEDIÇÃO
 # ----------------------------------------------------------------------
+# Os números vêm do contador por contrato (contrato_bm_sequencias). No
+# before_flush, os BMs novos de cada contrato recebem uma faixa reservada
+# num único comando; o before_insert cobre apenas os BMs que não passaram
+# por ele (ex.: contrato definido durante o flush). BMs criados com número
+# explícito (ex.: seed) avançam o contador até esse número, para que as
+# próximas reservas não o repitam.
+BMS_NUMERADOS = "bms_numerados"
+
+
+def _sem_numero(boletim: BoletimMedicao) -> bool:
+    return boletim.numero_sequencial is None or boletim.numero_sequencial == 0
+
+
+@event.listens_for(Session, 'before_flush')
+def reservar_numeros_bm_do_flush(session, flush_context, instances):
+    """Numera os BMs novos do flush, uma reserva por contrato."""
+    por_contrato = {}
+    explicitos = {}
+    for target in session.new:
+        if not isinstance(target, BoletimMedicao) or target.contrato_id is None:
+            continue
+        if _sem_numero(target):
+            por_contrato.setdefault(target.contrato_id, []).append(target)
+        else:
+            explicitos.setdefault(target.contrato_id, []).append(target)
+    if not por_contrato and not explicitos:
+        return
+
+    from app.services.bm_sequencia_service import reservar_numeros_bm
+    connection = session.connection()
+    numerados = session.info.setdefault(BMS_NUMERADOS, set())
+    for contrato_id in sorted(por_contrato.keys() | explicitos.keys()):
+        # Ordem de contratos fixa: evita deadlock entre flushes concorrentes
+        boletins = por_contrato.get(contrato_id, [])
+        com_numero = explicitos.get(contrato_id, [])
+        minimo = max((boletim.numero_sequencial for boletim in com_numero), default=0)
+        primeiro = reservar_numeros_bm(connection, contrato_id, len(boletins), minimo)
+        for deslocamento, boletim in enumerate(boletins):
+            boletim.numero_sequencial = primeiro + deslocamento
+        numerados.update(id(boletim) for boletim in (*boletins, *com_numero))
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def descartar_bms_numerados(session, flush_context):
+    session.info.pop(BMS_NUMERADOS, None)
+
+
 @event.listens_for(BoletimMedicao, 'before_insert')
 def generate_bm_sequencial(mapper, connection, target):
     """
-    Define o próximo número sequencial para o BM de um contrato.
-    Executado automaticamente antes de inserir um novo registro.
+    Numera o BM que chegou ao INSERT sem passar pelo before_flush; com
+    número explícito, garante o contador à frente dele.
     """
-    if target.numero_sequencial is None or target.numero_sequencial == 0:
-        result = connection.execute(
-            select(func.coalesce(func.max(BoletimMedicao.numero_sequencial), 0) + 1)
-            .where(BoletimMedicao.contrato_id == target.contrato_id)
-        ).scalar()
-        target.numero_sequencial = result
-        # Log opcional para debug (pode remover depois)
-        print(f"🔢 BM sequencial gerado: {target.numero_sequencial} para contrato {target.contrato_id}")
+    session = Session.object_session(target)
+    if session is not None and id(target) in session.info.get(BMS_NUMERADOS, ()):
+        return  # já numerado (ou registrado) no before_flush
+
+    from app.services.bm_sequencia_service import registrar_numero_bm, reservar_numeros_bm
+    if _sem_numero(target):
+        target.numero_sequencial = reservar_numeros_bm(connection, target.contrato_id)
+    else:
+        registrar_numero_bm(connection, target.contrato_id, target.numero_sequencial)
 
 
 # ----------------------------------------------------------------------
@@ -64,8 +121,16 @@ def prevent_delete_faturado_bm(mapper, connection, target):
 
 
 # ----------------------------------------------------------------------
-# 4. FUNÇÃO AUXILIAR: OBTER ALÍQUOTAS DE IMPOSTOS DO CONTRATO (como Decimal)
+# 4. ALÍQUOTAS DE IMPOSTOS DO CONTRATO (como Decimal, com cache)
 # ----------------------------------------------------------------------
+# As alíquotas ficam no cache por contrato (app/core/aliquotas.py), com a
+# versão dos impostos do contrato (contratos.impostos_versao). Qualquer
+# alteração em contrato_impostos incrementa a versão no mesmo flush, o que
+# invalida o cache em todos os processos. Os contratos alterados também
+# saem do cache local após o commit ou o rollback (o cache pode ter sido
+# preenchido com valores não confirmados).
+ALIQUOTAS_DA_TRANSACAO = "aliquotas_da_transacao"
+
 
 def obter_aliquotas_contrato(contrato_id: int, session: Session):
     """
@@ -73,16 +138,69 @@ def obter_aliquotas_contrato(contrato_id: int, session: Session):
     Se não houver configuração, retorna dicionário vazio {}.
     Não há valores padrão — os impostos devem ser configurados explicitamente pelo usuário.
     """
-    impostos = session.execute(
-        select(ContratoImposto).where(ContratoImposto.contrato_id == contrato_id)
-    ).scalars().all()
+    from app.services.retencao_service import aliquotas_por_contrato
+    return aliquotas_por_contrato(session, [contrato_id])[contrato_id]
+
+
+@event.listens_for(Session, 'before_flush')
+def versionar_aliquotas_do_flush(session, flush_context, instances):
+    """Incrementa a versão dos impostos dos contratos com impostos alterados no flush."""
+    alterados = set()
+    for target in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(target, ContratoImposto):
+            continue
+        if target in session.dirty and not session.is_modified(target, include_collections=False):
+            continue
+        for contrato_id in [target.contrato_id, *_valores_anteriores(target, 'contrato_id')]:
+            if contrato_id is not None:
+                alterados.add(contrato_id)
+    if not alterados:
+        return
+
+    from app.services.retencao_service import incrementar_versao_impostos
+    incrementar_versao_impostos(session.connection(), alterados)
+    session.info.setdefault(ALIQUOTAS_DA_TRANSACAO, set()).update(alterados)
+
 
-    return {imp.tipo_imposto: imp.aliquota for imp in impostos}
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def invalidar_aliquotas_da_transacao(session):
+    contrato_ids = session.info.pop(ALIQUOTAS_DA_TRANSACAO, None)
+    if contrato_ids:
+        from app.core.aliquotas import cache_aliquotas
+        cache_aliquotas.invalidar(contrato_ids)
 
 
 # ----------------------------------------------------------------------
 # 5. CÁLCULO AUTOMÁTICO DO VALOR LÍQUIDO DA NOTA FISCAL (RETENÇÕES)
 # ----------------------------------------------------------------------
+# As NFs novas e alteradas do flush são calculadas juntas no before_flush
+# (app/services/retencao_service.py): o rateio de um BM em N NFs faz uma
+# consulta de BMs e, no máximo, uma de alíquotas. O before_insert/update
+# cobre as NFs que não passaram pelo cálculo em lote (ex.: BM criado no
+# mesmo flush, ainda sem id).
+RETENCOES_CALCULADAS = "retencoes_calculadas"
+
+
+@event.listens_for(Session, 'before_flush')
+def calcular_retencoes_do_flush(session, flush_context, instances):
+    faturamentos = [
+        target for target in (*session.new, *session.dirty)
+        if isinstance(target, Faturamento)
+        and (target in session.new or session.is_modified(target, include_collections=False))
+    ]
+    if not faturamentos:
+        return
+    from app.services.retencao_service import calcular_retencoes_em_lote
+    calculados = calcular_retencoes_em_lote(session, faturamentos)
+    session.info[RETENCOES_CALCULADAS] = {id(target) for target in calculados}
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def descartar_retencoes_calculadas(session, flush_context):
+    session.info.pop(RETENCOES_CALCULADAS, None)
+
+
 @event.listens_for(Faturamento, 'before_insert')
 @event.listens_for(Faturamento, 'before_update')
 def calculate_nf_liquido(mapper, connection, target):
@@ -93,42 +211,12 @@ def calculate_nf_liquido(mapper, connection, target):
     if not target.bm_id:
         return  # não é possível calcular sem vínculo com BM
 
-    session = Session.object_session(target) or connection
-    bm = session.get(BoletimMedicao, target.bm_id)
-    if not bm:
-        return
+    session = Session.object_session(target)
+    if id(target) in session.info.get(RETENCOES_CALCULADAS, ()):
+        return  # já calculada no before_flush
 
-    aliquotas = obter_aliquotas_contrato(bm.contrato_id, session)
-
-    # Se não houver impostos configurados, sem retenções (zeros)
-    zero = Decimal('0')
-    if not aliquotas:
-        target.iss_retido    = zero
-        target.inss_retido   = zero
-        target.irrf_retido   = zero
-        target.csll_retido   = zero
-        target.pis_retido    = zero
-        target.cofins_retido = zero
-        target.valor_liquido_nf = target.valor_bruto_nf
-        return
-
-    # Cálculo das retenções (percentual sobre o valor bruto) - tudo Decimal
-    target.iss_retido    = target.valor_bruto_nf * (aliquotas.get('ISS',    zero) / Decimal('100'))
-    target.inss_retido   = target.valor_bruto_nf * (aliquotas.get('INSS',   zero) / Decimal('100'))
-    target.irrf_retido   = target.valor_bruto_nf * (aliquotas.get('IRRF',   zero) / Decimal('100'))
-    target.csll_retido   = target.valor_bruto_nf * (aliquotas.get('CSLL',   zero) / Decimal('100'))
-    target.pis_retido    = target.valor_bruto_nf * (aliquotas.get('PIS',    zero) / Decimal('100'))
-    target.cofins_retido = target.valor_bruto_nf * (aliquotas.get('COFINS', zero) / Decimal('100'))
-
-    total_retencoes = (
-        target.iss_retido
-        + target.inss_retido
-        + target.irrf_retido
-        + target.csll_retido
-        + target.pis_retido
-        + target.cofins_retido
-    )
-    target.valor_liquido_nf = target.valor_bruto_nf - total_retencoes
+    from app.services.retencao_service import calcular_retencoes_em_lote
+    calcular_retencoes_em_lote(session, [target])
 
 
 # ----------------------------------------------------------------------
@@ -203,4 +291,331 @@ def atualizar_contrato_apos_aditivo(mapper, connection, target):
         dias_totais = contrato.prazo_original_dias + soma_dias
         contrato.data_fim_prevista = contrato.data_inicio + timedelta(days=dias_totais)
         contrato.valor_total = contrato.valor_original + soma_valores
-        # Não precisa de session.add(contrato); ele já está na sessão.
\ No newline at end of file
+        # Não precisa de session.add(contrato); ele já está na sessão.
+
+
+# ----------------------------------------------------------------------
+# 9. RAZÃO FINANCEIRO POR CONTRATO (contrato_saldos e fatos_mensais)
+# ----------------------------------------------------------------------
+# Os listeners abaixo apenas anotam, em session.info, quais contratos tiveram
+# BMs, NFs ou pagamentos alterados. Ao final de cada flush, a linha de
+# contrato_saldos e as linhas mensais de fatos_mensais desses contratos
+# são recalculadas na mesma transação.
+CONTRATOS_ALTERADOS = "contratos_alterados"
+
+
+def marcar_contrato_alterado(session, contrato_id) -> None:
+    """Registra um contrato cujo razão financeiro deve ser recalculado no flush."""
+    if session is None or contrato_id is None:
+        return
+    session.info.setdefault(CONTRATOS_ALTERADOS, set()).add(contrato_id)
+    # Lançamentos financeiros também afetam alertas e cache (seção 10)
+    marcar_contrato_na_transacao(session, contrato_id)
+
+
+def _valores_anteriores(target, atributo: str) -> list:
+    """Valores anteriores de um atributo alterado no flush corrente (ex.: bm_id trocado)."""
+    return [v for v in inspect(target).attrs[atributo].history.deleted if v is not None]
+
+
+@event.listens_for(Contrato, 'after_insert')
+def marcar_contrato_novo(mapper, connection, target):
+    # Garante a linha (zerada) do contrato no razão desde a criação
+    marcar_contrato_alterado(Session.object_session(target), target.id)
+
+
+@event.listens_for(BoletimMedicao, 'after_insert')
+@event.listens_for(BoletimMedicao, 'after_update')
+@event.listens_for(BoletimMedicao, 'after_delete')
+def marcar_contrato_do_boletim(mapper, connection, target):
+    session = Session.object_session(target)
+    for contrato_id in [target.contrato_id, *_valores_anteriores(target, 'contrato_id')]:
+        marcar_contrato_alterado(session, contrato_id)
+
+
+@event.listens_for(Faturamento, 'after_insert')
+@event.listens_for(Faturamento, 'after_update')
+@event.listens_for(Faturamento, 'after_delete')
+def marcar_contrato_do_faturamento(mapper, connection, target):
+    bm_ids = [target.bm_id, *_valores_anteriores(target, 'bm_id')]
+    contrato_ids = connection.execute(
+        select(BoletimMedicao.contrato_id).where(BoletimMedicao.id.in_(bm_ids))
+    ).scalars().all()
+    session = Session.object_session(target)
+    for contrato_id in contrato_ids:
+        marcar_contrato_alterado(session, contrato_id)
+
+
+@event.listens_for(Pagamento, 'after_insert')
+@event.listens_for(Pagamento, 'after_update')
+@event.listens_for(Pagamento, 'after_delete')
+def marcar_contrato_do_pagamento(mapper, connection, target):
+    faturamento_ids = [target.faturamento_id, *_valores_anteriores(target, 'faturamento_id')]
+    contrato_ids = connection.execute(
+        select(BoletimMedicao.contrato_id)
+        .join(Faturamento, Faturamento.bm_id == BoletimMedicao.id)
+        .where(Faturamento.id.in_(faturamento_ids))
+    ).scalars().all()
+    session = Session.object_session(target)
+    for contrato_id in contrato_ids:
+        marcar_contrato_alterado(session, contrato_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def atualizar_saldos_apos_flush(session, flush_context):
+    """Recalcula contrato_saldos e fatos_mensais dos contratos alterados, na mesma transação."""
+    contrato_ids = session.info.pop(CONTRATOS_ALTERADOS, None)
+    if contrato_ids:
+        from app.services.saldo_service import atualizar_saldos
+        from app.services.fato_mensal_service import atualizar_fatos
+        connection = session.connection()
+        atualizar_saldos(connection, contrato_ids)
+        atualizar_fatos(connection, contrato_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def descartar_contratos_alterados(session):
+    session.info.pop(CONTRATOS_ALTERADOS, None)
+    session.info.pop(CONTRATOS_DA_TRANSACAO, None)
+    session.info.pop(USUARIOS_DA_TRANSACAO, None)
+    session.info.pop(AUDITORIA_DA_TRANSACAO, None)
+
+
+# ----------------------------------------------------------------------
+# 10. PÓS-COMMIT: REAVALIAÇÃO DE ALERTAS E INVALIDAÇÃO DO CACHE
+# ----------------------------------------------------------------------
+# Contratos afetados pela transação (o próprio contrato, aditivos, ARTs,
+# seguros, BMs, NFs e pagamentos) são acumulados em session.info. Após o
+# commit, a versão desses contratos no cache de cálculos é incrementada
+# (app/core/cache.py) e eles são enfileirados para o avaliador de alertas
+# em segundo plano (app/services/alerta_avaliador.py).
+CONTRATOS_DA_TRANSACAO = "contratos_da_transacao"
+
+
+def marcar_contrato_na_transacao(session, contrato_id) -> None:
+    if session is None or contrato_id is None:
+        return
+    session.info.setdefault(CONTRATOS_DA_TRANSACAO, set()).add(contrato_id)
+
+
+@event.listens_for(Contrato, 'after_update')
+@event.listens_for(Contrato, 'after_delete')
+def marcar_contrato_alterado_na_transacao(mapper, connection, target):
+    marcar_contrato_na_transacao(Session.object_session(target), target.id)
+
+
+@event.listens_for(Aditivo, 'after_insert')
+@event.listens_for(Aditivo, 'after_update')
+@event.listens_for(Aditivo, 'after_delete')
+@event.listens_for(ContratoArt, 'after_insert')
+@event.listens_for(ContratoArt, 'after_update')
+@event.listens_for(ContratoArt, 'after_delete')
+@event.listens_for(ContratoSeguro, 'after_insert')
+@event.listens_for(ContratoSeguro, 'after_update')
+@event.listens_for(ContratoSeguro, 'after_delete')
+def marcar_contrato_do_documento(mapper, connection, target):
+    session = Session.object_session(target)
+    for contrato_id in [target.contrato_id, *_valores_anteriores(target, 'contrato_id')]:
+        marcar_contrato_na_transacao(session, contrato_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def processar_contratos_da_transacao(session):
+    contrato_ids = session.info.pop(CONTRATOS_DA_TRANSACAO, None)
+    if contrato_ids:
+        from app.core.cache import cache_calculos
+        from app.services.alerta_avaliador import avaliador_alertas
+        cache_calculos.invalidar(contrato_ids)
+        avaliador_alertas.agendar(contrato_ids)
+
+
+# ----------------------------------------------------------------------
+# 11. PÓS-COMMIT: INVALIDAÇÃO DO CACHE DE PRINCIPAIS
+# ----------------------------------------------------------------------
+# Usuários alterados ou com contratos liberados/removidos na transação saem
+# do cache do usuário autenticado (app/core/principal.py) após o commit.
+USUARIOS_DA_TRANSACAO = "usuarios_da_transacao"
+
+
+@event.listens_for(Usuario, 'after_update')
+@event.listens_for(Usuario, 'after_delete')
+@event.listens_for(UsuarioContrato, 'after_insert')
+@event.listens_for(UsuarioContrato, 'after_update')
+@event.listens_for(UsuarioContrato, 'after_delete')
+def marcar_usuario_na_transacao(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    coluna = 'id' if isinstance(target, Usuario) else 'usuario_id'
+    usuarios = session.info.setdefault(USUARIOS_DA_TRANSACAO, set())
+    for usuario_id in [getattr(target, coluna), *_valores_anteriores(target, coluna)]:
+        if usuario_id is not None:
+            usuarios.add(usuario_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidar_principais_da_transacao(session):
+    usuario_ids = session.info.pop(USUARIOS_DA_TRANSACAO, None)
+    if usuario_ids:
+        from app.core.principal import cache_principais
+        cache_principais.invalidar(usuario_ids)
+
+
+# ----------------------------------------------------------------------
+# 12. AUDITORIA AUTOMÁTICA (tabela `logs`)
+# ----------------------------------------------------------------------
+# Ao final de cada flush, as entidades auditadas inseridas, alteradas ou
+# removidas geram o seu log, com os valores antigos e novos tirados do
+# histórico dos atributos (em UPDATE, apenas as colunas alteradas). Quem
+# alterou vem do contexto da requisição (app/core/auditoria.py); sem
+# contexto nada é registrado.
+#
+# Ações duráveis (DELETE, APPROVE, CANCEL) são gravadas no próprio flush,
+# na transação da alteração. As demais são enviadas ao gravador em lote
+# (app/services/auditoria_writer.py) após o commit e descartadas no
+# rollback; com o gravador parado, também são gravadas no flush.
+AUDITORIA_DA_TRANSACAO = "auditoria_da_transacao"
+
+ACOES_DURAVEIS = {"DELETE", "APPROVE", "CANCEL"}
+
+# Qualquer valor não nulo na transição
+QUALQUER = object()
+
+
+class EntidadeAuditada:
+    def __init__(self, nome: str, acao_insercao: str = "CREATE", transicoes=(), somente_transicoes: bool = False):
+        self.nome = nome
+        self.acao_insercao = acao_insercao
+        # (atributo, novo valor, ação): a alteração que leva o atributo ao
+        # valor é registrada com a ação específica em vez de UPDATE
+        self.transicoes = transicoes
+        # Sem transição reconhecida a alteração não é registrada
+        self.somente_transicoes = somente_transicoes
+
+
+ENTIDADES_AUDITADAS = {
+    Contrato: EntidadeAuditada("contratos"),
+    Empresa: EntidadeAuditada("empresas"),
+    BoletimMedicao: EntidadeAuditada("boletins", transicoes=(
+        ("status", "APROVADO", "APPROVE"),
+        ("status", "CANCELADO", "CANCEL"),
+    )),
+    Faturamento: EntidadeAuditada("faturamentos", transicoes=(
+        ("status", "CANCELADO", "CANCEL"),
+    )),
+    Pagamento: EntidadeAuditada("pagamentos"),
+    PrateleiraExecucao: EntidadeAuditada("prateleira", transicoes=(
+        ("status", "AGUARDANDO_MEDICAO", "STATUS_UPDATE"),
+        ("status", "CANCELADO", "CANCEL"),
+    )),
+    Arquivo: EntidadeAuditada("arquivos", acao_insercao="UPLOAD"),
+    # Alertas são mantidos pelo avaliador; só o reconhecimento é ação do usuário
+    Alerta: EntidadeAuditada("alertas", transicoes=(
+        ("reconhecido_em", QUALQUER, "ACKNOWLEDGE"),
+    ), somente_transicoes=True),
+}
+
+
+def _colunas(target) -> list:
+    return [atributo.key for atributo in inspect(target).mapper.column_attrs]
+
+
+def _snapshot(target) -> dict:
+    estado = inspect(target)
+    return {chave: estado.dict.get(chave) for chave in _colunas(target)}
+
+
+def _delta(target):
+    """(antigos, novos) apenas das colunas alteradas no flush."""
+    from app.services.log_service import CAMPOS_IGNORADOS_NO_DELTA
+
+    estado = inspect(target)
+    antigos, novos = {}, {}
+    for chave in _colunas(target):
+        if chave in CAMPOS_IGNORADOS_NO_DELTA:
+            continue
+        historico = estado.attrs[chave].history
+        if not historico.has_changes():
+            continue
+        antigos[chave] = historico.deleted[0] if historico.deleted else None
+        novos[chave] = historico.added[0] if historico.added else None
+    return antigos, novos
+
+
+def _acao_da_transicao(entidade: EntidadeAuditada, novos: dict):
+    for atributo, valor, acao in entidade.transicoes:
+        if atributo in novos and (novos[atributo] == valor or (valor is QUALQUER and novos[atributo] is not None)):
+            return acao
+    return None
+
+
+def _registros_do_flush(session, contexto) -> list:
+    from app.services.auditoria_writer import novo_registro
+
+    alteracoes = []
+    for target in session.new:
+        entidade = ENTIDADES_AUDITADAS.get(type(target))
+        if entidade and not entidade.somente_transicoes:
+            alteracoes.append((entidade, target, entidade.acao_insercao, None, _snapshot(target)))
+    for target in session.dirty:
+        entidade = ENTIDADES_AUDITADAS.get(type(target))
+        if not entidade or not session.is_modified(target, include_collections=False):
+            continue
+        antigos, novos = _delta(target)
+        if not novos:
+            continue
+        acao = _acao_da_transicao(entidade, novos)
+        if acao is None and entidade.somente_transicoes:
+            continue
+        alteracoes.append((entidade, target, acao or "UPDATE", antigos, novos))
+    for target in session.deleted:
+        entidade = ENTIDADES_AUDITADAS.get(type(target))
+        if entidade and not entidade.somente_transicoes:
+            alteracoes.append((entidade, target, "DELETE", _snapshot(target), None))
+
+    return [
+        novo_registro(
+            usuario_id=contexto.usuario_id,
+            usuario_email=contexto.usuario_email,
+            acao=acao,
+            entidade=entidade.nome,
+            entidade_id=inspect(target).mapper.primary_key_from_instance(target)[0],
+            dados_antigos=antigos,
+            dados_novos=novos,
+            ip=contexto.ip,
+            user_agent=contexto.user_agent,
+        )
+        for entidade, target, acao, antigos, novos in alteracoes
+    ]
+
+
+@event.listens_for(Session, 'after_flush')
+def auditar_flush(session, flush_context):
+    from app.core.auditoria import contexto_atual
+    from app.services.auditoria_writer import gravador_auditoria
+
+    contexto = contexto_atual()
+    if contexto is None:
+        return
+    registros = _registros_do_flush(session, contexto)
+    if not registros:
+        return
+
+    if gravador_auditoria.ativo:
+        imediatos = [r for r in registros if r["acao"] in ACOES_DURAVEIS]
+        session.info.setdefault(AUDITORIA_DA_TRANSACAO, []).extend(
+            r for r in registros if r["acao"] not in ACOES_DURAVEIS
+        )
+    else:
+        imediatos = registros
+    if imediatos:
+        session.connection().execute(insert(Log.__table__), imediatos)
+
+
+@event.listens_for(Session, 'after_commit')
+def enfileirar_auditoria_da_transacao(session):
+    registros = session.info.pop(AUDITORIA_DA_TRANSACAO, None)
+    if registros:
+        from app.services.auditoria_writer import gravador_auditoria
+        for registro in registros:
+            gravador_auditoria.enfileirar(registro)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, Date, DateTime, DECIMAL, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+class FatoMensal(Base):
+    """
+    Consolidado mensal (contrato × mês) de medições, faturamento e recebimentos.
+    Mantido na mesma transação pelos listeners de BM, NF e pagamento
+    (app/models/events.py), junto com contrato_saldos. Pode ser reconstruído
+    a partir das tabelas de origem com: python -m app.db.rebuild_fatos_mensais
+
+    Competência de cada valor:
+      - medido / aprovado: mês do fim do período do BM
+      - faturado / retido: mês de emissão da NF
+      - recebido: mês do pagamento
+    """
+    __tablename__ = "fatos_mensais"
+    __table_args__ = (
+        Index("idx_fatos_mensais_mes", "mes"),
+    )
+
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    mes = Column(Date, primary_key=True, comment="Primeiro dia do mês de competência")
+    valor_medido = Column(DECIMAL(15, 2), default=0, nullable=False,
+                          comment="Soma do valor medido dos BMs não cancelados")
+    valor_aprovado = Column(DECIMAL(15, 2), default=0, nullable=False,
+                            comment="Soma do valor aprovado dos BMs APROVADOS/FATURADOS")
+    qtd_boletins_aprovados = Column(Integer, default=0, nullable=False)
+    valor_faturado = Column(DECIMAL(15, 2), default=0, nullable=False,
+                            comment="Soma do valor bruto das NFs não canceladas")
+    valor_retido = Column(DECIMAL(15, 2), default=0, nullable=False,
+                          comment="Soma dos impostos retidos nas NFs não canceladas")
+    valor_recebido = Column(DECIMAL(15, 2), default=0, nullable=False,
+                            comment="Soma dos pagamentos de NFs não canceladas")
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relacionamento
+    contrato = relationship("Contrato")
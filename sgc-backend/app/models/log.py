@@ -1,18 +1,59 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, PrimaryKeyConstraint, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.db.base import Base
 
+# Partição que recebe registros fora das partições mensais (ver
+# app/services/log_retencao_service.py); normalmente vazia
+PARTICAO_PADRAO = "logs_padrao"
+
+
 class Log(Base):
+    """
+    Auditoria. Particionada por mês de created_at (UTC): logs_AAAA_MM,
+    criadas com antecedência e arquivadas após LOGS_RETENCAO_MESES pela
+    rotina app/db/arquivar_logs.py. A chave primária inclui created_at
+    (exigência do particionamento); para o ORM a identidade é o id.
+    """
     __tablename__ = "logs"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at", name="logs_pkey"),
+        # Paginação por cursor: (created_at, id) decrescente, com e sem filtros
+        Index("idx_logs_created_at_id", "created_at", "id"),
+        Index("idx_logs_usuario_created_at", "usuario_id", "created_at", "id"),
+        Index("idx_logs_entidade_created_at", "entidade", "created_at", "id"),
+        # Histórico de uma entidade (/logs/{entidade}/{entidade_id})
+        Index("idx_logs_entidade_id_created_at", "entidade", "entidade_id", "created_at", "id"),
+        # Busca por campo alterado (dados_novos ? 'valor_total')
+        Index("idx_logs_dados_novos_gin", "dados_novos", postgresql_using="gin"),
+        # Filhos excluídos de uma entidade (dados_antigos @> '{"contrato_id": 1}')
+        Index(
+            "idx_logs_dados_antigos_gin", "dados_antigos",
+            postgresql_using="gin", postgresql_ops={"dados_antigos": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, autoincrement=True, nullable=False)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
     usuario_email = Column(String(100), nullable=True)
     acao = Column(String(50), nullable=False)  # CREATE, UPDATE, DELETE, etc.
     entidade = Column(String(50), nullable=False)  # contratos, empresas, etc.
     entidade_id = Column(Integer, nullable=True)
-    dados_antigos = Column(JSON, nullable=True)
-    dados_novos = Column(JSON, nullable=True)
+    # Em UPDATE, apenas os campos alterados (LogService.registrar_log)
+    dados_antigos = Column(JSONB, nullable=True)
+    dados_novos = Column(JSONB, nullable=True)
     ip = Column(String(45), nullable=True)
     user_agent = Column(String(255), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Tabela criada pelo metadata (testes, ambientes novos): a partição padrão
+# garante que nenhum registro seja recusado antes da primeira rotina
+event.listen(
+    Log.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE IF NOT EXISTS {PARTICAO_PADRAO} PARTITION OF logs DEFAULT").execute_if(dialect="postgresql"),
+)
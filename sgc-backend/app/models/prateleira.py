@@ -16,7 +16,9 @@ class PrateleiraExecucao(Base):
     __tablename__ = "prateleira_execucoes"
     __table_args__ = (
         Index("idx_prateleira_contrato_status", "contrato_id", "status"),
-        Index("idx_prateleira_data_execucao", "data_execucao"),
+        # Paginação por cursor: (data_execucao, id) decrescente, global e por contrato
+        Index("idx_prateleira_data_execucao", "data_execucao", "id"),
+        Index("idx_prateleira_contrato_data_execucao", "contrato_id", "data_execucao", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
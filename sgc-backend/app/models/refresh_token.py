@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class RefreshToken(Base):
+    """
+    Refresh token de uma sessão de login (app/services/refresh_token_service.py).
+
+    Só o SHA-256 do token é armazenado. A cada uso o token é rotacionado: o
+    atual recebe `usado_em` e um novo é emitido na mesma `familia` (uma
+    família = um login). Reapresentar um token já usado indica vazamento e
+    revoga a família inteira.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("idx_refresh_tokens_familia", "familia"),
+        Index("idx_refresh_tokens_usuario_expira", "usuario_id", "expira_em"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    familia = Column(String(36), nullable=False)
+    usuario_id = Column(
+        Integer,
+        ForeignKey("usuarios.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expira_em = Column(DateTime(timezone=True), nullable=False)
+    usado_em = Column(DateTime(timezone=True), nullable=True)      # rotacionado
+    revogado_em = Column(DateTime(timezone=True), nullable=True)   # logout ou reuso detectado
+    ip = Column(String(45), nullable=True)
+    user_agent = Column(String(255), nullable=True)
@@ -0,0 +1,47 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from app.models.alerta import Alerta
+from app.models.contrato import Contrato
+from app.repositories.base import BaseRepository
+
+# Ordem de exibição: mais severos primeiro
+ORDEM_SEVERIDADE = {"critica": 0, "alta": 1, "media": 2, "baixa": 3}
+
+
+class AlertaRepository(BaseRepository[Alerta]):
+    def __init__(self, db: Session):
+        super().__init__(db, Alerta)
+
+    def _query_visiveis(self):
+        # Apenas alertas de contratos visíveis ao usuário (RLS em contratos)
+        return self.db.query(Alerta).filter(Alerta.contrato_id.in_(select(Contrato.id)))
+
+    def list(self, contrato_id: Optional[int] = None, severidades: Optional[List[str]] = None,
+             incluir_resolvidos: bool = False, incluir_reconhecidos: bool = True,
+             skip: int = 0, limit: int = 100) -> List[Alerta]:
+        query = self._query_visiveis()
+        if contrato_id:
+            query = query.filter(Alerta.contrato_id == contrato_id)
+        if severidades:
+            query = query.filter(Alerta.severidade.in_(severidades))
+        if not incluir_resolvidos:
+            query = query.filter(Alerta.resolvido_em.is_(None))
+        if not incluir_reconhecidos:
+            query = query.filter(Alerta.reconhecido_em.is_(None))
+        ordem = case(ORDEM_SEVERIDADE, value=Alerta.severidade, else_=len(ORDEM_SEVERIDADE))
+        return query.order_by(
+            ordem, Alerta.primeira_ocorrencia.desc(), Alerta.id.desc()
+        ).offset(skip).limit(limit).all()
+
+    def get_visivel(self, id: int) -> Optional[Alerta]:
+        return self._query_visiveis().filter(Alerta.id == id).first()
+
+    def list_abertos(self, contrato_ids: Optional[Iterable[int]] = None) -> List[Alerta]:
+        """Alertas não resolvidos (sem filtro de visibilidade — uso do avaliador)."""
+        query = self.db.query(Alerta).filter(Alerta.resolvido_em.is_(None))
+        if contrato_ids is not None:
+            query = query.filter(Alerta.contrato_id.in_(list(contrato_ids)))
+        return query.all()
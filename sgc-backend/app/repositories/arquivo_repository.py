@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from app.models.arquivo import Arquivo
 from app.repositories.base import BaseRepository
@@ -19,6 +20,24 @@ class ArquivoRepository(BaseRepository[Arquivo]):
             .all()
         )
 
+    def get_by_entidades(self, ids_por_tipo: Dict[str, Iterable[int]]) -> List[Arquivo]:
+        """
+        Arquivos de várias entidades em uma única consulta
+        (um termo `entidade_tipo = x AND entidade_id IN (...)` por tipo, via ix_arquivos_entidade).
+        """
+        condicoes = [
+            and_(Arquivo.entidade_tipo == tipo, Arquivo.entidade_id.in_(list(ids)))
+            for tipo, ids in ids_por_tipo.items() if ids
+        ]
+        if not condicoes:
+            return []
+        return (
+            self.db.query(Arquivo)
+            .filter(or_(*condicoes))
+            .order_by(Arquivo.created_at.asc(), Arquivo.id.asc())
+            .all()
+        )
+
     def list_all(self, entidade_tipo: Optional[str] = None, entidade_id: Optional[int] = None) -> List[Arquivo]:
         query = self.db.query(Arquivo)
         if entidade_tipo:
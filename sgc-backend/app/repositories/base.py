@@ -1,9 +1,126 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
-from sqlalchemy.orm import Session
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Generic, List, NamedTuple, Optional, Sequence, Type, TypeVar
+from sqlalchemy import Select, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from app.core.exceptions import BusinessError
 from app.db.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+
+# ----------------------------------------------------------------------
+# PAGINAÇÃO POR CURSOR (KEYSET)
+# ----------------------------------------------------------------------
+# O cursor é opaco para o cliente: base64 dos valores das colunas de
+# ordenação (mais o id, que desempata) do último item da página anterior.
+# A próxima página é buscada com WHERE (coluna, id) > (valor, id), o que usa
+# o índice composto da ordenação em vez de percorrer e descartar `skip` linhas.
+class CursorInvalido(BusinessError):
+    """Cursor malformado ou de outra listagem (respondido com 400 em main.py)."""
+
+
+class Pagina(NamedTuple):
+    itens: List[Any]
+    proximo_cursor: Optional[str]
+
+
+def _serializar(valor: Any) -> list:
+    if isinstance(valor, datetime):
+        return ["dt", valor.isoformat()]
+    if isinstance(valor, date):
+        return ["d", valor.isoformat()]
+    if isinstance(valor, Decimal):
+        return ["n", str(valor)]
+    return ["v", valor]
+
+
+def _desserializar(item: list) -> Any:
+    tipo, valor = item
+    if tipo == "dt":
+        return datetime.fromisoformat(valor)
+    if tipo == "d":
+        return date.fromisoformat(valor)
+    if tipo == "n":
+        return Decimal(valor)
+    return valor
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    dados = json.dumps([_serializar(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, quantidade: int) -> List[Any]:
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        itens = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        valores = [_desserializar(item) for item in itens]
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido("Cursor inválido") from e
+    if len(valores) != quantidade:
+        raise CursorInvalido("Cursor inválido para esta listagem")
+    return valores
+
+
+def _aplicar_pagina(consulta, colunas: Sequence[Any], descendente: bool, skip: int, limit: int,
+                    cursor: Optional[str]):
+    """Filtro do cursor, ordenação, offset e limite (Query ou select())."""
+    if cursor:
+        valores = decodificar_cursor(cursor, len(colunas))
+        chave = tuple_(*colunas)
+        ultimo = tuple_(*[literal(v, c.type) for v, c in zip(valores, colunas)])
+        consulta = consulta.filter(chave < ultimo if descendente else chave > ultimo)
+
+    consulta = consulta.order_by(*[c.desc() if descendente else c.asc() for c in colunas])
+    if skip and not cursor:
+        consulta = consulta.offset(skip)
+    return consulta.limit(limit)
+
+
+def _montar_pagina(itens: List[Any], colunas: Sequence[Any], limit: int) -> Pagina:
+    proximo = None
+    if itens and len(itens) == limit:
+        proximo = codificar_cursor([getattr(itens[-1], c.key) for c in colunas])
+    return Pagina(itens, proximo)
+
+
+def paginar(
+    query: Query,
+    colunas: Sequence[Any],
+    descendente: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Pagina:
+    """
+    Pagina `query` ordenando por `colunas` (a última deve ser o id, para
+    desempate; todas na mesma direção). Com `cursor`, continua após o último
+    item da página anterior e ignora `skip`; sem cursor, usa offset
+    (compatibilidade). Nos dois casos devolve o cursor da próxima página
+    quando a atual veio cheia.
+    """
+    itens = _aplicar_pagina(query, colunas, descendente, skip, limit, cursor).all()
+    return _montar_pagina(itens, colunas, limit)
+
+
+async def paginar_async(
+    db: AsyncSession,
+    stmt: Select,
+    colunas: Sequence[Any],
+    descendente: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Pagina:
+    """Como paginar, para um select() de entidades executado numa AsyncSession."""
+    resultado = await db.scalars(_aplicar_pagina(stmt, colunas, descendente, skip, limit, cursor))
+    return _montar_pagina(list(resultado.all()), colunas, limit)
+
+
 class BaseRepository(Generic[ModelType]):
     """Repositório base com operações CRUD genéricas."""
 
@@ -15,7 +132,11 @@ class BaseRepository(Generic[ModelType]):
         return self.db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        return self.db.query(self.model).offset(skip).limit(limit).all()
+        return self.db.query(self.model).order_by(self.model.id).offset(skip).limit(limit).all()
+
+    def get_pagina(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Pagina:
+        """Como get_multi (ordenado por id), com suporte a cursor."""
+        return paginar(self.db.query(self.model), [self.model.id], skip=skip, limit=limit, cursor=cursor)
 
     def create(self, **kwargs) -> ModelType:
         obj = self.model(**kwargs)
@@ -35,4 +156,31 @@ class BaseRepository(Generic[ModelType]):
         obj = self.db.query(self.model).filter(self.model.id == id).first()
         if obj:
             self.db.delete(obj)
-            self.db.flush()
\ No newline at end of file
+            self.db.flush()
+
+
+class AsyncBaseRepository(Generic[ModelType]):
+    """
+    Repositório base de leitura sobre AsyncSession (app.db.session.AsyncSessionLocal).
+    Convive com BaseRepository: os serviços migram para ele aos poucos, começando
+    pelos caminhos de leitura mais frequentes.
+    """
+
+    def __init__(self, db: AsyncSession, model: Type[ModelType]):
+        self.db = db
+        self.model = model
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        return await self.db.get(self.model, id)
+
+    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        resultado = await self.db.scalars(
+            select(self.model).order_by(self.model.id).offset(skip).limit(limit)
+        )
+        return list(resultado.all())
+
+    async def get_pagina(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Pagina:
+        """Como get_multi (ordenado por id), com suporte a cursor."""
+        return await paginar_async(
+            self.db, select(self.model), [self.model.id], skip=skip, limit=limit, cursor=cursor
+        )
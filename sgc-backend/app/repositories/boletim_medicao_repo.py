@@ -1,19 +1,23 @@
 from sqlalchemy.orm import Session
 from app.models.boletim_medicao import BoletimMedicao
-from app.repositories.base import BaseRepository
+from typing import Optional
+from app.repositories.base import BaseRepository, Pagina, paginar
 
 class BoletimMedicaoRepository(BaseRepository[BoletimMedicao]):
     def __init__(self, db: Session):
         super().__init__(db, BoletimMedicao)
 
-    def get_by_contrato(self, contrato_id: int, skip: int = 0, limit: int = 100) -> list[BoletimMedicao]:
-        return self.db.query(BoletimMedicao).filter(
-            BoletimMedicao.contrato_id == contrato_id
-        ).order_by(BoletimMedicao.numero_sequencial.asc()).offset(skip).limit(limit).all()
+    def get_by_contrato(self, contrato_id: int, skip: int = 0, limit: int = 100,
+                        cursor: Optional[str] = None) -> Pagina:
+        query = self.db.query(BoletimMedicao).filter(BoletimMedicao.contrato_id == contrato_id)
+        return paginar(
+            query, [BoletimMedicao.numero_sequencial, BoletimMedicao.id],
+            skip=skip, limit=limit, cursor=cursor,
+        )
 
-    def get_ultimo_sequencial(self, contrato_id: int) -> int:
-        """Retorna o maior número sequencial para um contrato (usado pelo listener)."""
-        result = self.db.query(BoletimMedicao.numero_sequencial).filter(
-            BoletimMedicao.contrato_id == contrato_id
-        ).order_by(BoletimMedicao.numero_sequencial.desc()).first()
-        return result[0] if result else 0
\ No newline at end of file
+    def get_by_status(self, status: Optional[str] = None, skip: int = 0, limit: int = 100,
+                      cursor: Optional[str] = None) -> Pagina:
+        query = self.db.query(BoletimMedicao)
+        if status:
+            query = query.filter(BoletimMedicao.status == status)
+        return paginar(query, [BoletimMedicao.id], skip=skip, limit=limit, cursor=cursor)
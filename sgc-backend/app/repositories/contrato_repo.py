@@ -1,10 +1,20 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.contrato import Contrato
-from app.repositories.base import BaseRepository
+from app.repositories.base import AsyncBaseRepository, BaseRepository
 
 class ContratoRepository(BaseRepository[Contrato]):
     def __init__(self, db: Session):
         super().__init__(db, Contrato)
 
     def get_by_numero(self, numero: str) -> Contrato | None:
-        return self.db.query(Contrato).filter(Contrato.numero_contrato == numero).first()
\ No newline at end of file
+        return self.db.query(Contrato).filter(Contrato.numero_contrato == numero).first()
+
+
+class AsyncContratoRepository(AsyncBaseRepository[Contrato]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Contrato)
+
+    async def get_by_numero(self, numero: str) -> Contrato | None:
+        return await self.db.scalar(select(Contrato).where(Contrato.numero_contrato == numero))
@@ -1,7 +1,9 @@
+from sqlalchemy import Row, and_, insert, or_, select
 from sqlalchemy.orm import Session
 from app.models.log import Log
-from typing import Optional, List
-from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from app.repositories.base import Pagina, paginar
+from datetime import date, timedelta
 
 class LogRepository:
     def __init__(self, db: Session):
@@ -11,21 +13,75 @@ class LogRepository:
         log = Log(**kwargs)
         self.db.add(log)
         self.db.commit()
-        self.db.refresh(log)
         return log
 
-    def list(self, usuario_id: Optional[int] = None, entidade: Optional[str] = None,
-             acao: Optional[str] = None, data_inicio: Optional[date] = None,
-             data_fim: Optional[date] = None, skip: int = 0, limit: int = 100) -> List[Log]:
-        query = self.db.query(Log)
+    def inserir_lote(self, registros: List[Dict[str, Any]]) -> None:
+        # INSERT de várias linhas, sem RETURNING; o commit fica com o chamador
+        if registros:
+            self.db.execute(insert(Log.__table__), registros)
+
+    @staticmethod
+    def _filtrar(consulta, usuario_id: Optional[int] = None, entidade: Optional[str] = None,
+                 entidade_id: Optional[int] = None, campo: Optional[str] = None,
+                 acao: Optional[str] = None, data_inicio: Optional[date] = None,
+                 data_fim: Optional[date] = None):
+        """Filtros da listagem e da exportação (Query ou select())."""
         if usuario_id:
-            query = query.filter(Log.usuario_id == usuario_id)
+            consulta = consulta.filter(Log.usuario_id == usuario_id)
         if entidade:
-            query = query.filter(Log.entidade == entidade)
+            consulta = consulta.filter(Log.entidade == entidade)
+        if entidade_id:
+            consulta = consulta.filter(Log.entidade_id == entidade_id)
+        if campo:
+            # Registros que gravaram o campo (CREATE ou UPDATE que o alterou);
+            # usa o índice GIN idx_logs_dados_novos_gin
+            consulta = consulta.filter(Log.dados_novos.has_key(campo))
         if acao:
-            query = query.filter(Log.acao == acao)
+            consulta = consulta.filter(Log.acao == acao)
+        # Período como intervalo semiaberto em created_at: o Postgres só lê
+        # as partições mensais do intervalo (data_fim inclusiva)
         if data_inicio:
-            query = query.filter(Log.created_at >= data_inicio)
+            consulta = consulta.filter(Log.created_at >= data_inicio)
         if data_fim:
-            query = query.filter(Log.created_at <= data_fim)
-        return query.order_by(Log.created_at.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+            consulta = consulta.filter(Log.created_at < data_fim + timedelta(days=1))
+        return consulta
+
+    def list(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, **filtros) -> Pagina:
+        query = self._filtrar(self.db.query(Log), **filtros)
+        return paginar(query, [Log.created_at, Log.id], descendente=True, skip=skip, limit=limit, cursor=cursor)
+
+    def historico(self, alvos: Dict[str, Set[int]], skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None) -> Pagina:
+        """
+        Logs das entidades em `alvos` ({entidade: ids}), do mais recente ao
+        mais antigo. Cada entidade é lida pelo índice
+        idx_logs_entidade_id_created_at.
+        """
+        condicao = or_(*[
+            and_(Log.entidade == entidade, Log.entidade_id.in_(sorted(ids)))
+            for entidade, ids in alvos.items()
+        ])
+        query = self.db.query(Log).filter(condicao)
+        return paginar(query, [Log.created_at, Log.id], descendente=True, skip=skip, limit=limit, cursor=cursor)
+
+    def ids_excluidos(self, entidade: str, chave_pai: str, ids_pais: Iterable[int]) -> Set[int]:
+        """
+        Ids de registros de `entidade` já excluídos cujo pai (coluna
+        `chave_pai` no snapshot do DELETE) está em `ids_pais`. Usa o índice
+        GIN idx_logs_dados_antigos_gin.
+        """
+        contidos = [Log.dados_antigos.contains({chave_pai: id_pai}) for id_pai in ids_pais]
+        if not contidos:
+            return set()
+        consulta = select(Log.entidade_id).where(
+            Log.entidade == entidade, Log.acao == "DELETE", or_(*contidos)
+        )
+        return {id_ for id_ in self.db.scalars(consulta) if id_ is not None}
+
+    def iterar_exportacao(self, lote: int = 1000, **filtros) -> Iterator[Row]:
+        """
+        Linhas (colunas, sem entidades ORM) em ordem cronológica, lidas de
+        um cursor no servidor `lote` por vez: memória constante.
+        """
+        consulta = self._filtrar(select(*Log.__table__.c), **filtros).order_by(Log.created_at, Log.id)
+        yield from self.db.execute(consulta, execution_options={"yield_per": lote})
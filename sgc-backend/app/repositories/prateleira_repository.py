@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from datetime import date, timedelta
 
-from app.repositories.base import BaseRepository
+from app.repositories.base import BaseRepository, Pagina, paginar
 from app.models.prateleira import PrateleiraExecucao, BoletimPrateleiraExecucao
 
 
@@ -16,15 +16,16 @@ class PrateleiraRepository(BaseRepository[PrateleiraExecucao]):
         contrato_id: int,
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[PrateleiraExecucao]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Pagina:
         """Lista itens da prateleira de um contrato, com filtro opcional de status."""
         query = self.db.query(PrateleiraExecucao).filter(
             PrateleiraExecucao.contrato_id == contrato_id
         )
         if status:
             query = query.filter(PrateleiraExecucao.status == status)
-        return query.order_by(PrateleiraExecucao.data_execucao.desc()).offset(skip).limit(limit).all()
+        return self._paginar_por_data(query, skip, limit, cursor)
 
     def get_pendentes_para_medicao(self, contrato_id: int) -> List[PrateleiraExecucao]:
         """
@@ -44,15 +45,23 @@ class PrateleiraRepository(BaseRepository[PrateleiraExecucao]):
         contrato_id: Optional[int] = None,
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[PrateleiraExecucao]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Pagina:
         """Lista global de execuções com filtros opcionais."""
         query = self.db.query(PrateleiraExecucao)
         if contrato_id:
             query = query.filter(PrateleiraExecucao.contrato_id == contrato_id)
         if status:
             query = query.filter(PrateleiraExecucao.status == status)
-        return query.order_by(PrateleiraExecucao.data_execucao.desc()).offset(skip).limit(limit).all()
+        return self._paginar_por_data(query, skip, limit, cursor)
+
+    def _paginar_por_data(self, query, skip: int, limit: int, cursor: Optional[str]) -> Pagina:
+        """Mais recentes primeiro: (data_execucao, id) decrescente."""
+        return paginar(
+            query, [PrateleiraExecucao.data_execucao, PrateleiraExecucao.id],
+            descendente=True, skip=skip, limit=limit, cursor=cursor,
+        )
 
     def get_antigas(self, dias: int = 30) -> List[PrateleiraExecucao]:
         """Retorna execuções PENDENTE ou AGUARDANDO_MEDICAO criadas há mais de X dias."""
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.refresh_token import RefreshToken
+from app.repositories.base import BaseRepository
+
+
+class RefreshTokenRepository(BaseRepository[RefreshToken]):
+    def __init__(self, db: Session):
+        super().__init__(db, RefreshToken)
+
+    def get_by_hash_para_atualizar(self, token_hash: str) -> Optional[RefreshToken]:
+        """Token pelo hash, com lock da linha (rotações concorrentes do mesmo token)."""
+        return (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == token_hash)
+            .with_for_update()
+            .first()
+        )
+
+    def revogar_familia(self, familia: str, quando: datetime) -> int:
+        return (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.familia == familia, RefreshToken.revogado_em.is_(None))
+            .update({RefreshToken.revogado_em: quando}, synchronize_session=False)
+        )
+
+    def remover_expirados_do_usuario(self, usuario_id: int, quando: datetime) -> int:
+        return (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.usuario_id == usuario_id, RefreshToken.expira_em < quando)
+            .delete(synchronize_session=False)
+        )
@@ -1,7 +1,11 @@
 # app/repositories/usuario_repo.py
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.usuario import Usuario
+from app.models.usuario_contrato import UsuarioContrato
+from app.repositories.base import AsyncBaseRepository
 
 class UsuarioRepository:
     def __init__(self, db: Session):
@@ -23,4 +27,22 @@ class UsuarioRepository:
         self.db.refresh(usuario)
         return usuario
 
-    # Futuramente podemos adicionar update, delete, list, etc.
\ No newline at end of file
+    # Futuramente podemos adicionar update, delete, list, etc.
+
+
+class AsyncUsuarioRepository(AsyncBaseRepository[Usuario]):
+    """Leituras de usuário na sessão assíncrona (autenticação de cada requisição)."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Usuario)
+
+    async def get_by_email(self, email: str) -> Usuario | None:
+        """Retorna um usuário pelo e-mail."""
+        return await self.db.scalar(select(Usuario).where(Usuario.email == email))
+
+    async def get_contrato_ids(self, usuario_id: int) -> list[int]:
+        """Contratos que o usuário pode visualizar (usuario_contratos)."""
+        resultado = await self.db.scalars(
+            select(UsuarioContrato.contrato_id).where(UsuarioContrato.usuario_id == usuario_id)
+        )
+        return list(resultado.all())
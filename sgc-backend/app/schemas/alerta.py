@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class AlertaResponse(BaseModel):
+    id: int
+    chave: str
+    tipo: str
+    titulo: str
+    mensagem: str
+    severidade: str
+    contrato_id: int
+    boletim_id: Optional[int] = None
+    faturamento_id: Optional[int] = None
+    seguro_id: Optional[int] = None
+    primeira_ocorrencia: datetime
+    ultima_avaliacao: datetime
+    resolvido_em: Optional[datetime] = None
+    reconhecido_em: Optional[datetime] = None
+    reconhecido_por_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
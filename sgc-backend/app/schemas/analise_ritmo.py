@@ -13,4 +13,9 @@ class AnaliseRitmoResponse(BaseModel):
     desvio_valor: float
     desvio_percentual: Optional[float]
     ritmo_necessario_para_recuperar: Optional[float]
-    status: str  # "ADIANTADO", "ATRASADO", "NO_PRAZO"
\ No newline at end of file
+    status: str  # "ADIANTADO", "ATRASADO", "NO_PRAZO"
+
+class AnaliseRitmoContratoResponse(AnaliseRitmoResponse):
+    """Item da análise de ritmo da carteira (/contratos/analise-ritmo)."""
+    contrato_id: int
+    numero_contrato: str
@@ -27,4 +27,48 @@ class ProjecaoFinanceiraResponse(BaseModel):
     """Projeção de faturamento para os próximos 90 dias (R$)."""
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class FaixaProjecao(BaseModel):
+    """Percentis de um valor projetado (R$) entre os cenários simulados."""
+    p10: float
+    p50: float
+    p90: float
+
+
+class SimulacaoProjecaoResponse(BaseModel):
+    """
+    Schema de resposta da projeção por simulação Monte Carlo
+    (contrato específico ou carteira de contratos ativos).
+    """
+    cenarios: int
+    """Quantidade de cenários simulados."""
+
+    contratos_simulados: int
+    """Contratos com saldo a executar e histórico de medições para sorteio."""
+
+    contratos_sem_historico: int
+    """Contratos com saldo, mas sem medições na janela histórica (fora da simulação)."""
+
+    saldo_a_executar: float
+    """Soma dos saldos a executar (R$)."""
+
+    previsao_termino_p50: Optional[str] = None
+    """Data de término (dd/mm/aaaa) atingida em 50% dos cenários."""
+
+    previsao_termino_p80: Optional[str] = None
+    """Data de término (dd/mm/aaaa) atingida em 80% dos cenários."""
+
+    previsao_termino_p95: Optional[str] = None
+    """Data de término (dd/mm/aaaa) atingida em 95% dos cenários.
+       Nulo quando o término fica além do horizonte simulado (10 anos)."""
+
+    faturamento_30d: FaixaProjecao
+    """Faixa de execução/faturamento acumulado nos próximos 30 dias (R$)."""
+
+    faturamento_60d: FaixaProjecao
+    """Faixa de execução/faturamento acumulado nos próximos 60 dias (R$)."""
+
+    faturamento_90d: FaixaProjecao
+    """Faixa de execução/faturamento acumulado nos próximos 90 dias (R$)."""
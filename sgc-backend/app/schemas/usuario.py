@@ -44,5 +44,11 @@ class UsuarioInDB(UsuarioBase):
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    # Renovação do access token sem senha (POST /auth/refresh)
+    refresh_token: Optional[str] = None
     # Opcional: incluir dados do usuário para facilitar no frontend
-    usuario: Optional[UsuarioInDB] = None
\ No newline at end of file
+    usuario: Optional[UsuarioInDB] = None
+
+# Schema para /auth/refresh e /auth/logout
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
@@ -0,0 +1,139 @@
+# app/services/alerta_avaliador.py
+"""
+Avaliador de alertas em segundo plano.
+
+Mantém a tabela `alertas` atualizada sem executar as regras a cada requisição:
+  - após cada commit que alterou contratos, ARTs, seguros, BMs, NFs ou
+    pagamentos, os contratos afetados são enfileirados (events.py, seção 10)
+    e reavaliados aqui, em lote;
+  - uma vez por dia (e na inicialização) a carteira inteira é reavaliada,
+    o que cobre as regras que dependem apenas da data (vencimentos).
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import date
+from typing import Callable, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AvaliadorAlertas:
+    def __init__(self, session_factory: Callable[[], Session],
+                 intervalo_segundos: float = 2.0, espera_apos_falha: float = 60.0):
+        self._session_factory = session_factory
+        self._intervalo = intervalo_segundos
+        self._espera_apos_falha = espera_apos_falha
+        self._fila: "queue.Queue[Optional[Set[int]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._ultima_varredura: Optional[date] = None
+        # time.monotonic() antes do qual não se tenta avaliar (após uma falha)
+        self._retomar_em = 0.0
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> None:
+        if self.ativo:
+            return
+        self._thread = threading.Thread(target=self._executar, name="avaliador-alertas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 10.0) -> None:
+        if not self.ativo:
+            return
+        self._fila.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def agendar(self, contrato_ids: Iterable[int]) -> None:
+        """Enfileira contratos para reavaliação (ignorado se o avaliador não estiver rodando)."""
+        contrato_ids = set(contrato_ids)
+        if contrato_ids and self.ativo:
+            self._fila.put(contrato_ids)
+
+    # ------------------------------------------------------------------
+    def _executar(self) -> None:
+        pendentes: Set[int] = set()
+        while True:
+            espera_falha = self._retomar_em - time.monotonic()
+            if espera_falha > 0:
+                espera = espera_falha
+            elif self._ultima_varredura != date.today():
+                # Sem varredura no dia corrente: não espera por eventos
+                espera = 0
+            else:
+                espera = 60
+            try:
+                chegou = self._fila.get(timeout=espera) if espera else self._fila.get_nowait()
+            except queue.Empty:
+                chegou = set()
+            if chegou is None:
+                return
+            pendentes |= chegou
+
+            # Agrupa o que chegou na janela de intervalo em uma única avaliação
+            encerrar = False
+            if chegou:
+                time.sleep(self._intervalo)
+            while True:
+                try:
+                    mais = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if mais is None:
+                    encerrar = True
+                    break
+                pendentes |= mais
+
+            if not encerrar and time.monotonic() >= self._retomar_em:
+                try:
+                    if self._ultima_varredura != date.today():
+                        self._avaliar(None)
+                        self._ultima_varredura = date.today()
+                    elif pendentes:
+                        self._avaliar(pendentes)
+                    pendentes = set()
+                except Exception:
+                    logger.exception(
+                        "Erro ao avaliar alertas; nova tentativa em %.0f s", self._espera_apos_falha
+                    )
+                    self._retomar_em = time.monotonic() + self._espera_apos_falha
+
+            if encerrar:
+                return
+
+    def _avaliar(self, contrato_ids: Optional[Set[int]]) -> None:
+        from app.services.alerta_service import AlertaService
+
+        db = self._session_factory()
+        try:
+            abertos, resolvidos = AlertaService(db).sincronizar_alertas(contrato_ids)
+            db.commit()
+            logger.info(
+                "Alertas avaliados (%s): %d aberto(s), %d resolvido(s)",
+                "carteira" if contrato_ids is None else f"{len(contrato_ids)} contrato(s)",
+                abertos, resolvidos,
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def _criar_sessao() -> Session:
+    # Pool "batch": a reavaliação não disputa conexões com as requisições
+    from app.db.session import BatchSessionLocal
+    return BatchSessionLocal()
+
+
+avaliador_alertas = AvaliadorAlertas(
+    _criar_sessao, settings.ALERTAS_INTERVALO_SEGUNDOS, settings.ALERTAS_ESPERA_APOS_FALHA_SEGUNDOS
+)
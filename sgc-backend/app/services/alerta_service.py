@@ -1,176 +1,310 @@
 # app/services/alerta_service.py
-from datetime import date, timedelta
+"""
+Alertas de contratos.
+
+Cada tipo de alerta é uma regra registrada com @regra_alerta: uma função
+(db, contrato_ids, hoje) que faz UMA consulta para toda a carteira (ou para
+o subconjunto `contrato_ids`, quando informado) e devolve os alertas no
+formato de dicionário consumido pelo frontend. Para criar um novo alerta
+basta registrar uma nova regra neste módulo.
+
+Os alertas são persistidos na tabela `alertas` por `sincronizar_alertas`,
+chamado pelo avaliador em segundo plano (app/services/alerta_avaliador.py).
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+
+from app.models.alerta import Alerta
 from app.models.contrato import Contrato
 from app.models.contrato_art import ContratoArt
 from app.models.contrato_seguro import ContratoSeguro
 from app.models.boletim_medicao import BoletimMedicao
 from app.models.faturamento import Faturamento
+from app.repositories.alerta_repository import AlertaRepository
+
+# Campos que identificam a entidade de origem do alerta (compõem a chave)
+CAMPOS_ORIGEM = ('boletim_id', 'faturamento_id', 'seguro_id')
+
+RegraAlerta = Callable[[Session, Optional[List[int]], date], Iterable[Dict[str, Any]]]
+
+# Regras na ordem de registro (define a ordem dos alertas de um mesmo contrato)
+REGRAS: List[RegraAlerta] = []
+
+
+def regra_alerta(regra: RegraAlerta) -> RegraAlerta:
+    """Registra uma regra de alerta."""
+    REGRAS.append(regra)
+    return regra
+
+
+def _filtrar(stmt, coluna, contrato_ids: Optional[List[int]]):
+    if contrato_ids is not None:
+        stmt = stmt.where(coluna.in_(contrato_ids))
+    return stmt
+
+
+# ----------------------------------------------------------------------
+# CONTRATO
+# ----------------------------------------------------------------------
+@regra_alerta
+def alertas_art_pendente(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = select(Contrato.id, Contrato.numero_contrato).where(
+        ~exists().where(ContratoArt.contrato_id == Contrato.id)
+    ).order_by(Contrato.id)
+    for contrato_id, numero_contrato in db.execute(_filtrar(stmt, Contrato.id, contrato_ids)):
+        yield {
+            'tipo': 'ART_PENDENTE',
+            'titulo': 'ART não cadastrada',
+            'mensagem': f'O contrato {numero_contrato} não possui ART cadastrada.',
+            'severidade': 'alta',
+            'contrato_id': contrato_id
+        }
+
+
+@regra_alerta
+def alertas_os_pendente(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = select(Contrato.id, Contrato.numero_contrato).where(
+        or_(Contrato.numero_os.is_(None), Contrato.numero_os == '', Contrato.data_os.is_(None))
+    ).order_by(Contrato.id)
+    for contrato_id, numero_contrato in db.execute(_filtrar(stmt, Contrato.id, contrato_ids)):
+        yield {
+            'tipo': 'OS_PENDENTE',
+            'titulo': 'Ordem de Serviço pendente',
+            'mensagem': f'O contrato {numero_contrato} não possui OS cadastrada.',
+            'severidade': 'media',
+            'contrato_id': contrato_id
+        }
+
+
+@regra_alerta
+def alertas_seguro_a_vencer(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    trinta_dias = hoje + timedelta(days=30)
+    stmt = select(ContratoSeguro).where(
+        ContratoSeguro.data_vencimento >= hoje,
+        ContratoSeguro.data_vencimento <= trinta_dias
+    ).order_by(ContratoSeguro.contrato_id, ContratoSeguro.id)
+    for s in db.scalars(_filtrar(stmt, ContratoSeguro.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'SEGURO_VENCER',
+            'titulo': 'Seguro próximo do vencimento',
+            'mensagem': f'Seguro {s.tipo} vence em {s.data_vencimento.strftime("%d/%m/%Y")}.',
+            'severidade': 'media',
+            'contrato_id': s.contrato_id,
+            'seguro_id': s.id
+        }
+
+
+@regra_alerta
+def alertas_seguro_vencido(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = select(ContratoSeguro).where(
+        ContratoSeguro.data_vencimento < hoje
+    ).order_by(ContratoSeguro.contrato_id, ContratoSeguro.id)
+    for s in db.scalars(_filtrar(stmt, ContratoSeguro.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'SEGURO_VENCIDO',
+            'titulo': 'Seguro vencido',
+            'mensagem': f'Seguro {s.tipo} venceu em {s.data_vencimento.strftime("%d/%m/%Y")}.',
+            'severidade': 'critica',
+            'contrato_id': s.contrato_id,
+            'seguro_id': s.id
+        }
+
+
+# ----------------------------------------------------------------------
+# BOLETINS
+# ----------------------------------------------------------------------
+@regra_alerta
+def alertas_boletim_rascunho(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    # Boletins em rascunho (aguardando aprovação)
+    stmt = select(BoletimMedicao).where(
+        BoletimMedicao.status == 'RASCUNHO'
+    ).order_by(BoletimMedicao.contrato_id, BoletimMedicao.id)
+    for b in db.scalars(_filtrar(stmt, BoletimMedicao.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'BOLETIM_RASCUNHO',
+            'titulo': 'Boletim aguardando aprovação',
+            'mensagem': f'Boletim BM-{b.numero_sequencial} do período {b.periodo_inicio} a {b.periodo_fim} está em rascunho.',
+            'severidade': 'media',
+            'contrato_id': b.contrato_id,
+            'boletim_id': b.id
+        }
+
+
+@regra_alerta
+def alertas_boletim_aprovado_sem_nf(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = select(BoletimMedicao).where(
+        BoletimMedicao.status == 'APROVADO',
+        ~exists().where(Faturamento.bm_id == BoletimMedicao.id)
+    ).order_by(BoletimMedicao.contrato_id, BoletimMedicao.id)
+    for b in db.scalars(_filtrar(stmt, BoletimMedicao.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'BOLETIM_APROVADO_SEM_NF',
+            'titulo': 'Boletim aprovado sem nota fiscal',
+            'mensagem': f'Boletim BM-{b.numero_sequencial} aprovado mas não faturado.',
+            'severidade': 'alta',
+            'contrato_id': b.contrato_id,
+            'boletim_id': b.id
+        }
+
+
+# ----------------------------------------------------------------------
+# FATURAMENTOS
+# ----------------------------------------------------------------------
+def _notas_fiscais(*condicoes):
+    """SELECT (nf, contrato_id) das notas que atendem às condições."""
+    return select(Faturamento, BoletimMedicao.contrato_id).join(
+        BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
+    ).where(*condicoes).order_by(BoletimMedicao.contrato_id, Faturamento.id)
+
+
+@regra_alerta
+def alertas_nf_a_vencer(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    # Notas a vencer (próximos 5 dias)
+    cinco_dias = hoje + timedelta(days=5)
+    stmt = _notas_fiscais(
+        Faturamento.status == 'PENDENTE',
+        Faturamento.data_vencimento <= cinco_dias,
+        Faturamento.data_vencimento >= hoje
+    )
+    for nf, contrato_id in db.execute(_filtrar(stmt, BoletimMedicao.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'NF_A_VENCER',
+            'titulo': 'Nota fiscal próxima do vencimento',
+            'mensagem': f'NF {nf.numero_nf} vence em {nf.data_vencimento.strftime("%d/%m/%Y")}.',
+            'severidade': 'media',
+            'contrato_id': contrato_id,
+            'faturamento_id': nf.id
+        }
+
+
+@regra_alerta
+def alertas_nf_vencida(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = _notas_fiscais(
+        Faturamento.status == 'PENDENTE',
+        Faturamento.data_vencimento < hoje
+    )
+    for nf, contrato_id in db.execute(_filtrar(stmt, BoletimMedicao.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'NF_VENCIDA',
+            'titulo': 'Nota fiscal vencida',
+            'mensagem': f'NF {nf.numero_nf} venceu em {nf.data_vencimento.strftime("%d/%m/%Y")}.',
+            'severidade': 'critica',
+            'contrato_id': contrato_id,
+            'faturamento_id': nf.id
+        }
+
+
+@regra_alerta
+def alertas_nf_cancelada(db: Session, contrato_ids: Optional[List[int]], hoje: date):
+    stmt = _notas_fiscais(Faturamento.status == 'CANCELADO')
+    for nf, contrato_id in db.execute(_filtrar(stmt, BoletimMedicao.contrato_id, contrato_ids)):
+        yield {
+            'tipo': 'NF_CANCELADA',
+            'titulo': 'Nota fiscal cancelada',
+            'mensagem': f'NF {nf.numero_nf} foi cancelada.',
+            'severidade': 'alta',
+            'contrato_id': contrato_id,
+            'faturamento_id': nf.id
+        }
+
 
 class AlertaService:
     def __init__(self, db: Session):
         self.db = db
 
-    def gerar_alertas(self, contrato_id=None):
-        alertas = []
-        query_contratos = self.db.query(Contrato)
+    def gerar_alertas(self, contrato_id: Optional[int] = None,
+                      contrato_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Executa todas as regras registradas, uma consulta por regra.
+        Sem filtros, avalia a carteira inteira. Os alertas saem agrupados
+        por contrato, na ordem de registro das regras.
+        """
         if contrato_id:
-            query_contratos = query_contratos.filter(Contrato.id == contrato_id)
-        contratos = query_contratos.all()
+            contrato_ids = [contrato_id]
+        elif contrato_ids is not None:
+            contrato_ids = list(contrato_ids)
+            if not contrato_ids:
+                return []
 
-        for c in contratos:
-            alertas.extend(self._alertas_contrato(c))
-            alertas.extend(self._alertas_boletins(c))
-            alertas.extend(self._alertas_faturamentos(c))
+        hoje = date.today()
+        alertas: List[Dict[str, Any]] = []
+        for regra in REGRAS:
+            alertas.extend(regra(self.db, contrato_ids, hoje))
 
+        # sort estável: mantém a ordem das regras dentro de cada contrato
+        alertas.sort(key=lambda a: a['contrato_id'])
         return alertas
 
-    def _alertas_contrato(self, contrato):
-        alertas = []
-        # ART pendente
-        arts = self.db.query(ContratoArt).filter(ContratoArt.contrato_id == contrato.id).count()
-        if arts == 0:
-            alertas.append({
-                'tipo': 'ART_PENDENTE',
-                'titulo': 'ART não cadastrada',
-                'mensagem': f'O contrato {contrato.numero_contrato} não possui ART cadastrada.',
-                'severidade': 'alta',
-                'contrato_id': contrato.id
-            })
-
-        # OS pendente
-        if not contrato.numero_os or not contrato.data_os:
-            alertas.append({
-                'tipo': 'OS_PENDENTE',
-                'titulo': 'Ordem de Serviço pendente',
-                'mensagem': f'O contrato {contrato.numero_contrato} não possui OS cadastrada.',
-                'severidade': 'media',
-                'contrato_id': contrato.id
-            })
-
-        # Seguros a vencer
-        hoje = date.today()
-        trinta_dias = hoje + timedelta(days=30)
-        seguros = self.db.query(ContratoSeguro).filter(
-            ContratoSeguro.contrato_id == contrato.id,
-            ContratoSeguro.data_vencimento >= hoje,
-            ContratoSeguro.data_vencimento <= trinta_dias
-        ).all()
-        for s in seguros:
-            alertas.append({
-                'tipo': 'SEGURO_VENCER',
-                'titulo': 'Seguro próximo do vencimento',
-                'mensagem': f'Seguro {s.tipo} vence em {s.data_vencimento.strftime("%d/%m/%Y")}.',
-                'severidade': 'media',
-                'contrato_id': contrato.id
-            })
-
-        # Seguros vencidos
-        seguros_vencidos = self.db.query(ContratoSeguro).filter(
-            ContratoSeguro.contrato_id == contrato.id,
-            ContratoSeguro.data_vencimento < hoje
-        ).all()
-        for s in seguros_vencidos:
-            alertas.append({
-                'tipo': 'SEGURO_VENCIDO',
-                'titulo': 'Seguro vencido',
-                'mensagem': f'Seguro {s.tipo} venceu em {s.data_vencimento.strftime("%d/%m/%Y")}.',
-                'severidade': 'critica',
-                'contrato_id': contrato.id
-            })
-        return alertas
 
-    def _alertas_boletins(self, contrato):
-        alertas = []
-        # Boletins em rascunho (aguardando aprovação)
-        rascunhos = self.db.query(BoletimMedicao).filter(
-            BoletimMedicao.contrato_id == contrato.id,
-            BoletimMedicao.status == 'RASCUNHO'
-        ).all()
-        for b in rascunhos:
-            alertas.append({
-                'tipo': 'BOLETIM_RASCUNHO',
-                'titulo': 'Boletim aguardando aprovação',
-                'mensagem': f'Boletim BM-{b.numero_sequencial} do período {b.periodo_inicio} a {b.periodo_fim} está em rascunho.',
-                'severidade': 'media',
-                'contrato_id': contrato.id,
-                'boletim_id': b.id
-            })
-
-        # Boletins aprovados sem NF
-        aprovados_sem_nf = self.db.query(BoletimMedicao).outerjoin(
-            Faturamento, Faturamento.bm_id == BoletimMedicao.id
-        ).filter(
-            BoletimMedicao.contrato_id == contrato.id,
-            BoletimMedicao.status == 'APROVADO',
-            Faturamento.id == None
-        ).all()
-        for b in aprovados_sem_nf:
-            alertas.append({
-                'tipo': 'BOLETIM_APROVADO_SEM_NF',
-                'titulo': 'Boletim aprovado sem nota fiscal',
-                'mensagem': f'Boletim BM-{b.numero_sequencial} aprovado mas não faturado.',
-                'severidade': 'alta',
-                'contrato_id': contrato.id,
-                'boletim_id': b.id
-            })
-        return alertas
+    # ------------------------------------------------------------------
+    # PERSISTÊNCIA
+    # ------------------------------------------------------------------
+    def sincronizar_alertas(self, contrato_ids: Optional[Iterable[int]] = None) -> Tuple[int, int]:
+        """
+        Reavalia as regras (carteira inteira ou apenas `contrato_ids`) e
+        sincroniza a tabela `alertas`: abre os alertas novos, atualiza os
+        que continuam ocorrendo e resolve os que deixaram de ocorrer.
+        Não faz commit. Retorna (abertos, resolvidos).
+        """
+        if contrato_ids is not None:
+            contrato_ids = sorted(set(contrato_ids))
+            if not contrato_ids:
+                return 0, 0
 
-    def _alertas_faturamentos(self, contrato):
-        alertas = []
-        hoje = date.today()
-        # Notas a vencer (próximos 5 dias)
-        cinco_dias = hoje + timedelta(days=5)
-        nfs_avencer = self.db.query(Faturamento).join(
-            BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
-        ).filter(
-            BoletimMedicao.contrato_id == contrato.id,
-            Faturamento.status == 'PENDENTE',
-            Faturamento.data_vencimento <= cinco_dias,
-            Faturamento.data_vencimento >= hoje
-        ).all()
-        for nf in nfs_avencer:
-            alertas.append({
-                'tipo': 'NF_A_VENCER',
-                'titulo': 'Nota fiscal próxima do vencimento',
-                'mensagem': f'NF {nf.numero_nf} vence em {nf.data_vencimento.strftime("%d/%m/%Y")}.',
-                'severidade': 'media',
-                'contrato_id': contrato.id,
-                'faturamento_id': nf.id
-            })
-
-        # Notas vencidas
-        nfs_vencidas = self.db.query(Faturamento).join(
-            BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
-        ).filter(
-            BoletimMedicao.contrato_id == contrato.id,
-            Faturamento.status == 'PENDENTE',
-            Faturamento.data_vencimento < hoje
-        ).all()
-        for nf in nfs_vencidas:
-            alertas.append({
-                'tipo': 'NF_VENCIDA',
-                'titulo': 'Nota fiscal vencida',
-                'mensagem': f'NF {nf.numero_nf} venceu em {nf.data_vencimento.strftime("%d/%m/%Y")}.',
-                'severidade': 'critica',
-                'contrato_id': contrato.id,
-                'faturamento_id': nf.id
-            })
-
-        # Notas canceladas (opcional)
-        nfs_canceladas = self.db.query(Faturamento).join(
-            BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
-        ).filter(
-            BoletimMedicao.contrato_id == contrato.id,
-            Faturamento.status == 'CANCELADO'
-        ).all()
-        for nf in nfs_canceladas:
-            alertas.append({
-                'tipo': 'NF_CANCELADA',
-                'titulo': 'Nota fiscal cancelada',
-                'mensagem': f'NF {nf.numero_nf} foi cancelada.',
-                'severidade': 'alta',
-                'contrato_id': contrato.id,
-                'faturamento_id': nf.id
-            })
-        return alertas
\ No newline at end of file
+        agora = datetime.now(timezone.utc)
+        atuais = {chave_alerta(a): a for a in self.gerar_alertas(contrato_ids=contrato_ids)}
+
+        resolvidos = 0
+        for alerta in AlertaRepository(self.db).list_abertos(contrato_ids):
+            dados = atuais.pop(alerta.chave, None)
+            if dados is None:
+                alerta.resolvido_em = agora
+                resolvidos += 1
+                continue
+            alerta.titulo = dados['titulo']
+            alerta.mensagem = dados['mensagem']
+            alerta.severidade = dados['severidade']
+            alerta.ultima_avaliacao = agora
+
+        self.db.flush()
+        abertos = 0
+        if atuais:
+            # Cada worker roda o seu avaliador: se outro já abriu o mesmo
+            # alerta, o índice parcial uq_alertas_chave_aberto descarta a linha
+            novos = [
+                {
+                    'chave': chave,
+                    'primeira_ocorrencia': agora,
+                    'ultima_avaliacao': agora,
+                    **{campo: dados.get(campo) for campo in (
+                        'tipo', 'titulo', 'mensagem', 'severidade', 'contrato_id', *CAMPOS_ORIGEM
+                    )},
+                }
+                for chave, dados in atuais.items()
+            ]
+            stmt = (
+                pg_insert(Alerta)
+                .values(novos)
+                .on_conflict_do_nothing(index_elements=['chave'], index_where=text("resolvido_em IS NULL"))
+                .returning(Alerta.id)
+            )
+            abertos = len(self.db.execute(stmt).all())
+        return abertos, resolvidos
+
+    def reconhecer_alerta(self, alerta: Alerta, usuario_id: int) -> Alerta:
+        alerta.reconhecido_em = datetime.now(timezone.utc)
+        alerta.reconhecido_por_id = usuario_id
+        self.db.commit()
+        self.db.refresh(alerta)
+        return alerta
+
+
+def chave_alerta(alerta: Dict[str, Any]) -> str:
+    """Identidade estável do alerta: TIPO:contrato[:campo=id da entidade de origem]."""
+    partes = [alerta['tipo'], str(alerta['contrato_id'])]
+    partes.extend(f"{campo}={alerta[campo]}" for campo in CAMPOS_ORIGEM if alerta.get(campo) is not None)
+    return ":".join(partes)
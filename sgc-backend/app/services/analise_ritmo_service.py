@@ -1,78 +1,204 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+
 from app.models.contrato import Contrato
-from app.models.boletim_medicao import BoletimMedicao
-from datetime import date
+from app.models.contrato_saldo import ContratoSaldo
+from app.services.financeiro_service import consulta_executado_por_contrato, obter_valores_por_contrato
+
+STATUS_RITMO = ("ATRASADO", "ADIANTADO", "NO_PRAZO")
+TOLERANCIA_DESVIO_PERCENTUAL = 5  # tolerância de 5%
+
+# Campos aceitos para ordenação da carteira
+CAMPOS_ORDENACAO = (
+    "desvio_percentual",
+    "desvio_valor",
+    "percentual_fisico",
+    "ritmo_necessario_para_recuperar",
+    "valor_total_contrato",
+)
+
+
+def _calcular(valor_total: np.ndarray, valor_executado: np.ndarray,
+              dias_totais: np.ndarray, dias_decorridos: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Indicadores de ritmo de vários contratos de uma vez (arrays alinhados).
+    `dias_totais` deve ser > 0 e `dias_decorridos` já limitado a [0, dias_totais].
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentual_fisico = np.where(valor_total != 0, valor_executado / valor_total * 100, 0.0)
+
+        # Planejado acumulado linear
+        ritmo_planejado_diario = valor_total / dias_totais
+        valor_planejado_acumulado = ritmo_planejado_diario * dias_decorridos
+
+        desvio_valor = valor_executado - valor_planejado_acumulado
+        desvio_percentual = np.where(
+            valor_planejado_acumulado != 0, desvio_valor / valor_planejado_acumulado * 100, 0.0
+        )
+
+        # Ritmo real médio
+        ritmo_real_medio = np.where(dias_decorridos > 0, valor_executado / dias_decorridos, np.nan)
+
+        # Ritmo necessário para recuperar (dias restantes)
+        dias_restantes = dias_totais - dias_decorridos
+        ritmo_necessario = np.where(
+            dias_restantes > 0, (valor_total - valor_executado) / dias_restantes, np.nan
+        )
+
+    # Status
+    status = np.where(
+        np.abs(desvio_percentual) < TOLERANCIA_DESVIO_PERCENTUAL, "NO_PRAZO",
+        np.where(desvio_valor > 0, "ADIANTADO", "ATRASADO")
+    )
+
+    return {
+        "valor_total_contrato": valor_total,
+        "dias_totais": dias_totais,
+        "dias_decorridos": dias_decorridos,
+        "valor_executado": valor_executado,
+        "percentual_fisico": percentual_fisico,
+        "valor_planejado_acumulado": valor_planejado_acumulado,
+        "ritmo_planejado_diario": ritmo_planejado_diario,
+        "ritmo_real_medio": ritmo_real_medio,
+        "desvio_valor": desvio_valor,
+        "desvio_percentual": desvio_percentual,
+        "ritmo_necessario_para_recuperar": ritmo_necessario,
+        "status": status,
+    }
+
+
+def _opcional(valor: float) -> Optional[float]:
+    # Ritmos nulos/zerados são apresentados como None (comportamento original)
+    return round(float(valor), 2) if np.isfinite(valor) and valor else None
+
+
+def _montar_item(indicadores: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    return {
+        "valor_total_contrato": round(float(indicadores["valor_total_contrato"][i]), 2),
+        "dias_totais": int(indicadores["dias_totais"][i]),
+        "dias_decorridos": int(indicadores["dias_decorridos"][i]),
+        "valor_executado": round(float(indicadores["valor_executado"][i]), 2),
+        "percentual_fisico": round(float(indicadores["percentual_fisico"][i]), 2),
+        "valor_planejado_acumulado": round(float(indicadores["valor_planejado_acumulado"][i]), 2),
+        "ritmo_planejado_diario": round(float(indicadores["ritmo_planejado_diario"][i]), 2),
+        "ritmo_real_medio": _opcional(indicadores["ritmo_real_medio"][i]),
+        "desvio_valor": round(float(indicadores["desvio_valor"][i]), 2),
+        "desvio_percentual": round(float(indicadores["desvio_percentual"][i]), 2),
+        "ritmo_necessario_para_recuperar": _opcional(indicadores["ritmo_necessario_para_recuperar"][i]),
+        "status": str(indicadores["status"][i]),
+    }
+
+
+def _dias(data_inicio: np.ndarray, data_fim: np.ndarray, hoje: date):
+    """(dias_totais, dias_decorridos limitado ao prazo) a partir de arrays datetime64[D]."""
+    dias_totais = (data_fim - data_inicio).astype(np.int64)
+    dias_decorridos = (np.datetime64(hoje, "D") - data_inicio).astype(np.int64)
+    return dias_totais, np.clip(dias_decorridos, 0, np.maximum(dias_totais, 0))
+
 
 def calcular_analise_ritmo(db: Session, contrato_id: int):
     contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
     if not contrato:
         raise ValueError("Contrato não encontrado")
 
-    valor_total = float(contrato.valor_total) if contrato.valor_total else 0.0
-    data_inicio = contrato.data_inicio
-    data_fim_prevista = contrato.data_fim_prevista
-
-    if not data_inicio or not data_fim_prevista:
+    if not contrato.data_inicio or not contrato.data_fim_prevista:
         # Se não houver datas, não podemos calcular planejado
         raise ValueError("Contrato sem datas de início/fim")
 
-    dias_totais = (data_fim_prevista - data_inicio).days
-    if dias_totais <= 0:
+    dias_totais, dias_decorridos = _dias(
+        np.array([contrato.data_inicio], dtype="datetime64[D]"),
+        np.array([contrato.data_fim_prevista], dtype="datetime64[D]"),
+        date.today(),
+    )
+    if dias_totais[0] <= 0:
         raise ValueError("Prazo inválido")
 
-    hoje = date.today()
-    if hoje < data_inicio:
-        dias_decorridos = 0
-    else:
-        dias_decorridos = (hoje - data_inicio).days
-        if dias_decorridos > dias_totais:
-            dias_decorridos = dias_totais
+    # Valor executado acumulado (razão contrato_saldos)
+    valor_executado = obter_valores_por_contrato(db, [contrato_id])[contrato_id][0]
 
-    # Calcular valor executado acumulado
-    valor_executado = db.query(BoletimMedicao).filter(
-        BoletimMedicao.contrato_id == contrato_id,
-        BoletimMedicao.status.in_(["APROVADO", "FATURADO"])
-    ).with_entities(db.func.sum(BoletimMedicao.valor_aprovado)).scalar() or 0.0
-    valor_executado = float(valor_executado)
+    indicadores = _calcular(
+        np.array([float(contrato.valor_total) if contrato.valor_total else 0.0]),
+        np.array([valor_executado]),
+        dias_totais,
+        dias_decorridos,
+    )
+    return _montar_item(indicadores, 0)
 
-    percentual_fisico = (valor_executado / valor_total * 100) if valor_total else 0.0
 
-    # Planejado acumulado linear
-    ritmo_planejado_diario = valor_total / dias_totais
-    valor_planejado_acumulado = ritmo_planejado_diario * dias_decorridos
+def calcular_analise_ritmo_carteira(db: Session, status: Optional[str] = None,
+                                    status_contrato: Optional[str] = None,
+                                    ordenar_por: str = "desvio_percentual",
+                                    decrescente: bool = False,
+                                    limite: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Análise de ritmo de todos os contratos visíveis em uma única consulta
+    (contratos + razão contrato_saldos) e cálculo vetorizado. Contratos
+    ainda sem linha no razão têm o executado agregado dos BMs, como em
+    obter_valores_por_contrato (uma consulta agrupada a mais).
 
-    desvio_valor = valor_executado - valor_planejado_acumulado
-    desvio_percentual = (desvio_valor / valor_planejado_acumulado * 100) if valor_planejado_acumulado else 0.0
+    Contratos sem datas de início/fim ou com prazo inválido ficam de fora.
+    Por padrão ordena pelo desvio percentual crescente (mais atrasados primeiro);
+    valores nulos vão para o fim. `status` filtra por ATRASADO/ADIANTADO/NO_PRAZO
+    e `limite` devolve apenas os N primeiros.
+    """
+    stmt = select(
+        Contrato.id,
+        Contrato.numero_contrato,
+        func.coalesce(Contrato.valor_total, 0),
+        Contrato.data_inicio,
+        Contrato.data_fim_prevista,
+        ContratoSaldo.valor_executado,
+    ).outerjoin(
+        ContratoSaldo, ContratoSaldo.contrato_id == Contrato.id
+    ).where(
+        Contrato.data_inicio.is_not(None),
+        Contrato.data_fim_prevista.is_not(None),
+        Contrato.data_fim_prevista > Contrato.data_inicio,
+    ).order_by(Contrato.id)
+    if status_contrato:
+        stmt = stmt.where(Contrato.status == status_contrato)
 
-    # Ritmo real médio
-    ritmo_real_medio = valor_executado / dias_decorridos if dias_decorridos > 0 else None
+    linhas = db.execute(stmt).all()
+    if not linhas:
+        return []
 
-    # Ritmo necessário para recuperar (dias restantes)
-    dias_restantes = dias_totais - dias_decorridos
-    ritmo_necessario_para_recuperar = None
-    if dias_restantes > 0:
-        valor_a_executar = valor_total - valor_executado
-        ritmo_necessario_para_recuperar = valor_a_executar / dias_restantes
+    ids, numeros, valores_totais, inicios, fins, executados = zip(*linhas)
+    sem_saldo = [contrato_id for contrato_id, executado in zip(ids, executados) if executado is None]
+    if sem_saldo:
+        agregados = dict(db.execute(consulta_executado_por_contrato(sem_saldo)).all())
+        executados = [
+            (agregados.get(contrato_id) or 0) if executado is None else executado
+            for contrato_id, executado in zip(ids, executados)
+        ]
+    dias_totais, dias_decorridos = _dias(
+        np.array(inicios, dtype="datetime64[D]"),
+        np.array(fins, dtype="datetime64[D]"),
+        date.today(),
+    )
+    indicadores = _calcular(
+        np.array(valores_totais, dtype=float),
+        np.array(executados, dtype=float),
+        dias_totais,
+        dias_decorridos,
+    )
 
-    # Status
-    if abs(desvio_percentual) < 5:  # tolerância de 5%
-        status = "NO_PRAZO"
-    elif desvio_valor > 0:
-        status = "ADIANTADO"
-    else:
-        status = "ATRASADO"
+    selecionados = np.arange(len(ids))
+    if status:
+        selecionados = selecionados[indicadores["status"] == status]
 
-    return {
-        "valor_total_contrato": round(valor_total, 2),
-        "dias_totais": dias_totais,
-        "dias_decorridos": dias_decorridos,
-        "valor_executado": round(valor_executado, 2),
-        "percentual_fisico": round(percentual_fisico, 2),
-        "valor_planejado_acumulado": round(valor_planejado_acumulado, 2),
-        "ritmo_planejado_diario": round(ritmo_planejado_diario, 2),
-        "ritmo_real_medio": round(ritmo_real_medio, 2) if ritmo_real_medio else None,
-        "desvio_valor": round(desvio_valor, 2),
-        "desvio_percentual": round(desvio_percentual, 2),
-        "ritmo_necessario_para_recuperar": round(ritmo_necessario_para_recuperar, 2) if ritmo_necessario_para_recuperar else None,
-        "status": status
-    }
\ No newline at end of file
+    chave = indicadores[ordenar_por][selecionados]
+    nulos = ~np.isfinite(chave)
+    # lexsort: última chave é a principal → nulos por último, depois o valor, depois o id
+    ordem = np.lexsort((selecionados, -chave if decrescente else chave, nulos))
+    selecionados = selecionados[ordem]
+    if limite:
+        selecionados = selecionados[:limite]
+
+    return [
+        {"contrato_id": ids[i], "numero_contrato": numeros[i], **_montar_item(indicadores, i)}
+        for i in selecionados
+    ]
@@ -0,0 +1,159 @@
+# app/services/arvore_arquivos_service.py
+"""
+Árvore de arquivos de um contrato: contrato -> BMs -> NFs -> pagamentos.
+
+A árvore é montada com um número fixo de consultas, uma por nível carregado
+(boletins, faturamentos, pagamentos), mais uma contagem para o primeiro nível
+não carregado e uma única consulta de `arquivos` para todas as entidades.
+A junção é feita em memória.
+
+`profundidade` limita quantos níveis abaixo da raiz são carregados. Nós do
+último nível trazem a lista de filhos como None e a quantidade em
+`qtd_<filhos>`, para que o cliente expanda a subárvore sob demanda
+(montar_subarvore).
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.boletim_medicao import BoletimMedicao
+from app.models.contrato import Contrato
+from app.models.faturamento import Faturamento
+from app.models.pagamento import Pagamento
+from app.repositories.arquivo_repository import ArquivoRepository
+
+# Tipo de entidade (mesmos valores de arquivos.entidade_tipo) -> tipo dos filhos
+FILHO = {"contrato": "boletim", "boletim": "faturamento", "faturamento": "pagamento", "pagamento": None}
+
+# Tipo -> (modelo, coluna que aponta para o pai, ordenação, chave da lista no nó)
+NIVEIS = {
+    "contrato": (Contrato, None, (), None),
+    "boletim": (BoletimMedicao, BoletimMedicao.contrato_id, (BoletimMedicao.numero_sequencial,), "boletins"),
+    "faturamento": (Faturamento, Faturamento.bm_id, (Faturamento.id,), "faturamentos"),
+    "pagamento": (Pagamento, Pagamento.faturamento_id, (Pagamento.id,), "pagamentos"),
+}
+
+# Níveis abaixo de cada raiz (profundidade máxima)
+PROFUNDIDADE_MAXIMA = {"contrato": 3, "boletim": 2, "faturamento": 1, "pagamento": 0}
+
+
+def arquivo_para_dict(arquivo) -> dict:
+    return {
+        "id": arquivo.id,
+        "nome_original": arquivo.nome_original,
+        "tamanho": arquivo.tamanho,
+        "tipo_mime": arquivo.tipo_mime,
+        "entidade_tipo": arquivo.entidade_tipo,
+        "entidade_id": arquivo.entidade_id,
+        "descricao": arquivo.descricao,
+        "created_at": arquivo.created_at,
+        "url_download": f"/api/arquivos/{arquivo.id}/download",
+    }
+
+
+def _dados(tipo: str, obj) -> Dict[str, Any]:
+    if tipo == "contrato":
+        return {"id": obj.id, "numero_contrato": obj.numero_contrato, "nome": obj.numero_contrato}
+    if tipo == "boletim":
+        return {
+            "id": obj.id,
+            "numero_sequencial": obj.numero_sequencial,
+            "periodo_inicio": str(obj.periodo_inicio) if obj.periodo_inicio else None,
+            "periodo_fim": str(obj.periodo_fim) if obj.periodo_fim else None,
+        }
+    if tipo == "faturamento":
+        return {
+            "id": obj.id,
+            "numero_nf": obj.numero_nf,
+            "valor_bruto_nf": float(obj.valor_bruto_nf) if obj.valor_bruto_nf else 0,
+        }
+    return {
+        "id": obj.id,
+        "data_pagamento": str(obj.data_pagamento) if obj.data_pagamento else None,
+        "valor_pago": float(obj.valor_pago) if obj.valor_pago else 0,
+    }
+
+
+# ----------------------------------------------------------------------
+# CARGA EM LOTE
+# ----------------------------------------------------------------------
+def _filhos_por_pai(db: Session, tipo: str, pai_ids: List[int]) -> Dict[int, list]:
+    modelo, coluna_pai, ordem, _ = NIVEIS[tipo]
+    agrupados: Dict[int, list] = defaultdict(list)
+    if not pai_ids:
+        return agrupados
+    linhas = db.query(modelo).filter(coluna_pai.in_(pai_ids)).order_by(*ordem, modelo.id).all()
+    for linha in linhas:
+        agrupados[getattr(linha, coluna_pai.key)].append(linha)
+    return agrupados
+
+
+def _contagem_por_pai(db: Session, tipo: str, pai_ids: List[int]) -> Dict[int, int]:
+    _, coluna_pai, _, _ = NIVEIS[tipo]
+    if not pai_ids:
+        return {}
+    return dict(
+        db.query(coluna_pai, func.count()).filter(coluna_pai.in_(pai_ids)).group_by(coluna_pai).all()
+    )
+
+
+def montar_subarvore(db: Session, tipo: str, entidade_id: int,
+                     profundidade: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Nó `tipo`/`entidade_id` com seus arquivos e até `profundidade` níveis de
+    descendentes (padrão: todos).
+    """
+    modelo = NIVEIS[tipo][0]
+    raiz = db.query(modelo).filter(modelo.id == entidade_id).first()
+    if raiz is None:
+        raise HTTPException(status_code=404, detail=f"{tipo.capitalize()} nao encontrado.")
+
+    maximo = PROFUNDIDADE_MAXIMA[tipo]
+    profundidade = maximo if profundidade is None else min(profundidade, maximo)
+
+    # Um nível por consulta: {tipo: {pai_id: [filhos]}}
+    carregados: Dict[str, Dict[int, list]] = {}
+    ids_por_tipo: Dict[str, List[int]] = {tipo: [raiz.id]}
+    nivel, ids = tipo, [raiz.id]
+    for _ in range(profundidade):
+        filho = FILHO[nivel]
+        carregados[filho] = _filhos_por_pai(db, filho, ids)
+        ids = [obj.id for objs in carregados[filho].values() for obj in objs]
+        ids_por_tipo[filho] = ids
+        nivel = filho
+
+    # Primeiro nível não carregado: apenas a quantidade, para expansão sob demanda
+    proximo = FILHO[nivel]
+    contagens = _contagem_por_pai(db, proximo, ids) if proximo else {}
+
+    arquivos: Dict[tuple, list] = defaultdict(list)
+    for arquivo in ArquivoRepository(db).get_by_entidades(ids_por_tipo):
+        arquivos[(arquivo.entidade_tipo, arquivo.entidade_id)].append(arquivo)
+
+    def no(tipo_no: str, obj) -> Dict[str, Any]:
+        dados = _dados(tipo_no, obj)
+        dados["arquivos"] = [arquivo_para_dict(a) for a in arquivos.get((tipo_no, obj.id), [])]
+        filho = FILHO[tipo_no]
+        if filho is not None:
+            chave = NIVEIS[filho][3]
+            if filho in carregados:
+                dados[chave] = [no(filho, f) for f in carregados[filho].get(obj.id, [])]
+            else:
+                dados[chave] = None
+                dados[f"qtd_{chave}"] = contagens.get(obj.id, 0)
+        return dados
+
+    return no(tipo, raiz)
+
+
+def montar_arvore_contrato(db: Session, contrato_id: int,
+                           profundidade: Optional[int] = None) -> Dict[str, Any]:
+    """Árvore do contrato no formato {"contrato": {...}, "boletins": [...]}."""
+    arvore = montar_subarvore(db, "contrato", contrato_id, profundidade)
+    resultado = {"boletins": arvore.pop("boletins")}
+    if "qtd_boletins" in arvore:
+        resultado["qtd_boletins"] = arvore.pop("qtd_boletins")
+    return {"contrato": arvore, **resultado}
@@ -0,0 +1,246 @@
+# app/services/auditoria_writer.py
+"""
+Gravação da auditoria (tabela `logs`) em lote, em segundo plano.
+
+O hook de auditoria do unit of work (app/models/events.py, seção 12) e
+LogService.registrar_log apenas enfileiram o registro; uma thread grava a
+fila com um INSERT de várias linhas quando o lote atinge
+AUDITORIA_LOTE_MAXIMO registros ou quando o registro mais antigo espera
+AUDITORIA_INTERVALO_SEGUNDOS. A requisição não paga mais o commit (nem o
+SELECT de refresh) do log.
+
+O horário do evento (`created_at`) é registrado no enfileiramento. Se a
+gravação falhar por indisponibilidade do banco, o lote é mantido e tentado
+de novo no ciclo seguinte; se falhar pelos dados (ex.: chave estrangeira),
+os registros são gravados um a um e apenas os inválidos são descartados.
+Com a fila cheia, ou com o gravador parado (scripts, testes), o registro é
+gravado na hora numa sessão própria, sem tocar na transação do chamador
+(que pode ainda ser desfeita). Ações que precisam do log na mesma
+transação (DELETE, APPROVE, CANCEL) não passam pela fila.
+
+Com vários processos, cada um tem o seu gravador; no shutdown a fila é
+descarregada antes de encerrar.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Colunas gravadas (todos os registros do lote com as mesmas chaves)
+CAMPOS = (
+    "usuario_id", "usuario_email", "acao", "entidade", "entidade_id",
+    "dados_antigos", "dados_novos", "ip", "user_agent", "created_at",
+)
+
+
+def novo_registro(**campos: Any) -> Dict[str, Any]:
+    registro = {campo: campos.get(campo) for campo in CAMPOS}
+    if registro["created_at"] is None:
+        registro["created_at"] = datetime.now(timezone.utc)
+    if registro["user_agent"]:
+        registro["user_agent"] = registro["user_agent"][:255]
+    # Decimal, date etc. convertidos já aqui: o lote não pode falhar na serialização
+    for campo in ("dados_antigos", "dados_novos"):
+        if registro[campo] is not None:
+            registro[campo] = jsonable_encoder(registro[campo])
+    return registro
+
+
+def _erro_de_conexao(exc: Exception) -> bool:
+    # Pool esgotado também é transitório: o lote espera a próxima tentativa
+    return isinstance(exc, (OperationalError, PoolTimeoutError)) or (
+        isinstance(exc, DBAPIError) and exc.connection_invalidated
+    )
+
+
+class GravadorAuditoria:
+    def __init__(self, session_factory: Callable[[], Session], lote_maximo: int = 200,
+                 intervalo_segundos: float = 1.0, fila_maxima: int = 10000):
+        self._session_factory = session_factory
+        self._lote_maximo = lote_maximo
+        self._intervalo = intervalo_segundos
+        self._fila: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=fila_maxima)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._contadores = {
+            "enfileirados": 0, "gravados": 0, "lotes": 0, "falhas": 0,
+            "descartados": 0, "gravacoes_diretas": 0, "maior_lote": 0,
+        }
+        self._ultimo_lote_ms: Optional[float] = None
+        self._pendentes_retentativa = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> None:
+        if self.ativo:
+            return
+        self._thread = threading.Thread(target=self._executar, name="gravador-auditoria", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 30.0) -> None:
+        """Descarrega a fila e encerra a thread."""
+        if not self.ativo:
+            return
+        self._fila.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enfileirar(self, registro: Dict[str, Any]) -> bool:
+        """
+        Enfileira o registro. Retorna False se não foi possível (gravador
+        parado ou fila cheia); nesse caso o registro é gravado na hora, numa
+        sessão própria (a transação de quem chamou não é afetada).
+        """
+        if self.ativo:
+            try:
+                self._fila.put_nowait(registro)
+                self._contar("enfileirados")
+                return True
+            except queue.Full:
+                logger.warning("Fila de auditoria cheia; gravando log de forma síncrona")
+        if self._gravar_lote([registro]):
+            self._contar("gravacoes_diretas")
+        return False
+
+    # ------------------------------------------------------------------
+    def _contar(self, chave: str, quantidade: int = 1) -> None:
+        with self._lock:
+            self._contadores[chave] += quantidade
+
+    def _gravar_lote(self, lote: List[Dict[str, Any]]) -> bool:
+        """
+        Grava o lote numa transação. False se o banco estiver indisponível
+        (o lote deve ser mantido para nova tentativa).
+        """
+        from app.repositories.log_repository import LogRepository
+
+        inicio = time.perf_counter()
+        db = self._session_factory()
+        try:
+            try:
+                LogRepository(db).inserir_lote(lote)
+                db.commit()
+                gravados = len(lote)
+            except Exception as exc:
+                db.rollback()
+                self._contar("falhas")
+                if _erro_de_conexao(exc):
+                    logger.warning("Banco indisponível ao gravar %d log(s) de auditoria: %s", len(lote), exc)
+                    return False
+                logger.warning("Erro ao gravar lote de auditoria (%s); gravando registro a registro", getattr(exc, "orig", exc))
+                gravados = self._gravar_individualmente(db, lote)
+        finally:
+            db.close()
+        with self._lock:
+            self._contadores["gravados"] += gravados
+            self._contadores["lotes"] += 1
+            self._contadores["maior_lote"] = max(self._contadores["maior_lote"], len(lote))
+            self._ultimo_lote_ms = round((time.perf_counter() - inicio) * 1000, 3)
+        return True
+
+    def _gravar_individualmente(self, db: Session, lote: List[Dict[str, Any]]) -> int:
+        from app.repositories.log_repository import LogRepository
+
+        gravados = 0
+        for registro in lote:
+            try:
+                LogRepository(db).inserir_lote([registro])
+                db.commit()
+                gravados += 1
+            except Exception as exc:
+                db.rollback()
+                self._contar("descartados")
+                logger.error("Log de auditoria descartado (%s): %r", getattr(exc, "orig", exc), registro)
+        return gravados
+
+    def _executar(self) -> None:
+        lote: List[Dict[str, Any]] = []
+        encerrar = False
+        while not encerrar:
+            # Espera o primeiro registro; os seguintes até o lote encher ou o prazo vencer
+            prazo = None
+            while len(lote) < self._lote_maximo:
+                if lote and prazo is None:
+                    prazo = time.monotonic() + self._intervalo
+                try:
+                    if prazo is None:
+                        registro = self._fila.get()
+                    else:
+                        restante = prazo - time.monotonic()
+                        if restante <= 0:
+                            break
+                        registro = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if registro is None:
+                    encerrar = True
+                    break
+                lote.append(registro)
+
+            if encerrar:
+                # Descarrega o que ainda estiver na fila
+                while True:
+                    try:
+                        registro = self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if registro is not None:
+                        lote.append(registro)
+
+            if not lote:
+                continue
+            for inicio in range(0, len(lote), self._lote_maximo):
+                parte = lote[inicio:inicio + self._lote_maximo]
+                if not self._gravar_lote(parte):
+                    # Mantém o restante para a próxima tentativa
+                    lote = lote[inicio:]
+                    break
+            else:
+                lote = []
+
+            with self._lock:
+                self._pendentes_retentativa = len(lote)
+            if lote and not encerrar:
+                time.sleep(self._intervalo)
+
+        if lote:
+            logger.error("Gravador de auditoria encerrado com %d registro(s) não gravado(s)", len(lote))
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ativo": self.ativo,
+                "profundidade_fila": self._fila.qsize(),
+                "capacidade_fila": self._fila.maxsize,
+                "aguardando_retentativa": self._pendentes_retentativa,
+                "lote_maximo": self._lote_maximo,
+                "intervalo_segundos": self._intervalo,
+                **self._contadores,
+                "ultimo_lote_ms": self._ultimo_lote_ms,
+            }
+
+
+def _criar_sessao() -> Session:
+    # Pool "batch": a gravação não disputa conexões com as requisições
+    from app.db.session import BatchSessionLocal
+    return BatchSessionLocal()
+
+
+gravador_auditoria = GravadorAuditoria(
+    _criar_sessao,
+    lote_maximo=settings.AUDITORIA_LOTE_MAXIMO,
+    intervalo_segundos=settings.AUDITORIA_INTERVALO_SEGUNDOS,
+    fila_maxima=settings.AUDITORIA_FILA_MAXIMA,
+)
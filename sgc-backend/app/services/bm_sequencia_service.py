@@ -0,0 +1,36 @@
+# app/services/bm_sequencia_service.py
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+
+from app.models.contrato_bm_sequencia import ContratoBmSequencia
+
+
+def reservar_numeros_bm(connection: Connection, contrato_id: int, quantidade: int = 1, minimo: int = 0) -> int:
+    """
+    Reserva `quantidade` números sequenciais de BM consecutivos para o
+    contrato, num único comando (INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING), e devolve o primeiro deles. Com `minimo`, o contador
+    avança antes até esse número (maior número já usado explicitamente),
+    de modo que a faixa reservada começa depois dele.
+
+    O incremento é atômico: BMs criados em paralelo para o mesmo contrato
+    recebem faixas distintas (o segundo espera o commit do primeiro, só na
+    linha do contrato). Se a transação for desfeita, o contador volta junto
+    e os mesmos números são entregues à próxima reserva.
+    """
+    insert_stmt = pg_insert(ContratoBmSequencia).values(
+        contrato_id=contrato_id, ultimo_numero=minimo + quantidade
+    )
+    ultimo = connection.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[ContratoBmSequencia.contrato_id],
+            set_={"ultimo_numero": func.greatest(ContratoBmSequencia.ultimo_numero, minimo) + quantidade},
+        ).returning(ContratoBmSequencia.ultimo_numero)
+    ).scalar_one()
+    return ultimo - quantidade + 1
+
+
+def registrar_numero_bm(connection: Connection, contrato_id: int, numero: int) -> None:
+    """Avança o contador até `numero`, informado explicitamente num BM novo."""
+    reservar_numeros_bm(connection, contrato_id, quantidade=0, minimo=numero)
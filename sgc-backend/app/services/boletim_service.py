@@ -6,6 +6,7 @@ from fastapi import HTTPException, status
 
 from app.repositories.boletim_medicao_repo import BoletimMedicaoRepository
 from app.repositories.contrato_repo import ContratoRepository
+from app.repositories.base import Pagina
 from app.schemas.boletim import BoletimCreate, BoletimUpdate
 from app.models.boletim_medicao import BoletimMedicao
 
@@ -34,12 +35,13 @@ class BoletimService:
             raise HTTPException(status_code=404, detail="Boletim não encontrado")
         return boletim
 
-    def list_boletins_por_contrato(self, contrato_id: int, skip: int = 0, limit: int = 100) -> list[BoletimMedicao]:
+    def list_boletins_por_contrato(self, contrato_id: int, skip: int = 0, limit: int = 100,
+                                   cursor: Optional[str] = None) -> Pagina:
         # Opcional: verificar se contrato existe
         contrato = self.contrato_repo.get(contrato_id)
         if not contrato:
             raise HTTPException(status_code=404, detail="Contrato não encontrado")
-        return self.repo.get_by_contrato(contrato_id, skip, limit)
+        return self.repo.get_by_contrato(contrato_id, skip, limit, cursor)
 
     def update_boletim(self, boletim_id: int, boletim_data: BoletimUpdate) -> BoletimMedicao:
         boletim = self.get_boletim(boletim_id)
@@ -90,8 +92,6 @@ class BoletimService:
     def get_all_boletins(self, skip: int = 0, limit: int = 100) -> list[BoletimMedicao]:
         return self.repo.get_multi(skip, limit)
     
-    def list_boletins(self, status: Optional[str] = None, skip: int = 0, limit: int = 100):
-        query = self.db.query(BoletimMedicao)
-        if status:
-            query = query.filter(BoletimMedicao.status == status)
-        return query.offset(skip).limit(limit).all()
\ No newline at end of file
+    def list_boletins(self, status: Optional[str] = None, skip: int = 0, limit: int = 100,
+                      cursor: Optional[str] = None) -> Pagina:
+        return self.repo.get_by_status(status, skip, limit, cursor)
\ No newline at end of file
@@ -0,0 +1,158 @@
+# app/services/fato_mensal_service.py
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, cast, delete, func, literal, select, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.boletim_medicao import BoletimMedicao
+from app.models.faturamento import Faturamento
+from app.models.fato_mensal import FatoMensal
+from app.models.pagamento import Pagamento
+from app.services.financeiro_service import STATUS_BM_EXECUTADO
+
+COLUNAS_FATOS = [
+    "contrato_id",
+    "mes",
+    "valor_medido",
+    "valor_aprovado",
+    "qtd_boletins_aprovados",
+    "valor_faturado",
+    "valor_retido",
+    "valor_recebido",
+]
+
+
+def primeiro_dia_do_mes(data: date) -> date:
+    return data.replace(day=1)
+
+
+def _mes(coluna):
+    return cast(func.date_trunc("month", coluna), Date)
+
+
+def _zero():
+    return literal(0)
+
+
+# ----------------------------------------------------------------------
+# DERIVAÇÃO A PARTIR DAS TABELAS DE ORIGEM
+# ----------------------------------------------------------------------
+def _consulta_fatos(contrato_ids: Optional[Iterable[int]] = None):
+    """
+    SELECT (contrato_id, mes, medido, aprovado, qtd_aprovados, faturado, retido, recebido)
+    agrupado por contrato e mês de competência.
+    """
+    if contrato_ids is not None:
+        contrato_ids = list(contrato_ids)
+
+    def _filtrar(stmt):
+        if contrato_ids is not None:
+            stmt = stmt.where(BoletimMedicao.contrato_id.in_(contrato_ids))
+        return stmt
+
+    # Cada parte da união preenche apenas as suas colunas; as demais vão zeradas.
+    # A primeira parte dá nome às colunas.
+    medicoes = _filtrar(select(
+        BoletimMedicao.contrato_id.label("contrato_id"),
+        _mes(BoletimMedicao.periodo_fim).label("mes"),
+        BoletimMedicao.valor_total_medido.label("medido"),
+        _zero().label("aprovado"),
+        literal(0).label("qtd_aprovados"),
+        _zero().label("faturado"),
+        _zero().label("retido"),
+        _zero().label("recebido"),
+    ).where(
+        BoletimMedicao.status != "CANCELADO"
+    ))
+
+    aprovacoes = _filtrar(select(
+        BoletimMedicao.contrato_id,
+        _mes(BoletimMedicao.periodo_fim),
+        _zero(),
+        func.coalesce(BoletimMedicao.valor_aprovado, 0),
+        literal(1),
+        _zero(),
+        _zero(),
+        _zero(),
+    ).where(
+        BoletimMedicao.status.in_(STATUS_BM_EXECUTADO)
+    ))
+
+    retido = (
+        Faturamento.iss_retido + Faturamento.inss_retido + Faturamento.irrf_retido
+        + Faturamento.csll_retido + Faturamento.pis_retido + Faturamento.cofins_retido
+    )
+    notas = _filtrar(select(
+        BoletimMedicao.contrato_id,
+        _mes(Faturamento.data_emissao),
+        _zero(),
+        _zero(),
+        literal(0),
+        Faturamento.valor_bruto_nf,
+        retido,
+        _zero(),
+    ).join(
+        BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
+    ).where(
+        Faturamento.status != "CANCELADO"
+    ))
+
+    recebimentos = _filtrar(select(
+        BoletimMedicao.contrato_id,
+        _mes(Pagamento.data_pagamento),
+        _zero(),
+        _zero(),
+        literal(0),
+        _zero(),
+        _zero(),
+        Pagamento.valor_pago,
+    ).join(
+        Faturamento, Faturamento.id == Pagamento.faturamento_id
+    ).join(
+        BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
+    ).where(
+        Faturamento.status != "CANCELADO"
+    ))
+
+    lancamentos = union_all(medicoes, aprovacoes, notas, recebimentos).subquery("lancamentos")
+    return select(
+        lancamentos.c.contrato_id,
+        lancamentos.c.mes,
+        func.coalesce(func.sum(lancamentos.c.medido), 0),
+        func.coalesce(func.sum(lancamentos.c.aprovado), 0),
+        func.sum(lancamentos.c.qtd_aprovados),
+        func.coalesce(func.sum(lancamentos.c.faturado), 0),
+        func.coalesce(func.sum(lancamentos.c.retido), 0),
+        func.coalesce(func.sum(lancamentos.c.recebido), 0),
+    ).group_by(lancamentos.c.contrato_id, lancamentos.c.mes)
+
+
+def atualizar_fatos(connection: Connection, contrato_ids: Iterable[int]) -> None:
+    """
+    Recalcula as linhas de fatos_mensais dos contratos informados, na
+    transação corrente (chamado pelo after_flush em events.py, depois de
+    atualizar_saldos, que já bloqueou as linhas desses contratos).
+    """
+    contrato_ids = sorted(set(contrato_ids))
+    if not contrato_ids:
+        return
+    connection.execute(delete(FatoMensal).where(FatoMensal.contrato_id.in_(contrato_ids)))
+    connection.execute(
+        FatoMensal.__table__.insert().from_select(COLUNAS_FATOS, _consulta_fatos(contrato_ids))
+    )
+
+
+def reconstruir_fatos(db: Session) -> int:
+    """
+    Re-deriva fatos_mensais inteira a partir de boletins, faturamentos e pagamentos.
+    Retorna a quantidade de linhas (contrato × mês) geradas.
+    """
+    db.execute(delete(FatoMensal))
+    resultado = db.execute(
+        FatoMensal.__table__.insert().from_select(COLUNAS_FATOS, _consulta_fatos())
+    )
+    db.commit()
+    return resultado.rowcount
+
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.repositories.faturamento_repo import FaturamentoRepository
+from app.repositories.base import Pagina, paginar
 from app.repositories.boletim_medicao_repo import BoletimMedicaoRepository
 from app.repositories.empresa_repo import EmpresaRepository
 from app.schemas.faturamento import FaturamentoCreate, FaturamentoUpdate
@@ -94,13 +95,13 @@ class FaturamentoService:
     # ------------------------------------------------------------------
     # LISTAR FATURAMENTOS (COM FILTROS OPCIONAIS)
     # ------------------------------------------------------------------
-    def list_faturamentos(self, bm_id=None, contrato_id=None, skip=0, limit=100):
+    def list_faturamentos(self, bm_id=None, contrato_id=None, skip=0, limit=100, cursor=None) -> Pagina:
         query = self.db.query(Faturamento)
         if bm_id:
             query = query.filter(Faturamento.bm_id == bm_id)
         if contrato_id:
             query = query.join(BoletimMedicao).filter(BoletimMedicao.contrato_id == contrato_id)
-        return query.offset(skip).limit(limit).all()
+        return paginar(query, [Faturamento.id], skip=skip, limit=limit, cursor=cursor)
     # ------------------------------------------------------------------
     # ATUALIZAR FATURAMENTO
     # ------------------------------------------------------------------
@@ -1,49 +1,126 @@
 # app/services/financeiro_service.py
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 from app.models.boletim_medicao import BoletimMedicao
 from app.models.faturamento import Faturamento
 from app.models.pagamento import Pagamento
 from app.models.contrato import Contrato
+from app.models.contrato_saldo import ContratoSaldo
 from app.core.exceptions import BusinessError
 
-def calcular_resumo_contrato(db: Session, contrato_id: int) -> Dict[str, Any]:
-    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
-    if not contrato:
-        raise BusinessError("Contrato não encontrado.")
-
-    valor_total = float(contrato.valor_total) if contrato.valor_total else 0.0
-
-    # Valor executado (boletins APROVADOS e FATURADOS — ambos representam execução confirmada)
-    valor_executado = db.query(func.sum(BoletimMedicao.valor_aprovado)).filter(
-        BoletimMedicao.contrato_id == contrato_id,
-        BoletimMedicao.status.in_(["APROVADO", "FATURADO"])
-    ).scalar() or 0.0
-    valor_executado = float(valor_executado)
-
-    # Valor faturado (soma das notas fiscais não canceladas)
-    valor_faturado = db.query(func.sum(Faturamento.valor_bruto_nf)).join(
+# Boletins APROVADOS e FATURADOS — ambos representam execução confirmada
+STATUS_BM_EXECUTADO = ("APROVADO", "FATURADO")
+
+
+# ----------------------------------------------------------------------
+# CONSULTAS AGRUPADAS POR CONTRATO
+# Cada função devolve um SELECT (contrato_id, valor) agrupado por contrato,
+# opcionalmente restrito a um conjunto de contratos.
+# ----------------------------------------------------------------------
+def consulta_executado_por_contrato(contrato_ids: Optional[Iterable[int]] = None):
+    """Soma do valor aprovado dos boletins executados, por contrato."""
+    stmt = select(
+        BoletimMedicao.contrato_id.label("contrato_id"),
+        func.sum(BoletimMedicao.valor_aprovado).label("valor"),
+    ).where(
+        BoletimMedicao.status.in_(STATUS_BM_EXECUTADO)
+    ).group_by(BoletimMedicao.contrato_id)
+    if contrato_ids is not None:
+        stmt = stmt.where(BoletimMedicao.contrato_id.in_(list(contrato_ids)))
+    return stmt
+
+
+def consulta_faturado_por_contrato(contrato_ids: Optional[Iterable[int]] = None):
+    """Soma do valor bruto das notas fiscais não canceladas, por contrato."""
+    stmt = select(
+        BoletimMedicao.contrato_id.label("contrato_id"),
+        func.sum(Faturamento.valor_bruto_nf).label("valor"),
+    ).join(
         BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
-    ).filter(
-        BoletimMedicao.contrato_id == contrato_id,
+    ).where(
         Faturamento.status != "CANCELADO"
-    ).scalar() or 0.0
-    valor_faturado = float(valor_faturado)
+    ).group_by(BoletimMedicao.contrato_id)
+    if contrato_ids is not None:
+        stmt = stmt.where(BoletimMedicao.contrato_id.in_(list(contrato_ids)))
+    return stmt
 
-    # Valor recebido (soma dos pagamentos de faturas não canceladas)
-    valor_recebido = db.query(func.sum(Pagamento.valor_pago)).join(
+
+def consulta_recebido_por_contrato(contrato_ids: Optional[Iterable[int]] = None):
+    """Soma dos pagamentos de faturas não canceladas, por contrato."""
+    stmt = select(
+        BoletimMedicao.contrato_id.label("contrato_id"),
+        func.sum(Pagamento.valor_pago).label("valor"),
+    ).join(
         Faturamento, Faturamento.id == Pagamento.faturamento_id
     ).join(
         BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id
-    ).filter(
-        BoletimMedicao.contrato_id == contrato_id,
+    ).where(
         Faturamento.status != "CANCELADO"
-    ).scalar() or 0.0
-    valor_recebido = float(valor_recebido)
+    ).group_by(BoletimMedicao.contrato_id)
+    if contrato_ids is not None:
+        stmt = stmt.where(BoletimMedicao.contrato_id.in_(list(contrato_ids)))
+    return stmt
+
+
+def obter_valores_por_contrato(db: Session, contrato_ids: List[int]) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Retorna {contrato_id: (valor_executado, valor_faturado, valor_recebido)}
+    para todos os contratos informados.
+
+    Os valores vêm do razão `contrato_saldos` (uma linha por contrato, mantida
+    pelos listeners de events.py). Contratos ainda sem linha no razão são
+    agregados a partir das tabelas de origem, com três consultas agrupadas.
+    """
+    if not contrato_ids:
+        return {}
+
+    valores: Dict[int, Tuple[float, float, float]] = {
+        cid: (float(executado), float(faturado), float(recebido))
+        for cid, executado, faturado, recebido in db.execute(
+            select(
+                ContratoSaldo.contrato_id,
+                ContratoSaldo.valor_executado,
+                ContratoSaldo.valor_faturado,
+                ContratoSaldo.valor_recebido,
+            ).where(ContratoSaldo.contrato_id.in_(contrato_ids))
+        ).all()
+    }
 
+    faltantes = [cid for cid in contrato_ids if cid not in valores]
+    if faltantes:
+        valores.update(agregar_valores_por_contrato(db, faltantes))
+    return valores
+
+
+def agregar_valores_por_contrato(db: Session, contrato_ids: List[int]) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Mesmo formato de `obter_valores_por_contrato`, mas sempre agregando
+    boletins, faturamentos e pagamentos (três consultas agrupadas).
+    """
+    if not contrato_ids:
+        return {}
+    valores = {cid: [0.0, 0.0, 0.0] for cid in contrato_ids}
+
+    consultas = (
+        consulta_executado_por_contrato(contrato_ids),
+        consulta_faturado_por_contrato(contrato_ids),
+        consulta_recebido_por_contrato(contrato_ids),
+    )
+    for posicao, consulta in enumerate(consultas):
+        for contrato_id, valor in db.execute(consulta).all():
+            valores[contrato_id][posicao] = float(valor or 0)
+
+    return {cid: tuple(v) for cid, v in valores.items()}
+
+
+# ----------------------------------------------------------------------
+# MONTAGEM DOS INDICADORES (sem acesso ao banco)
+# ----------------------------------------------------------------------
+def _montar_resumo(valor_total: float, valor_executado: float,
+                   valor_faturado: float, valor_recebido: float) -> Dict[str, Any]:
     saldo_contratual = valor_total - valor_executado
     saldo_a_faturar = valor_executado - valor_faturado
     saldo_a_receber = valor_faturado - valor_recebido
@@ -69,12 +146,10 @@ def calcular_resumo_contrato(db: Session, contrato_id: int) -> Dict[str, Any]:
         "percentual_financeiro": round(perc_financeiro_faturado, 2),  # compatibilidade com frontend
     }
 
-def calcular_status_desempenho(db: Session, contrato_id: int) -> Dict[str, Any]:
-    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
-    if not contrato:
-        raise BusinessError("Contrato não encontrado.")
 
-    hoje = date.today()
+def _montar_desempenho(contrato: Contrato, perc_fisico: Optional[float],
+                       hoje: Optional[date] = None) -> Dict[str, Any]:
+    hoje = hoje or date.today()
     data_inicio = contrato.data_inicio
     data_fim = contrato.data_fim_prevista
 
@@ -96,9 +171,6 @@ def calcular_status_desempenho(db: Session, contrato_id: int) -> Dict[str, Any]:
     else:
         percentual_tempo = min(100.0, max(0.0, (dias_decorridos / dias_totais) * 100))
 
-    resumo = calcular_resumo_contrato(db, contrato_id)
-    perc_fisico = resumo["percentual_fisico"]
-
     if perc_fisico is None:
         status = "SEM_MEDICAO"
     elif percentual_tempo > perc_fisico + 10:
@@ -113,4 +185,70 @@ def calcular_status_desempenho(db: Session, contrato_id: int) -> Dict[str, Any]:
         "status_desempenho": status,
         "dias_decorridos": dias_decorridos,
         "dias_totais": dias_totais,
-    }
\ No newline at end of file
+    }
+
+
+# ----------------------------------------------------------------------
+# API POR CONTRATO
+# ----------------------------------------------------------------------
+def calcular_resumo_contrato(db: Session, contrato_id: int) -> Dict[str, Any]:
+    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
+    if not contrato:
+        raise BusinessError("Contrato não encontrado.")
+
+    valor_total = float(contrato.valor_total) if contrato.valor_total else 0.0
+    valor_executado, valor_faturado, valor_recebido = obter_valores_por_contrato(db, [contrato_id])[contrato_id]
+    return _montar_resumo(valor_total, valor_executado, valor_faturado, valor_recebido)
+
+
+def calcular_status_desempenho(db: Session, contrato_id: int,
+                               percentual_fisico: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Compara o percentual de tempo decorrido com o percentual físico.
+    Se o chamador já tiver o resumo do contrato, pode informar o
+    `percentual_fisico` para evitar recalcular o valor executado.
+    """
+    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
+    if not contrato:
+        raise BusinessError("Contrato não encontrado.")
+
+    if percentual_fisico is None and contrato.data_inicio and contrato.data_fim_prevista:
+        valor_total = float(contrato.valor_total) if contrato.valor_total else 0.0
+        valor_executado = obter_valores_por_contrato(db, [contrato_id])[contrato_id][0]
+        percentual_fisico = round((valor_executado / valor_total) * 100, 2) if valor_total else 0.0
+
+    return _montar_desempenho(contrato, percentual_fisico)
+
+
+# ----------------------------------------------------------------------
+# API EM LOTE (carteira de contratos)
+# ----------------------------------------------------------------------
+def calcular_resumos_de_contratos(db: Session, contratos: Iterable[Contrato]) -> Dict[int, Dict[str, Any]]:
+    """
+    Resumo financeiro + desempenho de vários contratos já carregados.
+    Usa um número constante de consultas agrupadas, independente do
+    tamanho da carteira. Retorna {contrato_id: {...resumo, ...desempenho}}.
+    """
+    contratos = list(contratos)
+    valores = obter_valores_por_contrato(db, [c.id for c in contratos])
+    hoje = date.today()
+
+    resultado: Dict[int, Dict[str, Any]] = {}
+    for c in contratos:
+        valor_total = float(c.valor_total) if c.valor_total else 0.0
+        resumo = _montar_resumo(valor_total, *valores[c.id])
+        desempenho = _montar_desempenho(c, resumo["percentual_fisico"], hoje)
+        resultado[c.id] = {**resumo, **desempenho}
+    return resultado
+
+
+def calcular_resumos_contratos(db: Session, contrato_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Versão por IDs de `calcular_resumos_de_contratos`.
+    IDs inexistentes são ignorados (não aparecem no resultado).
+    """
+    contrato_ids = list(contrato_ids)
+    if not contrato_ids:
+        return {}
+    contratos = db.query(Contrato).filter(Contrato.id.in_(contrato_ids)).all()
+    return calcular_resumos_de_contratos(db, contratos)
@@ -0,0 +1,264 @@
+# app/services/log_retencao_service.py
+"""
+Partições mensais da tabela `logs`, retenção e arquivo frio.
+
+- Cada mês (UTC) de created_at fica numa partição logs_AAAA_MM. Consultas
+  com período (LogRepository.list com data_inicio/data_fim) só leem as
+  partições do intervalo.
+- garantir_particoes cria as partições do mês atual e dos próximos
+  LOGS_PARTICOES_FUTURAS meses. Registros fora delas vão para a partição
+  padrão (logs_padrao), e são movidos quando a partição do mês é criada.
+- aplicar_retencao desanexa as partições com mais de LOGS_RETENCAO_MESES
+  meses, grava cada uma em LOGS_ARQUIVO_DIR/logs_AAAA_MM.jsonl.gz (uma
+  linha JSON por registro) e só então remove a tabela. Uma partição
+  desanexada cujo arquivamento falhou é retomada na execução seguinte.
+- ler_arquivo consulta um mês arquivado, lendo o arquivo sob demanda.
+
+Executado por app/db/arquivar_logs.py (agendar mensalmente, ou com mais
+frequência: a rotina é idempotente).
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import PARTICAO_PADRAO
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # sgc-backend/
+
+RE_PARTICAO = re.compile(r"^logs_(\d{4})_(\d{2})$")
+RE_ARQUIVO = re.compile(r"^logs_(\d{4})_(\d{2})\.jsonl\.gz$")
+
+COLUNAS = (
+    "id", "usuario_id", "usuario_email", "acao", "entidade", "entidade_id",
+    "dados_antigos", "dados_novos", "ip", "user_agent", "created_at",
+)
+
+# Linhas lidas por vez do cursor no servidor ao arquivar
+LOTE_LEITURA = 1000
+
+
+def diretorio_arquivo() -> Path:
+    diretorio = Path(settings.LOGS_ARQUIVO_DIR)
+    return diretorio if diretorio.is_absolute() else BASE_DIR / diretorio
+
+
+def mes_atual() -> date:
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+def somar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    return f"logs_{mes.year:04d}_{mes.month:02d}"
+
+
+def _mes_do_nome(nome: str, padrao: "re.Pattern[str]") -> Optional[date]:
+    encontrado = padrao.match(nome)
+    if not encontrado:
+        return None
+    return date(int(encontrado.group(1)), int(encontrado.group(2)), 1)
+
+
+def _limites(mes: date) -> Dict[str, str]:
+    # Limites em UTC, independentes do TimeZone da sessão
+    return {"inicio": f"{mes.isoformat()} 00:00:00+00", "fim": f"{somar_meses(mes, 1).isoformat()} 00:00:00+00"}
+
+
+# ----------------------------------------------------------------------
+# PARTIÇÕES
+# ----------------------------------------------------------------------
+def particoes_anexadas(db: Session) -> List[date]:
+    nomes = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'logs'::regclass"
+    )).scalars()
+    return sorted(mes for mes in (_mes_do_nome(n, RE_PARTICAO) for n in nomes) if mes)
+
+
+def particoes_desanexadas(db: Session) -> List[date]:
+    """Tabelas logs_AAAA_MM fora de `logs` (arquivamento interrompido)."""
+    nomes = db.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace "
+        "AND c.relname ~ '^logs_[0-9]{4}_[0-9]{2}$' AND NOT c.relispartition"
+    )).scalars()
+    return sorted(mes for mes in (_mes_do_nome(n, RE_PARTICAO) for n in nomes) if mes)
+
+
+def criar_particao(db: Session, mes: date) -> bool:
+    """Cria a partição do mês (False se já existe). Não faz commit."""
+    nome = nome_particao(mes)
+    if db.execute(text("SELECT to_regclass(:nome)"), {"nome": nome}).scalar() is not None:
+        return False
+    limites = _limites(mes)
+    criar = f"CREATE TABLE {nome} PARTITION OF logs FOR VALUES FROM ('{limites['inicio']}') TO ('{limites['fim']}')"
+
+    tem_padrao = db.execute(text("SELECT to_regclass(:nome)"), {"nome": PARTICAO_PADRAO}).scalar() is not None
+    pendentes = tem_padrao and db.execute(
+        text(f"SELECT 1 FROM {PARTICAO_PADRAO} WHERE created_at >= :inicio AND created_at < :fim LIMIT 1"),
+        limites,
+    ).first()
+    if not pendentes:
+        db.execute(text(criar))
+        return True
+
+    # O Postgres recusa a nova partição enquanto a padrão tiver linhas do
+    # intervalo: desanexa a padrão, cria a do mês, move as linhas e reanexa
+    db.execute(text(f"ALTER TABLE logs DETACH PARTITION {PARTICAO_PADRAO}"))
+    db.execute(text(criar))
+    db.execute(text(
+        f"WITH movidos AS (DELETE FROM {PARTICAO_PADRAO} "
+        f"WHERE created_at >= :inicio AND created_at < :fim RETURNING *) "
+        f"INSERT INTO logs SELECT * FROM movidos"
+    ), limites)
+    db.execute(text(f"ALTER TABLE logs ATTACH PARTITION {PARTICAO_PADRAO} DEFAULT"))
+    return True
+
+
+def garantir_particoes(db: Session, meses_futuros: Optional[int] = None) -> List[date]:
+    """Partições do mês atual e dos próximos meses. Retorna os meses criados."""
+    if meses_futuros is None:
+        meses_futuros = settings.LOGS_PARTICOES_FUTURAS
+    inicio = mes_atual()
+    criadas = []
+    for deslocamento in range(meses_futuros + 1):
+        mes = somar_meses(inicio, deslocamento)
+        if criar_particao(db, mes):
+            criadas.append(mes)
+    db.commit()
+    return criadas
+
+
+# ----------------------------------------------------------------------
+# RETENÇÃO E ARQUIVO
+# ----------------------------------------------------------------------
+def caminho_arquivo(mes: date, diretorio: Optional[Path] = None) -> Path:
+    return (diretorio or diretorio_arquivo()) / f"{nome_particao(mes)}.jsonl.gz"
+
+
+def _registro_json(linha) -> str:
+    registro = dict(zip(COLUNAS, linha))
+    registro["created_at"] = registro["created_at"].isoformat()
+    return json.dumps(registro, ensure_ascii=False, separators=(",", ":"))
+
+
+def arquivar_particao(db: Session, mes: date, diretorio: Optional[Path] = None) -> int:
+    """
+    Desanexa a partição do mês, grava o arquivo .jsonl.gz e remove a tabela.
+    Retorna o número de registros arquivados.
+    """
+    nome = nome_particao(mes)
+    if mes in particoes_anexadas(db):
+        db.execute(text(f"ALTER TABLE logs DETACH PARTITION {nome}"))
+        db.commit()
+
+    destino = caminho_arquivo(mes, diretorio)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    parcial = destino.with_name(destino.name + ".parcial")
+
+    total = 0
+    linhas = db.execute(
+        text(f"SELECT {', '.join(COLUNAS)} FROM {nome} ORDER BY created_at, id"),
+        execution_options={"yield_per": LOTE_LEITURA},
+    )
+    with open(parcial, "wb") as bruto:
+        with gzip.GzipFile(fileobj=bruto, mode="wb") as compactado:
+            for linha in linhas:
+                compactado.write((_registro_json(linha) + "\n").encode("utf-8"))
+                total += 1
+        bruto.flush()
+        os.fsync(bruto.fileno())
+    # O arquivo só aparece completo; a tabela só é removida depois dele
+    os.replace(parcial, destino)
+
+    db.execute(text(f"DROP TABLE {nome}"))
+    db.commit()
+    return total
+
+
+def aplicar_retencao(
+    db: Session,
+    retencao_meses: Optional[int] = None,
+    meses_futuros: Optional[int] = None,
+    diretorio: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Cria as partições futuras e arquiva as que saíram da janela de retenção."""
+    if retencao_meses is None:
+        retencao_meses = settings.LOGS_RETENCAO_MESES
+    criadas = garantir_particoes(db, meses_futuros)
+
+    limite = somar_meses(mes_atual(), -retencao_meses)
+    vencidas = [mes for mes in particoes_anexadas(db) if mes < limite]
+    # Arquivamentos interrompidos são retomados independentemente da idade
+    pendentes = sorted(set(vencidas) | set(particoes_desanexadas(db)))
+    arquivadas = {nome_particao(mes): arquivar_particao(db, mes, diretorio) for mes in pendentes}
+    return {"criadas": [nome_particao(mes) for mes in criadas], "arquivadas": arquivadas}
+
+
+# ----------------------------------------------------------------------
+# LEITURA DO ARQUIVO
+# ----------------------------------------------------------------------
+def meses_arquivados(diretorio: Optional[Path] = None) -> List[date]:
+    diretorio = diretorio or diretorio_arquivo()
+    if not diretorio.is_dir():
+        return []
+    return sorted(mes for mes in (_mes_do_nome(p.name, RE_ARQUIVO) for p in diretorio.iterdir()) if mes)
+
+
+def _registros(caminho: Path) -> Iterator[Dict[str, Any]]:
+    with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+def ler_arquivo(
+    mes: date,
+    usuario_id: Optional[int] = None,
+    entidade: Optional[str] = None,
+    entidade_id: Optional[int] = None,
+    acao: Optional[str] = None,
+    campo: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    diretorio: Optional[Path] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Registros de um mês arquivado, em ordem cronológica, com os mesmos
+    filtros de LogRepository.list. None se o mês não foi arquivado.
+    """
+    caminho = caminho_arquivo(mes, diretorio)
+    if not caminho.is_file():
+        return None
+
+    def _aceita(registro: Dict[str, Any]) -> bool:
+        return (
+            (usuario_id is None or registro["usuario_id"] == usuario_id)
+            and (entidade is None or registro["entidade"] == entidade)
+            and (entidade_id is None or registro["entidade_id"] == entidade_id)
+            and (acao is None or registro["acao"] == acao)
+            and (campo is None or campo in (registro["dados_novos"] or {}))
+        )
+
+    itens: List[Dict[str, Any]] = []
+    for registro in _registros(caminho):
+        if not _aceita(registro):
+            continue
+        if skip:
+            skip -= 1
+            continue
+        itens.append(registro)
+        if len(itens) >= limit:
+            break
+    return itens
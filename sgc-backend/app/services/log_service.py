@@ -1,10 +1,70 @@
+import csv
+import io
+import json
+import logging
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.models.boletim_medicao import BoletimMedicao
+from app.models.faturamento import Faturamento
+from app.models.pagamento import Pagamento
+from app.models.prateleira import PrateleiraExecucao
+from app.repositories.base import Pagina
 from app.repositories.log_repository import LogRepository
-from typing import Optional, Dict, Any
+from app.services.auditoria_writer import gravador_auditoria, novo_registro
+from typing import Optional, Dict, Any, Iterator, Set, Tuple
 from datetime import date
 
+logger = logging.getLogger(__name__)
+
+# Colunas da exportação (mesma ordem no CSV)
+COLUNAS_EXPORTACAO = (
+    "id", "created_at", "usuario_id", "usuario_email", "acao", "entidade",
+    "entidade_id", "dados_antigos", "dados_novos", "ip", "user_agent",
+)
+
+# Linhas por FETCH do cursor no servidor e por bloco enviado ao cliente
+LOTE_EXPORTACAO = 1000
+
+# Alterados em toda atualização; o horário já está em logs.created_at
+CAMPOS_IGNORADOS_NO_DELTA = {"updated_at"}
+
+# Filhos incluídos no histórico de uma entidade: (entidade filha, modelo,
+# coluna que aponta para o pai). Aplicado recursivamente: o histórico de um
+# contrato inclui os BMs, as NFs dos BMs e os pagamentos das NFs.
+FILHOS_NO_HISTORICO = {
+    "contratos": [
+        ("boletins", BoletimMedicao, "contrato_id"),
+        ("prateleira", PrateleiraExecucao, "contrato_id"),
+    ],
+    "boletins": [("faturamentos", Faturamento, "bm_id")],
+    "faturamentos": [("pagamentos", Pagamento, "faturamento_id")],
+}
+
+
+def calcular_delta(
+    dados_antigos: Optional[Dict[str, Any]],
+    dados_novos: Optional[Dict[str, Any]],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Reduz os dois snapshots aos campos cujo valor mudou. Só se aplica quando
+    há os dois lados (UPDATE); CREATE e DELETE mantêm o registro completo.
+    """
+    if not isinstance(dados_antigos, dict) or not isinstance(dados_novos, dict):
+        return dados_antigos, dados_novos
+    alterados = [
+        campo for campo in {**dados_antigos, **dados_novos}
+        if campo not in CAMPOS_IGNORADOS_NO_DELTA
+        and dados_antigos.get(campo) != dados_novos.get(campo)
+    ]
+    return (
+        {campo: dados_antigos[campo] for campo in alterados if campo in dados_antigos},
+        {campo: dados_novos[campo] for campo in alterados if campo in dados_novos},
+    )
+
+
 class LogService:
     def __init__(self, db: Session):
+        self.db = db
         self.repo = LogRepository(db)
 
     def registrar_log(
@@ -17,9 +77,23 @@ class LogService:
         dados_antigos: Optional[Dict[str, Any]] = None,
         dados_novos: Optional[Dict[str, Any]] = None,
         ip: Optional[str] = None,
-        user_agent: Optional[str] = None
-    ):
-        return self.repo.create(
+        user_agent: Optional[str] = None,
+        duravel: bool = False
+    ) -> None:
+        """
+        Registra um log de auditoria manualmente. As entidades de
+        ENTIDADES_AUDITADAS (app/models/events.py) já são registradas no
+        flush; usar para ações sem alteração de entidade. Em atualizações
+        (antigos e novos informados) grava apenas os campos alterados
+        (calcular_delta).
+
+        Por padrão o registro é enfileirado e gravado em lote pelo gravador
+        de auditoria (app/services/auditoria_writer.py). Com `duravel=True`
+        é gravado na sessão do chamador e confirmado no mesmo commit: usar
+        quando a ação não pode ficar sem registro (exclusões, aprovações,
+        cancelamentos).
+        """
+        registro = novo_registro(
             usuario_id=usuario_id,
             usuario_email=usuario_email,
             acao=acao,
@@ -30,6 +104,105 @@ class LogService:
             ip=ip,
             user_agent=user_agent
         )
+        # Comparação sobre os valores já serializados (Decimal, date -> JSON)
+        registro["dados_antigos"], registro["dados_novos"] = calcular_delta(
+            registro["dados_antigos"], registro["dados_novos"]
+        )
+        if duravel:
+            self.repo.create(**registro)
+            return
+        gravador_auditoria.enfileirar(registro)
 
     def listar_logs(self, **filtros):
-        return self.repo.list(**filtros)
\ No newline at end of file
+        return self.repo.list(**filtros)
+
+    def historico_entidade(
+        self,
+        entidade: str,
+        entidade_id: int,
+        incluir_filhos: bool = True,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Pagina:
+        """
+        Linha do tempo de uma entidade (mais recente primeiro). Com
+        `incluir_filhos`, inclui os logs das entidades filhas
+        (FILHOS_NO_HISTORICO), inclusive das já excluídas.
+        """
+        alvos: Dict[str, Set[int]] = {entidade: {entidade_id}}
+        if incluir_filhos:
+            self._incluir_filhos(alvos, entidade, {entidade_id})
+        return self.repo.historico(alvos, skip=skip, limit=limit, cursor=cursor)
+
+    def _incluir_filhos(self, alvos: Dict[str, Set[int]], entidade: str, ids_pais: Set[int]) -> None:
+        for filha, modelo, chave_pai in FILHOS_NO_HISTORICO.get(entidade, ()):
+            # Filhos atuais (tabela da entidade) e excluídos (snapshot do DELETE)
+            ids = set(self.db.scalars(select(modelo.id).where(getattr(modelo, chave_pai).in_(ids_pais))))
+            ids |= self.repo.ids_excluidos(filha, chave_pai, ids_pais)
+            if ids:
+                alvos.setdefault(filha, set()).update(ids)
+                self._incluir_filhos(alvos, filha, ids)
+
+
+
+# ----------------------------------------------------------------------
+# EXPORTAÇÃO
+# ----------------------------------------------------------------------
+def _linha_exportacao(linha) -> Dict[str, Any]:
+    registro = {coluna: getattr(linha, coluna) for coluna in COLUNAS_EXPORTACAO}
+    registro["created_at"] = registro["created_at"].isoformat()
+    return registro
+
+
+def _blocos_ndjson(linhas) -> Iterator[str]:
+    bloco = []
+    for linha in linhas:
+        bloco.append(json.dumps(_linha_exportacao(linha), ensure_ascii=False, separators=(",", ":")))
+        if len(bloco) >= LOTE_EXPORTACAO:
+            yield "\n".join(bloco) + "\n"
+            bloco = []
+    if bloco:
+        yield "\n".join(bloco) + "\n"
+
+
+def _blocos_csv(linhas) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    for indice, linha in enumerate(linhas, start=1):
+        registro = _linha_exportacao(linha)
+        for coluna in ("dados_antigos", "dados_novos"):
+            if registro[coluna] is not None:
+                registro[coluna] = json.dumps(registro[coluna], ensure_ascii=False)
+        escritor.writerow(registro[coluna] for coluna in COLUNAS_EXPORTACAO)
+        if indice % LOTE_EXPORTACAO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def exportar_logs(formato: str, solicitante_id: int, **filtros) -> Iterator[str]:
+    """
+    Gera o conteúdo da exportação (ndjson ou csv) em blocos, em ordem
+    cronológica. Usa sessão própria, do pool "batch" e com o RLS do
+    solicitante: a resposta é transmitida depois que a sessão da requisição
+    (deps.get_db) já foi encerrada.
+    """
+    from app.core.rls import set_current_user_id
+    from app.db.session import BatchSessionLocal
+
+    db = BatchSessionLocal()
+    set_current_user_id(db, solicitante_id)
+    try:
+        linhas = LogRepository(db).iterar_exportacao(lote=LOTE_EXPORTACAO, **filtros)
+        blocos = _blocos_csv(linhas) if formato == "csv" else _blocos_ndjson(linhas)
+        yield from blocos
+    except Exception:
+        # O status 200 já foi enviado: o cliente recebe o arquivo truncado
+        logger.exception("Erro durante a exportação de logs")
+        raise
+    finally:
+        db.close()
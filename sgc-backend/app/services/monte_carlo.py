@@ -0,0 +1,72 @@
+# app/services/monte_carlo.py
+"""
+Núcleo numérico da simulação de projeções (somente NumPy).
+
+Mantido sem dependências da aplicação (banco, settings) porque é executado
+em processos do pool de simulação, iniciados por forkserver/spawn: os
+processos filhos importam este módulo do zero.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Meses de execução acumulados para as faixas de faturamento (30/60/90 dias)
+MESES_FATURAMENTO = 3
+
+# Cenários sorteados de uma vez: limita as matrizes (lote × horizonte) a
+# poucos MB por contrato, qualquer que seja a quantidade de cenários
+LOTE_CENARIOS = 2000
+
+
+def simular_bloco(historicos: Sequence[np.ndarray], saldos: np.ndarray, cenarios: int,
+                  horizonte: int, seed: Optional[np.random.SeedSequence] = None
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorteia, para cada contrato, ritmos mensais do próprio histórico
+    (bootstrap com reposição) ao longo de `horizonte` meses.
+
+    Retorna:
+      - termino: (cenarios,) meses (fracionários) até a conclusão do último
+        contrato simulado; inf quando algum não conclui dentro do horizonte;
+      - execucao: (cenarios, 3) valor executado pela carteira acumulado
+        em 1, 2 e 3 meses (limitado ao saldo de cada contrato).
+    Contratos com histórico vazio ou zerado devem ser filtrados pelo chamador.
+    """
+    rng = np.random.default_rng(seed)
+    termino = np.zeros(cenarios)
+    execucao = np.zeros((cenarios, MESES_FATURAMENTO))
+    for inicio in range(0, cenarios, LOTE_CENARIOS):
+        fim = min(inicio + LOTE_CENARIOS, cenarios)
+        _simular_lote(rng, historicos, saldos, horizonte, termino[inicio:fim], execucao[inicio:fim])
+    return termino, execucao
+
+
+def _simular_lote(rng: np.random.Generator, historicos: Sequence[np.ndarray], saldos: np.ndarray,
+                  horizonte: int, termino: np.ndarray, execucao: np.ndarray) -> None:
+    """Simula um lote de cenários, preenchendo `termino` e `execucao` (views do resultado)."""
+    cenarios = termino.shape[0]
+    meses_faturamento = min(MESES_FATURAMENTO, horizonte)
+
+    for historico, saldo in zip(historicos, saldos):
+        if saldo <= 0:
+            continue
+        sorteio = rng.choice(historico, size=(cenarios, horizonte))
+        acumulado = np.cumsum(sorteio, axis=1)
+        execucao[:, :meses_faturamento] += np.minimum(acumulado[:, :meses_faturamento], saldo)
+
+        # Mês em que o acumulado alcança o saldo, com interpolação dentro do mês
+        concluiu = acumulado[:, -1] >= saldo
+        meses = np.full(cenarios, np.inf)
+        linhas = np.nonzero(concluiu)[0]
+        if linhas.size:
+            mes = np.argmax(acumulado[linhas] >= saldo, axis=1)
+            anterior = np.where(mes > 0, acumulado[linhas, np.maximum(mes - 1, 0)], 0.0)
+            meses[linhas] = mes + (saldo - anterior) / sorteio[linhas, mes]
+        np.maximum(termino, meses, out=termino)
+
+
+def dividir_cenarios(cenarios: int, blocos: int) -> List[int]:
+    """Divide `cenarios` em até `blocos` partes quase iguais (sem partes vazias)."""
+    blocos = max(1, min(blocos, cenarios))
+    base, resto = divmod(cenarios, blocos)
+    return [base + (1 if i < resto else 0) for i in range(blocos)]
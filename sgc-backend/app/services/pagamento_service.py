@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 from decimal import Decimal
 
 from app.repositories.pagamento_repo import PagamentoRepository
+from app.repositories.base import Pagina, paginar
 from app.repositories.faturamento_repo import FaturamentoRepository
 from app.schemas.pagamento import PagamentoCreate, PagamentoUpdate
 from app.models.pagamento import Pagamento
@@ -70,13 +71,13 @@ class PagamentoService:
     # ------------------------------------------------------------------
     # LISTAR PAGAMENTOS (COM FILTRO OPCIONAL POR FATURAMENTO)
     # ------------------------------------------------------------------
-    def list_pagamentos(self, faturamento_id=None, contrato_id=None, skip=0, limit=100):
+    def list_pagamentos(self, faturamento_id=None, contrato_id=None, skip=0, limit=100, cursor=None) -> Pagina:
         query = self.db.query(Pagamento)
         if faturamento_id:
             query = query.filter(Pagamento.faturamento_id == faturamento_id)
         if contrato_id:
             query = query.join(Faturamento).join(BoletimMedicao).filter(BoletimMedicao.contrato_id == contrato_id)
-        return query.offset(skip).limit(limit).all()
+        return paginar(query, [Pagamento.id], skip=skip, limit=limit, cursor=cursor)
 
     # ------------------------------------------------------------------
     # ATUALIZAR PAGAMENTO
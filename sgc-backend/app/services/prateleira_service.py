@@ -9,6 +9,7 @@ from app.models.usuario import Usuario
 from app.repositories.prateleira_repository import PrateleiraRepository, BoletimPrateleiraRepository
 from app.repositories.contrato_repo import ContratoRepository
 from app.repositories.boletim_medicao_repo import BoletimMedicaoRepository
+from app.repositories.base import Pagina
 from app.schemas.prateleira import PrateleiraCreate, PrateleiraUpdate, VinculoPrateleiraCreate
 
 
@@ -64,21 +65,23 @@ class PrateleiraService:
         contrato_id: int,
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[PrateleiraExecucao]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Pagina:
         contrato = self.contrato_repo.get(contrato_id)
         if not contrato:
             raise HTTPException(status_code=404, detail="Contrato não encontrado")
-        return self.repo.get_by_contrato(contrato_id, status, skip, limit)
+        return self.repo.get_by_contrato(contrato_id, status, skip, limit, cursor)
 
     def list_global(
         self,
         contrato_id: Optional[int] = None,
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[PrateleiraExecucao]:
-        return self.repo.get_all_with_filters(contrato_id, status, skip, limit)
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Pagina:
+        return self.repo.get_all_with_filters(contrato_id, status, skip, limit, cursor)
 
     def get_pendentes_para_medicao(self, contrato_id: int) -> List[PrateleiraExecucao]:
         """Retorna itens disponíveis para seleção no modal de criação de BM."""
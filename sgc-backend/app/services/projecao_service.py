@@ -1,15 +1,193 @@
 # app/services/projecao_service.py
+"""
+Projeções financeiras (ritmo, previsão de término e faturamento 30/60/90 dias).
+
+O histórico mensal de execução de todos os contratos é carregado de
+fatos_mensais em uma única consulta para matrizes NumPy (contratos × meses);
+os indicadores de cada contrato e da carteira são calculados de forma
+vetorizada. Cenários Monte Carlo ficam em simulacao_projecao_service.py.
+"""
 import logging
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Optional
-from sqlalchemy import func
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.contrato import Contrato
-from app.models.boletim_medicao import BoletimMedicao
+from app.models.fato_mensal import FatoMensal
+from app.services.fato_mensal_service import primeiro_dia_do_mes
+from app.services.financeiro_service import obter_valores_por_contrato
 
 logger = logging.getLogger(__name__)
 
+# Janela usada para o ritmo recente (últimos 3 meses, arredondada para o mês)
+JANELA_RITMO_DIAS = 90
+# Meses de histórico carregados para as projeções e simulações
+JANELA_HISTORICO_MESES = 12
+# Limita a 1200 meses (100 anos) para evitar datas fora do intervalo
+MAX_MESES = 1200
+
+_PROJECAO_VAZIA = {
+    "ritmo_medio_mensal": 0.0,
+    "saldo_a_executar": 0.0,
+    "previsao_termino": None,
+    "faturamento_30d": 0.0,
+    "faturamento_60d": 0.0,
+    "faturamento_90d": 0.0
+}
+
+
+# ----------------------------------------------------------------------
+# HISTÓRICO MENSAL (uma consulta → matrizes contratos × meses)
+# ----------------------------------------------------------------------
+def _somar_meses(mes: date, quantidade: int) -> date:
+    total = mes.year * 12 + (mes.month - 1) + quantidade
+    return date(total // 12, total % 12 + 1, 1)
+
+
+@dataclass
+class HistoricoCarteira:
+    """
+    Estado da carteira em arrays alinhados por contrato (mesma ordem de `contratos`).
+    As matrizes mensais têm uma coluna por mês, de `meses[0]` até o mês corrente.
+    """
+    contratos: List[Contrato]
+    meses: List[date]
+    aprovado: np.ndarray            # (contratos × meses) valor aprovado no mês
+    qtd_boletins: np.ndarray        # (contratos × meses) BMs executados no mês
+    valor_total: np.ndarray         # (contratos,)
+    valor_executado: np.ndarray     # (contratos,)
+    meses_desde_inicio: np.ndarray  # (contratos,) NaN quando não há data de início
+    mes_inicio: np.ndarray          # (contratos,) coluna do mês de início (0 se anterior à janela)
+
+    @property
+    def saldo_a_executar(self) -> np.ndarray:
+        return self.valor_total - self.valor_executado
+
+
+def carregar_historico(db: Session, contratos: Iterable[Contrato], hoje: Optional[date] = None,
+                       meses: int = JANELA_HISTORICO_MESES) -> HistoricoCarteira:
+    """Carrega o histórico mensal dos contratos (uma consulta em fatos_mensais + saldos)."""
+    contratos = list(contratos)
+    hoje = hoje or date.today()
+    mes_atual = primeiro_dia_do_mes(hoje)
+    lista_meses = [_somar_meses(mes_atual, -i) for i in range(meses, -1, -1)]
+    posicao_mes = {m: i for i, m in enumerate(lista_meses)}
+    posicao_contrato = {c.id: i for i, c in enumerate(contratos)}
+
+    aprovado = np.zeros((len(contratos), len(lista_meses)))
+    qtd = np.zeros((len(contratos), len(lista_meses)))
+    if contratos:
+        linhas = db.execute(
+            select(
+                FatoMensal.contrato_id,
+                FatoMensal.mes,
+                FatoMensal.valor_aprovado,
+                FatoMensal.qtd_boletins_aprovados,
+            ).where(
+                FatoMensal.contrato_id.in_(list(posicao_contrato)),
+                FatoMensal.mes >= lista_meses[0],
+                FatoMensal.mes <= mes_atual,
+            )
+        ).all()
+        if linhas:
+            cids, mes_linha, valores, quantidades = zip(*linhas)
+            idx_linhas = np.fromiter((posicao_contrato[c] for c in cids), dtype=np.intp, count=len(linhas))
+            idx_colunas = np.fromiter((posicao_mes[m] for m in mes_linha), dtype=np.intp, count=len(linhas))
+            aprovado[idx_linhas, idx_colunas] = np.asarray(valores, dtype=float)
+            qtd[idx_linhas, idx_colunas] = np.asarray(quantidades, dtype=float)
+
+    valores_contratos = obter_valores_por_contrato(db, list(posicao_contrato))
+    valor_total = np.array([float(c.valor_total or 0) for c in contratos], dtype=float)
+    valor_executado = np.array([valores_contratos[c.id][0] for c in contratos], dtype=float)
+    meses_desde_inicio = np.array(
+        [(hoje - c.data_inicio).days / 30 if c.data_inicio else np.nan for c in contratos],
+        dtype=float,
+    )
+    mes_inicio = np.array([
+        posicao_mes.get(primeiro_dia_do_mes(c.data_inicio), 0)
+        if c.data_inicio and c.data_inicio >= lista_meses[0] else 0
+        for c in contratos
+    ], dtype=np.intp)
+
+    return HistoricoCarteira(
+        contratos=contratos,
+        meses=lista_meses,
+        aprovado=aprovado,
+        qtd_boletins=qtd,
+        valor_total=valor_total,
+        valor_executado=valor_executado,
+        meses_desde_inicio=meses_desde_inicio,
+        mes_inicio=mes_inicio,
+    )
+
+
+def ritmo_medio_mensal(historico: HistoricoCarteira, hoje: Optional[date] = None) -> np.ndarray:
+    """
+    Ritmo médio mensal de cada contrato (vetorizado): média dos boletins da
+    janela recente (a partir do mês de hoje - 90 dias); sem boletins na
+    janela, usa o histórico total desde o início (mínimo 1 mês).
+    """
+    hoje = hoje or date.today()
+    inicio_janela = primeiro_dia_do_mes(hoje - timedelta(days=JANELA_RITMO_DIAS))
+    janela = np.array([m >= inicio_janela for m in historico.meses])
+
+    total_recente = historico.aprovado[:, janela].sum(axis=1)
+    qtd_recente = historico.qtd_boletins[:, janela].sum(axis=1)
+
+    com_inicio = ~np.isnan(historico.meses_desde_inicio)
+    meses_desde_inicio = np.maximum(np.nan_to_num(historico.meses_desde_inicio), 1)  # mínimo 1 mês
+    fallback = np.where(com_inicio, historico.valor_executado / meses_desde_inicio, 0.0)
+
+    return np.where(qtd_recente > 0, total_recente / np.maximum(qtd_recente, 1), fallback)
+
+
+# ----------------------------------------------------------------------
+# MONTAGEM
+# ----------------------------------------------------------------------
+def _previsao_termino(saldo_a_executar: float, ritmo_mensal: float, hoje: date) -> Optional[str]:
+    if ritmo_mensal <= 0 or saldo_a_executar <= 0:
+        return None
+    meses_restantes = saldo_a_executar / ritmo_mensal
+    if meses_restantes > MAX_MESES:
+        return None
+    data_prevista = hoje + timedelta(days=meses_restantes * 30)
+    return data_prevista.strftime("%d/%m/%Y")
+
+
+def _montar_projecao(ritmo_medio_mensal: float, saldo_a_executar: float, hoje: date) -> dict:
+    # Projeções de faturamento (mantendo o mesmo ritmo)
+    return {
+        "ritmo_medio_mensal": round(ritmo_medio_mensal, 2),
+        "saldo_a_executar": round(saldo_a_executar, 2),
+        "previsao_termino": _previsao_termino(saldo_a_executar, ritmo_medio_mensal, hoje),
+        "faturamento_30d": round(ritmo_medio_mensal * 1, 2),
+        "faturamento_60d": round(ritmo_medio_mensal * 2, 2),
+        "faturamento_90d": round(ritmo_medio_mensal * 3, 2)
+    }
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+def calcular_projecoes_de_contratos(db: Session, contratos: Iterable[Contrato]) -> Dict[int, dict]:
+    """
+    Projeção financeira de vários contratos já carregados, com um número
+    constante de consultas. Retorna {contrato_id: projecao}.
+    """
+    hoje = date.today()
+    historico = carregar_historico(db, contratos, hoje)
+    ritmos = ritmo_medio_mensal(historico, hoje)
+    saldos = historico.saldo_a_executar
+    return {
+        c.id: _montar_projecao(float(ritmos[i]), float(saldos[i]), hoje)
+        for i, c in enumerate(historico.contratos)
+    }
+
+
 def calcular_projecao_contrato(db: Session, contrato_id: int) -> dict:
     """
     Calcula a projeção financeira para um contrato específico.
@@ -22,115 +200,27 @@ def calcular_projecao_contrato(db: Session, contrato_id: int) -> dict:
         - faturamento_60d: float
         - faturamento_90d: float
     """
-    # Busca o contrato
     contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
     if not contrato:
         raise ValueError("Contrato não encontrado")
-
-    valor_total = float(contrato.valor_total) if contrato.valor_total else 0.0
-
-    # Calcula o valor executado (boletins aprovados/faturados)
-    valor_executado = db.query(BoletimMedicao).filter(
-    BoletimMedicao.contrato_id == contrato_id,
-    BoletimMedicao.status.in_(["APROVADO", "FATURADO"])
-).with_entities(func.sum(BoletimMedicao.valor_aprovado)).scalar() or 0.0
-    valor_executado = float(valor_executado)
-
-    saldo_a_executar = valor_total - valor_executado
-
-    # Busca boletins dos últimos 3 meses
-    tres_meses_atras = date.today() - timedelta(days=90)
-    boletins_recentes = db.query(BoletimMedicao).filter(
-        BoletimMedicao.contrato_id == contrato_id,
-        BoletimMedicao.status.in_(["APROVADO", "FATURADO"]),
-        BoletimMedicao.periodo_fim >= tres_meses_atras
-    ).all()
-
-    # Calcula o ritmo médio mensal
-    if boletins_recentes:
-        total_recente = sum(float(b.valor_aprovado or 0) for b in boletins_recentes)
-        ritmo_medio_mensal = total_recente / len(boletins_recentes)
-    else:
-        # Fallback: usa o histórico total se houver data de início
-        if contrato.data_inicio:
-            dias_desde_inicio = (date.today() - contrato.data_inicio).days
-            meses_desde_inicio = max(dias_desde_inicio / 30, 1)  # mínimo 1 mês
-            ritmo_medio_mensal = valor_executado / meses_desde_inicio
-        else:
-            ritmo_medio_mensal = 0.0
-
-    # Previsão de término
-        # Previsão de término
-    previsao_termino: Optional[str] = None
-    if ritmo_medio_mensal > 0 and saldo_a_executar > 0:
-        meses_restantes = saldo_a_executar / ritmo_medio_mensal
-        # Limita a 1200 meses (100 anos) para evitar datas fora do intervalo
-        MAX_MESES = 1200
-        if meses_restantes > MAX_MESES:
-            previsao_termino = None
-        else:
-            data_prevista = date.today() + timedelta(days=meses_restantes * 30)
-            previsao_termino = data_prevista.strftime("%d/%m/%Y")
-
-    # Projeções de faturamento (mantendo o mesmo ritmo)
-    fat_30d = ritmo_medio_mensal * 1
-    fat_60d = ritmo_medio_mensal * 2
-    fat_90d = ritmo_medio_mensal * 3
-
-    return {
-        "ritmo_medio_mensal": round(ritmo_medio_mensal, 2),
-        "saldo_a_executar": round(saldo_a_executar, 2),
-        "previsao_termino": previsao_termino,
-        "faturamento_30d": round(fat_30d, 2),
-        "faturamento_60d": round(fat_60d, 2),
-        "faturamento_90d": round(fat_90d, 2)
-    }
+    return calcular_projecoes_de_contratos(db, [contrato])[contrato.id]
 
 
 def calcular_projecao_global(db: Session) -> dict:
     """
     Calcula a projeção financeira global (soma de todos os contratos ativos).
+    O saldo é a soma dos saldos; o ritmo é a média dos ritmos individuais.
+    A dispersão dos ritmos é tratada pela simulação (simulacao_projecao_service).
     """
-    # Filtra contratos com status 'ATIVO'
     contratos = db.query(Contrato).filter(Contrato.status == "ATIVO").all()
     if not contratos:
-        return {
-            "ritmo_medio_mensal": 0.0,
-            "saldo_a_executar": 0.0,
-            "previsao_termino": None,
-            "faturamento_30d": 0.0,
-            "faturamento_60d": 0.0,
-            "faturamento_90d": 0.0
-        }
-
-    total_saldo = 0.0
-    total_ritmo = 0.0
-    count = 0
-
-    for contrato in contratos:
-        try:
-            proj = calcular_projecao_contrato(db, contrato.id)
-            total_saldo += proj["saldo_a_executar"]
-            total_ritmo += proj["ritmo_medio_mensal"]
-            count += 1
-        except Exception as e:
-            logger.error(f"Erro ao calcular projeção para contrato {contrato.id}: {e}")
-            continue
-
-    ritmo_medio_global = total_ritmo / count if count else 0.0
-    saldo_global = total_saldo
-
-    previsao_global = None
-    if ritmo_medio_global > 0 and saldo_global > 0:
-        meses = saldo_global / ritmo_medio_global
-        data_prevista = date.today() + timedelta(days=meses * 30)
-        previsao_global = data_prevista.strftime("%d/%m/%Y")
+        return dict(_PROJECAO_VAZIA)
 
-    return {
-        "ritmo_medio_mensal": round(ritmo_medio_global, 2),
-        "saldo_a_executar": round(saldo_global, 2),
-        "previsao_termino": previsao_global,
-        "faturamento_30d": round(ritmo_medio_global * 1, 2),
-        "faturamento_60d": round(ritmo_medio_global * 2, 2),
-        "faturamento_90d": round(ritmo_medio_global * 3, 2)
-    }
\ No newline at end of file
+    hoje = date.today()
+    historico = carregar_historico(db, contratos, hoje)
+    ritmos = ritmo_medio_mensal(historico, hoje)
+    # Mesmo arredondamento por contrato da projeção individual
+    saldo_global = float(np.round(historico.saldo_a_executar, 2).sum())
+    ritmo_medio_global = float(np.round(ritmos, 2).mean())
+
+    return _montar_projecao(ritmo_medio_global, saldo_global, hoje)
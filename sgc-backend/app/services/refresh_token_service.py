@@ -0,0 +1,107 @@
+# app/services/refresh_token_service.py
+"""
+Sessões de login com refresh token.
+
+O login (senha/AD) emite um access token curto (JWT) e um refresh token
+opaco. Com o refresh token, /auth/refresh emite um novo access token sem
+verificar a senha de novo — o bcrypt e o AD só são usados no login.
+
+- Armazenamento: apenas o SHA-256 do token (vazamento do banco não expõe
+  tokens utilizáveis).
+- Rotação: cada refresh marca o token como usado e emite outro na mesma
+  família (uma família por login).
+- Reuso: apresentar um token já usado (fora da tolerância para abas
+  concorrentes) revoga a família inteira; quem tinha o token legítimo
+  precisa logar de novo.
+- Revogação: logout revoga a família; usuário desativado não renova.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+from app.models.usuario import Usuario
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _token_invalido(detalhe: str = "Refresh token inválido ou expirado") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detalhe,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+class RefreshTokenService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = RefreshTokenRepository(db)
+
+    def emitir(self, usuario_id: int, familia: Optional[str] = None,
+               ip: Optional[str] = None, user_agent: Optional[str] = None) -> str:
+        """Cria um refresh token (nova família se `familia` não for informada) e faz commit."""
+        agora = _agora()
+        if familia is None:
+            # Novo login: aproveita para apagar os tokens vencidos do usuário
+            self.repo.remover_expirados_do_usuario(usuario_id, agora)
+        token = secrets.token_urlsafe(48)
+        self.repo.create(
+            token_hash=_hash(token),
+            familia=familia or str(uuid.uuid4()),
+            usuario_id=usuario_id,
+            expira_em=agora + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            ip=ip,
+            user_agent=(user_agent or "")[:255] or None,
+        )
+        self.db.commit()
+        return token
+
+    def rotacionar(self, token: str, ip: Optional[str] = None,
+                   user_agent: Optional[str] = None) -> Tuple[Usuario, str]:
+        """Valida e consome o refresh token; retorna o usuário e o token seguinte."""
+        agora = _agora()
+        atual = self.repo.get_by_hash_para_atualizar(_hash(token))
+        if atual is None or atual.revogado_em is not None:
+            raise _token_invalido()
+
+        if atual.usado_em is not None:
+            tolerancia = timedelta(seconds=settings.REFRESH_TOKEN_REUSO_TOLERANCIA_SEGUNDOS)
+            if agora - atual.usado_em > tolerancia:
+                # Token já rotacionado reapresentado: possível vazamento
+                self.repo.revogar_familia(atual.familia, agora)
+                self.db.commit()
+            raise _token_invalido()
+
+        if atual.expira_em <= agora:
+            raise _token_invalido()
+
+        usuario = self.db.get(Usuario, atual.usuario_id)
+        if usuario is None or not usuario.ativo:
+            self.repo.revogar_familia(atual.familia, agora)
+            self.db.commit()
+            raise _token_invalido("Usuário inativo")
+
+        atual.usado_em = agora
+        novo = self.emitir(usuario.id, familia=atual.familia, ip=ip, user_agent=user_agent)
+        return usuario, novo
+
+    def revogar(self, token: str) -> None:
+        """Logout: revoga a família do token (sem erro se já inválido)."""
+        atual = self.repo.get_by_hash_para_atualizar(_hash(token))
+        if atual is not None:
+            self.repo.revogar_familia(atual.familia, _agora())
+            self.db.commit()
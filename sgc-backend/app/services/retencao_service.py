@@ -0,0 +1,125 @@
+# app/services/retencao_service.py
+"""
+Retenções de impostos das NFs (ISS, INSS, IRRF, CSLL, PIS, COFINS),
+calculadas sobre o valor bruto com as alíquotas do contrato do BM.
+
+Chamado pelos listeners de Faturamento (app/models/events.py, seção 5):
+no before_flush, as NFs novas e alteradas do flush são calculadas em lote,
+com uma consulta para os BMs (que traz também a versão dos impostos de
+cada contrato) e outra para as alíquotas dos contratos que não estão no
+cache (app/core/aliquotas.py) nessa versão.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.aliquotas import cache_aliquotas
+from app.models.boletim_medicao import BoletimMedicao
+from app.models.contrato import Contrato
+from app.models.contrato_imposto import ContratoImposto
+from app.models.faturamento import Faturamento
+
+ZERO = Decimal('0')
+CEM = Decimal('100')
+
+# Imposto (contrato_impostos.tipo_imposto) -> coluna da retenção na NF
+RETENCOES = {
+    'ISS': 'iss_retido',
+    'INSS': 'inss_retido',
+    'IRRF': 'irrf_retido',
+    'CSLL': 'csll_retido',
+    'PIS': 'pis_retido',
+    'COFINS': 'cofins_retido',
+}
+
+
+def incrementar_versao_impostos(connection: Connection, contrato_ids: Iterable[int]) -> None:
+    """Marca os impostos dos contratos como alterados (invalida o cache de alíquotas)."""
+    connection.execute(
+        update(Contrato.__table__)
+        .where(Contrato.__table__.c.id.in_(sorted(contrato_ids)))
+        .values(impostos_versao=Contrato.__table__.c.impostos_versao + 1)
+    )
+
+
+def aliquotas_por_contrato(session: Session, contrato_ids: Iterable[int],
+                           versoes: Optional[Dict[int, int]] = None) -> Dict[int, Dict[str, Decimal]]:
+    """
+    Alíquotas ({tipo_imposto: aliquota}) de cada contrato, com uma única
+    consulta para os que não estão no cache na versão atual dos impostos.
+    `versoes` ({contrato_id: impostos_versao}) evita a consulta das versões
+    quando já foram lidas. Contratos sem impostos configurados têm
+    dicionário vazio.
+    """
+    contrato_ids = set(contrato_ids)
+    if versoes is None:
+        versoes = dict(session.execute(
+            select(Contrato.id, Contrato.impostos_versao).where(Contrato.id.in_(contrato_ids))
+        ).all())
+
+    resultado: Dict[int, Dict[str, Decimal]] = {}
+    faltantes = []
+    for contrato_id in contrato_ids:
+        aliquotas = cache_aliquotas.obter(contrato_id, versoes.get(contrato_id))
+        if aliquotas is None:
+            faltantes.append(contrato_id)
+        else:
+            resultado[contrato_id] = aliquotas
+
+    if faltantes:
+        lidas: Dict[int, Dict[str, Decimal]] = {contrato_id: {} for contrato_id in faltantes}
+        linhas = session.execute(
+            select(ContratoImposto.contrato_id, ContratoImposto.tipo_imposto, ContratoImposto.aliquota)
+            .where(ContratoImposto.contrato_id.in_(faltantes))
+        )
+        for contrato_id, tipo_imposto, aliquota in linhas:
+            lidas[contrato_id][tipo_imposto] = aliquota
+        for contrato_id, aliquotas in lidas.items():
+            cache_aliquotas.guardar(contrato_id, aliquotas, versoes.get(contrato_id))
+        resultado.update(lidas)
+    return resultado
+
+
+def aplicar_retencoes(faturamento: Faturamento, aliquotas: Dict[str, Decimal]) -> None:
+    """Preenche as retenções e o valor líquido da NF. Sem alíquotas, retenções zeradas."""
+    total_retencoes = ZERO
+    for imposto, coluna in RETENCOES.items():
+        valor = faturamento.valor_bruto_nf * (aliquotas.get(imposto, ZERO) / CEM) if aliquotas else ZERO
+        setattr(faturamento, coluna, valor)
+        total_retencoes += valor
+    faturamento.valor_liquido_nf = faturamento.valor_bruto_nf - total_retencoes
+
+
+def calcular_retencoes_em_lote(session: Session, faturamentos: Iterable[Faturamento]) -> List[Faturamento]:
+    """
+    Calcula as retenções de várias NFs: uma consulta para os contratos dos
+    BMs (e a versão dos seus impostos) e no máximo uma para as alíquotas. Retorna as NFs calculadas (NFs
+    sem BM, ou de BM inexistente, ficam como estão).
+    """
+    faturamentos = [f for f in faturamentos if f.bm_id]
+    if not faturamentos:
+        return []
+
+    contrato_do_bm = {}
+    versoes = {}
+    linhas = session.execute(
+        select(BoletimMedicao.id, BoletimMedicao.contrato_id, Contrato.impostos_versao)
+        .outerjoin(Contrato, Contrato.id == BoletimMedicao.contrato_id)
+        .where(BoletimMedicao.id.in_({f.bm_id for f in faturamentos}))
+    )
+    for bm_id, contrato_id, versao in linhas:
+        contrato_do_bm[bm_id] = contrato_id
+        versoes[contrato_id] = versao
+    aliquotas = aliquotas_por_contrato(session, contrato_do_bm.values(), versoes)
+
+    calculados = []
+    for faturamento in faturamentos:
+        contrato_id = contrato_do_bm.get(faturamento.bm_id)
+        if contrato_id is None:
+            continue
+        aplicar_retencoes(faturamento, aliquotas[contrato_id])
+        calculados.append(faturamento)
+    return calculados
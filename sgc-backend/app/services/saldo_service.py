@@ -0,0 +1,86 @@
+# app/services/saldo_service.py
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.contrato_saldo import ContratoSaldo
+from app.services.financeiro_service import (
+    consulta_executado_por_contrato,
+    consulta_faturado_por_contrato,
+    consulta_recebido_por_contrato,
+)
+
+
+def _consulta_saldos(contrato_ids: Optional[Iterable[int]] = None):
+    """SELECT (contrato_id, executado, faturado, recebido) derivado das tabelas de origem."""
+    executado = consulta_executado_por_contrato(contrato_ids).subquery()
+    faturado = consulta_faturado_por_contrato(contrato_ids).subquery()
+    recebido = consulta_recebido_por_contrato(contrato_ids).subquery()
+
+    stmt = select(
+        Contrato.id,
+        func.coalesce(executado.c.valor, 0),
+        func.coalesce(faturado.c.valor, 0),
+        func.coalesce(recebido.c.valor, 0),
+    ).outerjoin(
+        executado, executado.c.contrato_id == Contrato.id
+    ).outerjoin(
+        faturado, faturado.c.contrato_id == Contrato.id
+    ).outerjoin(
+        recebido, recebido.c.contrato_id == Contrato.id
+    )
+    if contrato_ids is not None:
+        stmt = stmt.where(Contrato.id.in_(list(contrato_ids)))
+    return stmt
+
+
+def _upsert_saldos(contrato_ids: Optional[Iterable[int]] = None):
+    insert_stmt = pg_insert(ContratoSaldo).from_select(
+        ["contrato_id", "valor_executado", "valor_faturado", "valor_recebido"],
+        _consulta_saldos(contrato_ids),
+    )
+    return insert_stmt.on_conflict_do_update(
+        index_elements=[ContratoSaldo.contrato_id],
+        set_={
+            "valor_executado": insert_stmt.excluded.valor_executado,
+            "valor_faturado": insert_stmt.excluded.valor_faturado,
+            "valor_recebido": insert_stmt.excluded.valor_recebido,
+            "atualizado_em": func.now(),
+        },
+    )
+
+
+def atualizar_saldos(connection: Connection, contrato_ids: Iterable[int]) -> None:
+    """
+    Recalcula a linha de contrato_saldos dos contratos informados,
+    na transação corrente (chamado pelo after_flush em events.py).
+
+    As linhas dos contratos são bloqueadas (FOR NO KEY UPDATE, em ordem de id)
+    antes do recálculo: duas transações que escrevem no mesmo contrato são
+    serializadas e a segunda enxerga os lançamentos já confirmados da primeira.
+    """
+    contrato_ids = sorted(set(contrato_ids))
+    if not contrato_ids:
+        return
+    connection.execute(
+        select(Contrato.id)
+        .where(Contrato.id.in_(contrato_ids))
+        .order_by(Contrato.id)
+        .with_for_update(key_share=True)
+    )
+    connection.execute(_upsert_saldos(contrato_ids))
+
+
+def reconstruir_saldos(db: Session) -> int:
+    """
+    Re-deriva contrato_saldos inteira a partir de boletins, faturamentos e pagamentos.
+    Retorna a quantidade de contratos processados.
+    """
+    resultado = db.execute(_upsert_saldos())
+    db.commit()
+    return resultado.rowcount
+
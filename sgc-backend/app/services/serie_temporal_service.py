@@ -0,0 +1,211 @@
+# app/services/serie_temporal_service.py
+"""
+Séries temporais acumuladas (físico, financeiro e tempo) para os gráficos.
+
+Cada série vem de uma única consulta: os lançamentos são agrupados por
+período com date_trunc, os períodos sem lançamento são preenchidos com
+generate_series e o acumulado é uma soma em janela (SUM() OVER).
+Lançamentos anteriores ao início do intervalo caem no primeiro período,
+de modo que o acumulado sempre parte do histórico completo do contrato.
+
+A granularidade mensal lê o consolidado fatos_mensais; dia e semana
+agregam diretamente boletins e pagamentos.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.models.boletim_medicao import BoletimMedicao
+from app.models.contrato import Contrato
+from app.models.faturamento import Faturamento
+from app.models.fato_mensal import FatoMensal
+from app.models.pagamento import Pagamento
+from app.services.financeiro_service import STATUS_BM_EXECUTADO
+
+# granularidade da API -> unidade do date_trunc do PostgreSQL
+GRANULARIDADES = {
+    "dia": "day",
+    "semana": "week",
+    "mes": "month",
+}
+
+# Proteção contra intervalos gigantes (ex.: 10 anos com granularidade diária)
+MAX_PERIODOS = 1000
+
+
+def _trunc(unidade: str, valor):
+    return func.date_trunc(unidade, cast(valor, DateTime))
+
+
+def _serie_acumulada(db: Session, coluna_data, coluna_valor, filtros: Sequence,
+                     joins: Sequence, inicio: date, fim: date, unidade: str) -> List[Tuple[date, float]]:
+    """
+    Retorna [(inicio_do_periodo, valor_acumulado)] para todos os períodos
+    entre `inicio` e `fim`, em uma única consulta.
+    """
+    passo = literal_column(f"interval '1 {unidade}'")
+    primeiro = _trunc(unidade, inicio)
+    ultimo = _trunc(unidade, fim)
+
+    periodos = select(
+        func.generate_series(primeiro, ultimo, passo).label("periodo")
+    ).subquery("periodos")
+
+    periodo_lancamento = func.greatest(_trunc(unidade, coluna_data), primeiro)
+    lancamentos = select(
+        periodo_lancamento.label("periodo"),
+        func.sum(coluna_valor).label("valor"),
+    )
+    for alvo, condicao in joins:
+        lancamentos = lancamentos.join(alvo, condicao)
+    lancamentos = lancamentos.where(
+        *filtros,
+        cast(coluna_data, DateTime) < ultimo + passo,
+    ).group_by(periodo_lancamento).subquery("lancamentos")
+
+    acumulado = func.sum(func.coalesce(lancamentos.c.valor, 0)).over(order_by=periodos.c.periodo)
+    linhas = db.execute(
+        select(periodos.c.periodo, acumulado)
+        .select_from(periodos)
+        .outerjoin(lancamentos, lancamentos.c.periodo == periodos.c.periodo)
+        .order_by(periodos.c.periodo)
+    ).all()
+    return [(periodo.date(), float(valor or 0)) for periodo, valor in linhas]
+
+
+def serie_fisica(db: Session, contrato_ids: List[int], inicio: date, fim: date,
+                 unidade: str) -> List[Tuple[date, float]]:
+    """Valor aprovado acumulado dos BMs executados, por período de fim da medição."""
+    if unidade == "month":
+        return _serie_acumulada(
+            db,
+            coluna_data=FatoMensal.mes,
+            coluna_valor=FatoMensal.valor_aprovado,
+            filtros=[FatoMensal.contrato_id.in_(contrato_ids)],
+            joins=[],
+            inicio=inicio, fim=fim, unidade=unidade,
+        )
+    return _serie_acumulada(
+        db,
+        coluna_data=BoletimMedicao.periodo_fim,
+        coluna_valor=BoletimMedicao.valor_aprovado,
+        filtros=[
+            BoletimMedicao.contrato_id.in_(contrato_ids),
+            BoletimMedicao.status.in_(STATUS_BM_EXECUTADO),
+        ],
+        joins=[],
+        inicio=inicio, fim=fim, unidade=unidade,
+    )
+
+
+def serie_financeira(db: Session, contrato_ids: List[int], inicio: date, fim: date,
+                     unidade: str) -> List[Tuple[date, float]]:
+    """Valor recebido acumulado (NFs não canceladas), por data de pagamento."""
+    if unidade == "month":
+        return _serie_acumulada(
+            db,
+            coluna_data=FatoMensal.mes,
+            coluna_valor=FatoMensal.valor_recebido,
+            filtros=[FatoMensal.contrato_id.in_(contrato_ids)],
+            joins=[],
+            inicio=inicio, fim=fim, unidade=unidade,
+        )
+    return _serie_acumulada(
+        db,
+        coluna_data=Pagamento.data_pagamento,
+        coluna_valor=Pagamento.valor_pago,
+        filtros=[
+            BoletimMedicao.contrato_id.in_(contrato_ids),
+            Faturamento.status != "CANCELADO",
+        ],
+        joins=[
+            (Faturamento, Faturamento.id == Pagamento.faturamento_id),
+            (BoletimMedicao, BoletimMedicao.id == Faturamento.bm_id),
+        ],
+        inicio=inicio, fim=fim, unidade=unidade,
+    )
+
+
+def _fim_do_periodo(periodo: date, unidade: str) -> date:
+    if unidade == "day":
+        return periodo
+    if unidade == "week":
+        return periodo + timedelta(days=6)
+    proximo = (periodo.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return proximo - timedelta(days=1)
+
+
+def _percentual_tempo(contrato: Contrato, data_ref: date) -> Optional[float]:
+    if not contrato.data_inicio or not contrato.data_fim_prevista:
+        return None
+    dias_totais = (contrato.data_fim_prevista - contrato.data_inicio).days
+    if dias_totais <= 0:
+        return 0.0
+    dias_decorridos = (data_ref - contrato.data_inicio).days
+    return max(0.0, min(100.0, dias_decorridos / dias_totais * 100))
+
+
+def _rotulo(periodo: date, unidade: str) -> str:
+    if unidade == "month":
+        return f"{periodo.month:02d}/{periodo.year}"
+    return periodo.strftime("%d/%m/%Y")
+
+
+def intervalo_padrao(meses: int, hoje: Optional[date] = None) -> Tuple[date, date]:
+    """Primeiro dia do mês de (hoje - meses + 1) até hoje."""
+    hoje = hoje or date.today()
+    total = hoje.year * 12 + (hoje.month - 1) - (max(meses, 1) - 1)
+    return date(total // 12, total % 12 + 1, 1), hoje
+
+
+def contar_periodos(inicio: date, fim: date, unidade: str) -> int:
+    if unidade == "day":
+        return (fim - inicio).days + 1
+    if unidade == "week":
+        return (fim - inicio).days // 7 + 2
+    return (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+
+
+def calcular_evolucao(db: Session, contratos: List[Contrato], inicio: date, fim: date,
+                      granularidade: str = "mes") -> Dict[str, Any]:
+    """
+    Evolução acumulada (em % do valor total somado dos contratos) de um ou
+    mais contratos: {"labels", "fisico", "financeiro", "tempo"}.
+    O % de tempo de vários contratos é ponderado pelo valor total de cada um.
+    """
+    unidade = GRANULARIDADES[granularidade]
+    if not contratos:
+        return {"labels": [], "fisico": [], "financeiro": [], "tempo": []}
+
+    ids = [c.id for c in contratos]
+    valor_total = sum(float(c.valor_total or 0) for c in contratos)
+
+    fisico = serie_fisica(db, ids, inicio, fim, unidade)
+    financeiro = serie_financeira(db, ids, inicio, fim, unidade)
+
+    def _perc(valor: float) -> float:
+        return round(valor / valor_total * 100, 2) if valor_total else 0
+
+    tempo = []
+    for periodo, _ in fisico:
+        data_ref = _fim_do_periodo(periodo, unidade)
+        pesos = [
+            (_percentual_tempo(c, data_ref), float(c.valor_total or 0)) for c in contratos
+        ]
+        pesos = [(p, v) for p, v in pesos if p is not None]
+        soma_pesos = sum(v for _, v in pesos)
+        if len(contratos) == 1:
+            tempo.append(round(pesos[0][0], 2) if pesos else 0)
+        elif soma_pesos:
+            tempo.append(round(sum(p * v for p, v in pesos) / soma_pesos, 2))
+        else:
+            tempo.append(0)
+
+    return {
+        "labels": [_rotulo(periodo, unidade) for periodo, _ in fisico],
+        "fisico": [_perc(valor) for _, valor in fisico],
+        "financeiro": [_perc(valor) for _, valor in financeiro],
+        "tempo": tempo,
+    }
@@ -0,0 +1,170 @@
+# app/services/simulacao_projecao_service.py
+"""
+Projeção por simulação Monte Carlo.
+
+Em vez de um ritmo médio fixo, cada cenário sorteia os ritmos mensais de
+cada contrato a partir do seu histórico recente (fatos_mensais), o que
+reflete a variabilidade da execução. Os cenários são distribuídos em um
+pool de processos (ver monte_carlo.py) e resumidos em percentis:
+P50/P80/P95 da data de término e faixas P10/P50/P90 de faturamento em
+30/60/90 dias.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.processos import criar_pool_processos
+from app.models.contrato import Contrato
+from app.services.monte_carlo import dividir_cenarios, simular_bloco
+from app.services.projecao_service import HistoricoCarteira, carregar_historico
+
+logger = logging.getLogger(__name__)
+
+# Horizonte máximo simulado (10 anos); término além disso → previsão nula
+HORIZONTE_MESES = 120
+# Abaixo disso (cenários × contratos) não compensa despachar para o pool
+MIN_TRABALHO_PARALELO = 20_000
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _processos() -> int:
+    return settings.PROJECAO_SIMULACAO_PROCESSOS or os.cpu_count() or 1
+
+
+def _obter_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = criar_pool_processos(_processos())
+        return _executor
+
+
+def encerrar_pool_simulacao() -> None:
+    """Encerra o pool de processos (chamado no shutdown da aplicação)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ----------------------------------------------------------------------
+# PREPARAÇÃO
+# ----------------------------------------------------------------------
+def _historicos_para_simulacao(historico: HistoricoCarteira):
+    """
+    Séries de ritmos mensais (meses completos desde o início do contrato,
+    dentro da janela carregada) dos contratos com saldo a executar.
+    Retorna (series, saldos, qtd_sem_historico).
+    """
+    saldos = historico.saldo_a_executar
+    series: List[np.ndarray] = []
+    saldos_simulados: List[float] = []
+    sem_historico = 0
+    for i in range(len(historico.contratos)):
+        if saldos[i] <= 0:
+            continue
+        # A última coluna é o mês corrente (incompleto) e fica de fora
+        serie = historico.aprovado[i, historico.mes_inicio[i]:-1]
+        if serie.size == 0 or not np.any(serie > 0):
+            sem_historico += 1
+            continue
+        series.append(serie)
+        saldos_simulados.append(float(saldos[i]))
+    return series, np.array(saldos_simulados, dtype=float), sem_historico
+
+
+def _executar_cenarios(series: List[np.ndarray], saldos: np.ndarray, cenarios: int,
+                       seed: Optional[int]):
+    processos = _processos()
+    if processos == 1 or cenarios * max(len(series), 1) < MIN_TRABALHO_PARALELO:
+        return simular_bloco(series, saldos, cenarios, HORIZONTE_MESES, np.random.SeedSequence(seed))
+
+    partes = dividir_cenarios(cenarios, processos)
+    sementes = np.random.SeedSequence(seed).spawn(len(partes))
+    executor = _obter_executor()
+    futuros = [
+        executor.submit(simular_bloco, series, saldos, qtd, HORIZONTE_MESES, semente)
+        for qtd, semente in zip(partes, sementes)
+    ]
+    resultados = [f.result() for f in futuros]
+    return (
+        np.concatenate([r[0] for r in resultados]),
+        np.concatenate([r[1] for r in resultados]),
+    )
+
+
+# ----------------------------------------------------------------------
+# MONTAGEM
+# ----------------------------------------------------------------------
+def _data_termino(meses: float, hoje: date) -> Optional[str]:
+    if not np.isfinite(meses):
+        return None
+    return (hoje + timedelta(days=float(meses) * 30)).strftime("%d/%m/%Y")
+
+
+def _faixa(valores: np.ndarray) -> Dict[str, float]:
+    p10, p50, p90 = np.percentile(valores, [10, 50, 90])
+    return {"p10": round(float(p10), 2), "p50": round(float(p50), 2), "p90": round(float(p90), 2)}
+
+
+def simular_projecao(db: Session, contratos: List[Contrato], cenarios: int = 5000,
+                     seed: Optional[int] = None) -> dict:
+    """
+    Simula a conclusão dos contratos informados (um ou a carteira inteira).
+    O término da carteira em cada cenário é o do último contrato a concluir.
+    """
+    hoje = date.today()
+    historico = carregar_historico(db, contratos, hoje)
+    series, saldos, sem_historico = _historicos_para_simulacao(historico)
+    saldo_total = float(np.clip(historico.saldo_a_executar, 0, None).sum())
+
+    resultado = {
+        "cenarios": cenarios,
+        "contratos_simulados": len(series),
+        "contratos_sem_historico": sem_historico,
+        "saldo_a_executar": round(saldo_total, 2),
+        "previsao_termino_p50": None,
+        "previsao_termino_p80": None,
+        "previsao_termino_p95": None,
+        "faturamento_30d": _faixa(np.zeros(1)),
+        "faturamento_60d": _faixa(np.zeros(1)),
+        "faturamento_90d": _faixa(np.zeros(1)),
+    }
+    if not series:
+        return resultado
+
+    termino, execucao = _executar_cenarios(series, saldos, cenarios, seed)
+    # inverted_cdf: sem interpolação, para não misturar meses finitos com inf
+    p50, p80, p95 = np.quantile(termino, [0.5, 0.8, 0.95], method="inverted_cdf")
+    resultado.update({
+        "previsao_termino_p50": _data_termino(p50, hoje),
+        "previsao_termino_p80": _data_termino(p80, hoje),
+        "previsao_termino_p95": _data_termino(p95, hoje),
+        "faturamento_30d": _faixa(execucao[:, 0]),
+        "faturamento_60d": _faixa(execucao[:, 1]),
+        "faturamento_90d": _faixa(execucao[:, 2]),
+    })
+    return resultado
+
+
+def simular_projecao_contrato(db: Session, contrato_id: int, cenarios: int = 5000,
+                              seed: Optional[int] = None) -> dict:
+    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
+    if not contrato:
+        raise ValueError("Contrato não encontrado")
+    return simular_projecao(db, [contrato], cenarios, seed)
+
+
+def simular_projecao_global(db: Session, cenarios: int = 5000, seed: Optional[int] = None) -> dict:
+    contratos = db.query(Contrato).filter(Contrato.status == "ATIVO").all()
+    return simular_projecao(db, contratos, cenarios, seed)
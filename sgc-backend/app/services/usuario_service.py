@@ -8,7 +8,7 @@ from fastapi import HTTPException, status
 
 from app.repositories.usuario_repo import UsuarioRepository
 from app.schemas.usuario import UsuarioCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verificar_senha
 from app.core.config import settings
 
 
@@ -72,11 +72,11 @@ class UsuarioService:
                 return None
             # Continua para verificação local abaixo
 
-        # Autenticação local (senha bcrypt)
+        # Autenticação local (senha bcrypt, no pool de processos)
         usuario = self.repo.get_by_email(email)
         if not usuario:
             return None
-        if not verify_password(password, usuario.senha_hash):
+        if not verificar_senha(password, usuario.senha_hash):
             return None
         return usuario
 
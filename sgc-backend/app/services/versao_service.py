@@ -0,0 +1,62 @@
+# app/services/versao_service.py
+"""
+Versões (impressões digitais) baratas dos dados lidos pelas rotas, usadas
+para ETag (app/core/etag.py). Cada função faz uma única consulta agregada,
+sujeita ao RLS da sessão.
+
+- Listas: (quantidade, maior id, última criação/alteração). Inclusões e
+  exclusões mudam a quantidade ou o maior id; alterações mudam updated_at.
+- Cálculos de contrato: updated_at do contrato (aditivos inclusive) e
+  atualizado_em da razão contrato_saldos, que é regravada no mesmo flush
+  de qualquer BM, NF ou pagamento do contrato (events.py, seção 9).
+"""
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.contrato_saldo import ContratoSaldo
+
+
+def versao_tabela(db: Session, modelo, *condicoes, joins=()) -> Tuple[Any, ...]:
+    """(quantidade, maior id, última alteração) das linhas de `modelo` que atendem às condições."""
+    alteracao = func.coalesce(modelo.updated_at, modelo.created_at)
+    stmt = select(func.count(modelo.id), func.max(modelo.id), func.max(alteracao)).select_from(modelo)
+    for alvo, condicao in joins:
+        stmt = stmt.join(alvo, condicao)
+    if condicoes:
+        stmt = stmt.where(*condicoes)
+    return tuple(db.execute(stmt).one())
+
+
+def versao_contrato(db: Session, contrato_id: int) -> Optional[Tuple[Any, ...]]:
+    """Versão dos cálculos de um contrato (None se não existir ou não for visível)."""
+    linha = db.execute(
+        select(
+            func.coalesce(Contrato.updated_at, Contrato.created_at),
+            ContratoSaldo.atualizado_em,
+        ).outerjoin(
+            ContratoSaldo, ContratoSaldo.contrato_id == Contrato.id
+        ).where(Contrato.id == contrato_id)
+    ).first()
+    if linha is None:
+        return None
+    # Cálculos dependem do dia (prazo decorrido, janelas de projeção)
+    return (*linha, date.today())
+
+
+def versao_carteira(db: Session) -> Tuple[Any, ...]:
+    """Versão dos cálculos da carteira visível (todos os contratos)."""
+    linha = db.execute(
+        select(
+            func.count(Contrato.id),
+            func.max(Contrato.id),
+            func.max(func.coalesce(Contrato.updated_at, Contrato.created_at)),
+            func.max(ContratoSaldo.atualizado_em),
+        ).outerjoin(
+            ContratoSaldo, ContratoSaldo.contrato_id == Contrato.id
+        )
+    ).one()
+    return (*linha, date.today())
@@ -2,8 +2,35 @@ export { apiFetch };
 // api.js
 const API_BASE_URL = '/api';
 
+// ---------- Renovação do access token pelo refresh token ----------
+// Várias requisições podem receber 401 ao mesmo tempo: todas aguardam a
+// mesma renovação (o refresh token é rotacionado a cada uso).
+let renovacaoEmAndamento = null;
+
+async function renovarToken() {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) return false;
+  if (!renovacaoEmAndamento) {
+    renovacaoEmAndamento = fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken })
+    })
+      .then(async (response) => {
+        if (!response.ok) return false;
+        const data = await response.json();
+        localStorage.setItem('token', data.access_token);
+        localStorage.setItem('refreshToken', data.refresh_token);
+        return true;
+      })
+      .catch(() => false)
+      .finally(() => { renovacaoEmAndamento = null; });
+  }
+  return renovacaoEmAndamento;
+}
+
 // ---------- Função interna para fetch com autenticação ----------
-async function apiFetch(endpoint, options = {}) {
+async function apiFetch(endpoint, options = {}, renovado = false) {
   const token = localStorage.getItem('token');
   const headers = {
     'Content-Type': 'application/json',
@@ -16,6 +43,14 @@ async function apiFetch(endpoint, options = {}) {
     headers
   });
 
+  // Access token expirado: renova uma vez e repete a requisição
+  if (response.status === 401 && !renovado && !endpoint.startsWith('/auth/')) {
+    if (await renovarToken()) {
+      const { Authorization, ...demaisHeaders } = options.headers || {};
+      return apiFetch(endpoint, { ...options, headers: demaisHeaders }, true);
+    }
+  }
+
   // Para status 204 (sem conteúdo), retorna response vazia
   if (response.status === 204) return response;
 
@@ -102,6 +137,7 @@ export async function login(email, password) {
   }
 
   localStorage.setItem('token', data.access_token);
+  localStorage.setItem('refreshToken', data.refresh_token);
 
   // Buscar dados do usuário e salvar perfil
   try {
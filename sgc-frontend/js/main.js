@@ -101,6 +101,7 @@ async function login(email, password) {
     });
     const data = await response.json();
     localStorage.setItem('token', data.access_token);
+    localStorage.setItem('refreshToken', data.refresh_token);
     
     // Buscar dados do usuário
     const userResponse = await apiFetch('/usuarios/me', {
@@ -154,6 +155,16 @@ document.addEventListener('DOMContentLoaded', function() {
 // Função de logout global
 window.fazerLogout = function(event) {
   event.preventDefault();
+  // Revoga a sessão no servidor (sem aguardar a resposta)
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (refreshToken) {
+    fetch('/api/auth/logout', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+      keepalive: true
+    }).catch(() => {});
+  }
   localStorage.clear();
   sessionStorage.clear();
   window.location.href = 'index.html';